@@ -1,2 +1,4 @@
+# Variables de .env chargées une seule fois, avant tout module qui lit la configuration
+from dotenv import load_dotenv
 
-
+load_dotenv()
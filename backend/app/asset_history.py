@@ -0,0 +1,62 @@
+"""
+Traçabilité des actifs (table asset_history).
+
+Les entrées d'historique sont écrites dans la même requête SQL que la modification
+de l'actif (CTE `INSERT/UPDATE ... RETURNING` suivie d'un `INSERT INTO asset_history`) :
+pas d'aller-retour supplémentaire, et l'historique ne peut pas diverger des données.
+
+La colonne `changes` (JSONB) contient le détail des champs modifiés :
+    {"statut": {"old": "in_service", "new": "en_panne"}, ...}
+"""
+
+# Champs techniques ignorés dans le calcul des différences
+DIFF_IGNORED_COLUMNS = ("id", "created_at", "updated_at", "created_by")
+
+ACTION_CREATE = "create"
+ACTION_UPDATE = "update"
+ACTION_IMPORT_CREATE = "import_create"
+ACTION_IMPORT_UPDATE = "import_update"
+
+
+def changes_sql(old_row: str, new_row: str) -> str:
+    """
+    Expression SQL (jsonb) des champs différents entre deux lignes `assets`.
+
+    `old_row` / `new_row` sont des expressions jsonb (ex: `to_jsonb(old)`).
+    Retourne NULL si aucun champ n'a changé.
+    """
+    ignored = ", ".join(f"'{column}'" for column in DIFF_IGNORED_COLUMNS)
+    return f"""(
+        SELECT jsonb_object_agg(n.key, jsonb_build_object('old', o.value, 'new', n.value))
+        FROM jsonb_each({new_row}) AS n
+        JOIN jsonb_each({old_row}) AS o ON o.key = n.key
+        WHERE n.value IS DISTINCT FROM o.value
+          AND n.key NOT IN ({ignored})
+    )"""
+
+
+def changed_fields_description(changes: str, prefix: str) -> str:
+    """Expression SQL du libellé d'une modification : préfixe + liste des champs modifiés."""
+    return f"'{prefix}' || (SELECT string_agg(key, ', ' ORDER BY key) FROM jsonb_object_keys({changes}) AS key)"
+
+
+# Colonnes renvoyées pour une entrée d'historique (schemas.AssetHistoryRead)
+HISTORY_SELECT = """
+    SELECT
+        h.id,
+        h.asset_id,
+        a.nom AS asset_nom,
+        a.numero_de_serie AS asset_numero_de_serie,
+        h.action,
+        h.description,
+        h.changes,
+        h.performed_by,
+        u.full_name AS performed_by_name,
+        h.ticket_id,
+        t.number AS ticket_number,
+        h.created_at
+    FROM asset_history h
+    JOIN assets a ON a.id = h.asset_id
+    LEFT JOIN users u ON u.id = h.performed_by
+    LEFT JOIN tickets t ON t.id = h.ticket_id
+"""
@@ -0,0 +1,469 @@
+"""
+Import en masse des actifs (CSV / XLSX).
+
+Principe :
+1. Le fichier est lu en flux (ligne par ligne) et chaque ligne est normalisée
+   (dates JJ/MM/AAAA ou AAAA-MM-JJ, prix avec virgule, espaces superflus).
+   Les lignes invalides sont écartées avec leurs erreurs.
+2. Les lignes valides sont envoyées dans une table temporaire via `COPY ... FROM STDIN`.
+3. Les contrôles inter-lignes / inter-tables (n° de série en double dans le fichier,
+   utilisateur assigné inconnu) sont faits en SQL sur la table temporaire.
+4. Les lignes restantes sont insérées en une requête : `INSERT ... ON CONFLICT (numero_de_serie) DO UPDATE`,
+   avec l'historique (asset_history) écrit dans la même requête. Les actifs identiques au fichier
+   ne sont pas réécrits.
+
+Un actif existant n'est mis à jour que sur les colonnes présentes dans l'en-tête du fichier :
+les autres champs sont repris de l'actif. Un fichier partiel (ex. « numero_de_serie;localisation »,
+sans toutes les colonnes obligatoires) ne sert qu'à mettre à jour : chaque ligne doit désigner
+un n° de série existant, sinon elle est rejetée. Seul numero_de_serie est toujours exigé.
+Le statut par défaut (in_stock) ne s'applique qu'aux nouveaux actifs ; une cellule de statut
+vide conserve le statut d'un actif existant.
+
+Aucun actif n'est supprimé. Le rapport indique, pour chaque ligne rejetée,
+son numéro de ligne dans le fichier et la liste des erreurs.
+"""
+import csv
+import io
+import re
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .asset_history import (
+    ACTION_IMPORT_CREATE,
+    ACTION_IMPORT_UPDATE,
+    changed_fields_description,
+    changes_sql,
+)
+
+
+# Colonnes importables (en-têtes attendus, insensibles à la casse)
+IMPORT_COLUMNS = [
+    "nom",
+    "type",
+    "numero_de_serie",
+    "marque",
+    "modele",
+    "statut",
+    "localisation",
+    "departement",
+    "date_d_achat",
+    "date_de_fin_garantie",
+    "prix_d_achat",
+    "fournisseur",
+    "assigned_to_user_id",
+    "assigned_to_name",
+    "notes",
+]
+
+REQUIRED_COLUMNS = [
+    "nom",
+    "type",
+    "numero_de_serie",
+    "marque",
+    "modele",
+    "localisation",
+    "departement",
+    "date_d_achat",
+]
+
+DATE_COLUMNS = ("date_d_achat", "date_de_fin_garantie")
+
+# Statut des nouveaux actifs sans statut dans le fichier (jamais appliqué à un actif existant)
+DEFAULT_STATUT = "in_stock"
+
+# Colonnes pouvant être mises à jour lorsqu'un n° de série existe déjà
+# (created_at / created_by / qr_code de l'actif existant sont conservés)
+UPSERT_COLUMNS = [c for c in IMPORT_COLUMNS if c != "numero_de_serie"]
+
+
+def update_columns(header_columns: List[str]) -> List[str]:
+    """
+    Colonnes à mettre à jour sur un actif existant : celles présentes dans l'en-tête du fichier.
+    assigned_to_name est déduit de l'utilisateur assigné lorsque seul son id est fourni.
+    """
+    present = set(header_columns)
+    if "assigned_to_user_id" in present:
+        present.add("assigned_to_name")
+    return [c for c in UPSERT_COLUMNS if c in present]
+
+_DATE_FORMATS = ("%d/%m/%Y", "%d-%m-%Y")
+
+# Lignes envoyées à COPY par bloc
+COPY_CHUNK_ROWS = 1000
+
+# L'import s'exécute dans une seule transaction : il dépasse le statement_timeout
+# par défaut (10 s, voir database.py) pour les gros fichiers
+IMPORT_STATEMENT_TIMEOUT = "300s"
+
+
+class AssetImportError(ValueError):
+    """Fichier illisible ou en-têtes invalides (le fichier entier est rejeté)."""
+
+
+def _normalize_header(value) -> str:
+    return re.sub(r"\s+", "_", str(value or "").strip().lower())
+
+
+def _parse_date(value: str) -> date:
+    try:
+        return date.fromisoformat(value)  # Cas le plus courant, beaucoup plus rapide que strptime
+    except ValueError:
+        pass
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(value)
+
+
+def _cell_to_str(value) -> str:
+    """Convertit une cellule (CSV ou XLSX) en texte."""
+    if isinstance(value, str):
+        return value.strip()
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _iter_csv(fileobj) -> Iterator[list]:
+    stream = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    first_line = stream.readline()
+    # Séparateur ";" (export Excel FR) ou ","
+    delimiter = ";" if first_line.count(";") > first_line.count(",") else ","
+    yield next(csv.reader([first_line], delimiter=delimiter))
+    yield from csv.reader(stream, delimiter=delimiter)
+
+
+def _iter_xlsx(fileobj) -> Iterator[list]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError as exc:
+        raise AssetImportError("Import XLSX indisponible : installer le paquet 'openpyxl'") from exc
+
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        for row in workbook.active.iter_rows(values_only=True):
+            yield list(row)
+    finally:
+        workbook.close()
+
+
+def iter_rows(fileobj, filename: str) -> Tuple[List[str], Iterator[Tuple[int, Dict[str, str]]]]:
+    """
+    Lit l'en-tête du fichier puis retourne (colonnes importables présentes dans l'en-tête,
+    itérateur (numéro de ligne, valeurs par colonne)).
+
+    L'en-tête est vérifié immédiatement (AssetImportError), les lignes sont lues en flux.
+    Le numéro de ligne est celui du tableur (l'en-tête est la ligne 1).
+    """
+    if filename.lower().endswith((".xlsx", ".xlsm")):
+        rows = _iter_xlsx(fileobj)
+    elif filename.lower().endswith((".csv", ".txt")):
+        rows = _iter_csv(fileobj)
+    else:
+        raise AssetImportError("Format non supporté (CSV ou XLSX attendu)")
+
+    try:
+        header = [_normalize_header(h) for h in next(rows)]
+    except StopIteration:
+        raise AssetImportError("Fichier vide")
+
+    # Les autres colonnes obligatoires peuvent manquer (fichier partiel : mise à jour seulement)
+    if "numero_de_serie" not in header:
+        raise AssetImportError("Colonne obligatoire manquante : numero_de_serie")
+
+    positions = {name: header.index(name) for name in IMPORT_COLUMNS if name in header}
+
+    def read_rows() -> Iterator[Tuple[int, Dict[str, str]]]:
+        for line_no, row in enumerate(rows, start=2):
+            values = {
+                name: _cell_to_str(row[pos]) if pos < len(row) else ""
+                for name, pos in positions.items()
+            }
+            if not any(values.values()):
+                continue  # Ligne vide
+            yield line_no, values
+
+    return list(positions), read_rows()
+
+
+def normalize_row(
+    values: Dict[str, str], required_columns: Sequence[str] = REQUIRED_COLUMNS
+) -> Tuple[Dict[str, Optional[str]], List[str]]:
+    """
+    Valide et normalise une ligne. Retourne (ligne normalisée, erreurs).
+
+    Les valeurs normalisées sont du texte prêt pour COPY (dates ISO, prix avec un point).
+    Un statut vide reste vide (None) : DEFAULT_STATUT est appliqué à l'insertion seulement.
+    `required_columns` : colonnes obligatoires présentes dans l'en-tête (fichier partiel).
+    """
+    errors = []
+    row: Dict[str, Optional[str]] = {c: (values.get(c) or None) for c in IMPORT_COLUMNS}
+
+    for column in required_columns:
+        if not row[column]:
+            errors.append(f"{column} manquant")
+
+    for column in DATE_COLUMNS:
+        if row[column]:
+            try:
+                row[column] = _parse_date(row[column]).isoformat()
+            except ValueError:
+                errors.append(f"{column} invalide : {row[column]}")
+
+    if row["prix_d_achat"]:
+        try:
+            row["prix_d_achat"] = str(Decimal(row["prix_d_achat"].replace(" ", "").replace(",", ".")))
+        except InvalidOperation:
+            errors.append(f"prix_d_achat invalide : {row['prix_d_achat']}")
+
+    if row["assigned_to_user_id"]:
+        if not row["assigned_to_user_id"].isdigit() or len(row["assigned_to_user_id"]) > 9:
+            errors.append(f"assigned_to_user_id invalide : {row['assigned_to_user_id']}")
+
+    return row, errors
+
+
+class _CopyStream(io.RawIOBase):
+    """Adapte un générateur de lignes CSV en fichier lisible pour `copy_expert`."""
+
+    def __init__(self, lines: Iterator[str]):
+        self._lines = lines
+        self._buffer = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        if not self._buffer:
+            # copy_expert accepte des blocs plus grands que `size`
+            self._buffer = next(self._lines, "").encode("utf-8")
+        if size < 0 or size >= len(self._buffer):
+            chunk, self._buffer = self._buffer, b""
+        else:
+            chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+
+def import_assets(
+    db: Session,
+    fileobj,
+    filename: str,
+    created_by: Optional[int] = None,
+    dry_run: bool = False,
+) -> dict:
+    """
+    Importe les actifs du fichier et retourne le rapport d'import.
+
+    Le commit est fait ici (sauf en `dry_run`, où tout est annulé après validation).
+    """
+    errors: Dict[int, dict] = {}
+    counters = {"total_rows": 0}
+
+    def add_error(line_no: int, numero_de_serie: Optional[str], messages: List[str]) -> None:
+        entry = errors.setdefault(line_no, {"line": line_no, "numero_de_serie": numero_de_serie, "errors": []})
+        entry["errors"].extend(messages)
+
+    header_columns, rows = iter_rows(fileobj, filename)
+    columns_to_update = update_columns(header_columns)
+    required_columns = [c for c in REQUIRED_COLUMNS if c in header_columns]
+    # Fichier partiel : les nouveaux actifs n'auraient pas toutes les colonnes obligatoires
+    update_only = len(required_columns) < len(REQUIRED_COLUMNS)
+    # Colonnes reprises de l'actif existant (absentes du fichier)
+    kept_columns = [c for c in UPSERT_COLUMNS if c not in columns_to_update]
+
+    def copy_lines() -> Iterator[str]:
+        out = io.StringIO()
+        writer = csv.writer(out)
+        pending = 0
+        for line_no, values in rows:
+            counters["total_rows"] += 1
+            row, row_errors = normalize_row(values, required_columns)
+            if row_errors:
+                add_error(line_no, row["numero_de_serie"], row_errors)
+                continue
+            # None -> champ vide non quoté = NULL pour COPY (FORMAT csv)
+            writer.writerow([line_no] + [row[c] for c in IMPORT_COLUMNS])
+            pending += 1
+            if pending == COPY_CHUNK_ROWS:
+                yield out.getvalue()
+                out.seek(0)
+                out.truncate()
+                pending = 0
+        if pending:
+            yield out.getvalue()
+
+    db.execute(text(f"SET LOCAL statement_timeout = '{IMPORT_STATEMENT_TIMEOUT}'"))
+    db.execute(text(
+        "CREATE TEMP TABLE asset_import_staging ("
+        "line_no INTEGER NOT NULL, "
+        + ", ".join(f"{c} TEXT" for c in IMPORT_COLUMNS)
+        + ") ON COMMIT DROP"
+    ))
+
+    # COPY via la connexion psycopg2 sous-jacente (même transaction que la session)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            "COPY asset_import_staging (line_no, " + ", ".join(IMPORT_COLUMNS) + ") "
+            "FROM STDIN WITH (FORMAT csv)",
+            _CopyStream(copy_lines()),
+        )
+    finally:
+        cursor.close()
+
+    # Contrôles en masse : doublons dans le fichier, utilisateurs assignés inconnus et,
+    # pour un fichier partiel, n° de série inconnus. Seules les lignes en erreur sont renvoyées.
+    rejected = db.execute(text(
+        """
+        SELECT line_no, numero_de_serie, duplicate, unknown_user, unknown_asset
+        FROM (
+            SELECT s.line_no, s.numero_de_serie,
+                   COUNT(*) OVER (PARTITION BY s.numero_de_serie) > 1 AS duplicate,
+                   s.assigned_to_user_id IS NOT NULL AND u.id IS NULL AS unknown_user,
+                   CAST(:update_only AS boolean) AND a.id IS NULL AS unknown_asset
+            FROM asset_import_staging s
+            LEFT JOIN users u ON u.id = s.assigned_to_user_id::integer
+            LEFT JOIN assets a ON a.numero_de_serie = s.numero_de_serie
+        ) checked
+        WHERE duplicate OR unknown_user OR unknown_asset
+        """
+    ), {"update_only": update_only}).mappings().all()
+    rejected_lines = []
+    for row in rejected:
+        messages = []
+        if row["duplicate"]:
+            messages.append("numero_de_serie en double dans le fichier")
+        if row["unknown_user"]:
+            messages.append("assigned_to_user_id inconnu")
+        if row["unknown_asset"]:
+            messages.append("numero_de_serie inconnu (fichier partiel : mise à jour d'actifs existants seulement)")
+        add_error(row["line_no"], row["numero_de_serie"], messages)
+        rejected_lines.append(row["line_no"])
+
+    if rejected_lines:
+        db.execute(
+            text("DELETE FROM asset_import_staging WHERE line_no = ANY(:lines)"),
+            {"lines": rejected_lines},
+        )
+
+    # Valeurs des actifs existants pour les colonnes absentes du fichier : la ligne insérée
+    # respecte les contraintes NOT NULL (vérifiées avant ON CONFLICT), et DO UPDATE ne les réécrit pas.
+    # Statut vide : un actif existant garde le sien (le défaut ne vaut que pour l'insertion).
+    kept_assignments = [f"{c} = a.{c}::text" for c in kept_columns]
+    if "statut" in columns_to_update:
+        kept_assignments.append("statut = COALESCE(s.statut, a.statut)")
+    if kept_assignments:
+        db.execute(text(
+            "UPDATE asset_import_staging s SET " + ", ".join(kept_assignments) + " "
+            "FROM assets a WHERE a.numero_de_serie = s.numero_de_serie"
+        ))
+
+    if columns_to_update:
+        on_conflict = (
+            "ON CONFLICT (numero_de_serie) DO UPDATE SET "
+            + ", ".join(f"{c} = EXCLUDED.{c}" for c in columns_to_update)
+            + ", updated_at = now() "
+            + "WHERE (" + ", ".join(f"assets.{c}" for c in columns_to_update) + ") "
+            + "IS DISTINCT FROM (" + ", ".join(f"EXCLUDED.{c}" for c in columns_to_update) + ") "
+        )
+    else:
+        on_conflict = "ON CONFLICT (numero_de_serie) DO NOTHING "
+
+    # Upsert + historique en une seule requête. Les actifs existants identiques au fichier
+    # ne sont pas réécrits (clause WHERE du DO UPDATE) : ni écriture, ni entrée d'historique.
+    result = db.execute(
+        text(
+            """
+            WITH previous AS (
+                SELECT a.*
+                FROM assets a
+                JOIN asset_import_staging s ON s.numero_de_serie = a.numero_de_serie
+            ),
+            upserted AS (
+            """
+            "INSERT INTO assets (" + ", ".join(IMPORT_COLUMNS) + ", created_by) "
+            """
+                SELECT
+                    s.nom, s.type, s.numero_de_serie, s.marque, s.modele,
+                    COALESCE(s.statut, :default_statut),
+                    s.localisation, s.departement,
+                    s.date_d_achat::date, s.date_de_fin_garantie::date, s.prix_d_achat::numeric,
+                    s.fournisseur, s.assigned_to_user_id::integer,
+                    COALESCE(s.assigned_to_name, u.full_name),
+                    s.notes, :created_by
+                FROM asset_import_staging s
+                LEFT JOIN users u ON u.id = s.assigned_to_user_id::integer
+            """
+            + on_conflict
+            + """
+                RETURNING assets.*, (xmax = 0) AS inserted
+            ),
+            diff AS (
+                SELECT
+                    up.id,
+                    up.inserted,
+                    CASE WHEN up.inserted THEN NULL ELSE """
+            + changes_sql("to_jsonb(p)", "to_jsonb(up)")
+            + """ END AS changes
+                FROM upserted up
+                LEFT JOIN previous p ON p.id = up.id
+            ),
+            history AS (
+                INSERT INTO asset_history (asset_id, action, description, performed_by, changes)
+                SELECT
+                    id,
+                    CASE WHEN inserted THEN :action_create ELSE :action_update END,
+                    CASE WHEN inserted THEN 'Création par import'
+                         ELSE COALESCE("""
+            + changed_fields_description("changes", "Import : ")
+            + """, 'Import : modification') END,
+                    :created_by,
+                    changes
+                FROM diff
+            )
+            SELECT inserted FROM upserted
+            """
+        ),
+        {
+            "created_by": created_by,
+            "default_statut": DEFAULT_STATUT,
+            "action_create": ACTION_IMPORT_CREATE,
+            "action_update": ACTION_IMPORT_UPDATE,
+        },
+    )
+    inserted = updated = 0
+    for (was_inserted,) in result:
+        if was_inserted:
+            inserted += 1
+        else:
+            updated += 1
+
+    # En simulation, la requête est exécutée puis annulée : les compteurs sont exacts
+    if dry_run:
+        db.rollback()
+    else:
+        db.commit()
+
+    valid_rows = counters["total_rows"] - len(errors)
+
+    return {
+        "total_rows": counters["total_rows"],
+        "inserted": inserted,
+        "updated": updated,
+        "unchanged": valid_rows - inserted - updated,
+        "rejected": len(errors),
+        "dry_run": dry_run,
+        "errors": sorted(errors.values(), key=lambda e: e["line"]),
+    }
@@ -0,0 +1,294 @@
+"""
+QR codes et étiquettes des actifs.
+
+- Les QR codes (SVG) sont générés dans le processus courant (environ 1 ms par code avec segno),
+  stockés sur disque sous un nom dérivé de leur contenu (sha256) puis référencés dans
+  `assets.qr_code` (URL /static/qr/...). Pas de pool de processus : un fork depuis un worker
+  multi-thread (serveur, scheduler) n'est pas sûr, et le gain ne justifie pas un pool à gérer.
+  Un même contenu n'est jamais écrit deux fois.
+- Les actifs sans QR code sont traités par lots : juste après leur création (tâche de fond)
+  et par la tâche planifiée de rattrapage (actifs existants, imports).
+- Les planches d'étiquettes PDF sont produites page par page (générateur) : le document
+  n'est jamais entièrement en mémoire. Les QR codes y sont dessinés en vectoriel.
+"""
+import hashlib
+import io
+import os
+import tempfile
+from typing import Iterator, List, Optional
+
+import segno
+from sqlalchemy import text
+
+from .database import SessionLocal
+
+
+STATIC_DIR = os.getenv(
+    "STATIC_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static"),
+)
+STATIC_URL = "/static"
+QR_SUBDIR = "qr"
+
+# Contenu du QR code (champs disponibles : id, numero_de_serie)
+ASSET_QR_PAYLOAD = os.getenv("ASSET_QR_PAYLOAD", "ACTIF:{numero_de_serie}")
+ASSET_QR_BATCH_SIZE = 500
+
+
+def qr_payload(asset_id: int, numero_de_serie: str) -> str:
+    """Texte encodé dans le QR code d'un actif."""
+    return ASSET_QR_PAYLOAD.format(id=asset_id, numero_de_serie=numero_de_serie)
+
+
+# ---------------------------------------------------------------------------
+# Génération d'un QR code
+# ---------------------------------------------------------------------------
+
+def render_qr_svg(payload: str) -> bytes:
+    """Génère le QR code SVG d'un texte."""
+    buffer = io.BytesIO()
+    segno.make(payload, error="m").save(buffer, kind="svg", scale=4, border=2, xmldecl=False)
+    return buffer.getvalue()
+
+
+def store_qr_svg(payload: str) -> str:
+    """Génère et enregistre le QR code (nom = sha256 du contenu). Retourne son URL."""
+    svg = render_qr_svg(payload)
+    digest = hashlib.sha256(svg).hexdigest()
+    relative = f"{QR_SUBDIR}/{digest[:2]}/{digest}.svg"
+    path = os.path.join(STATIC_DIR, *relative.split("/"))
+    if not os.path.exists(path):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # Fichier temporaire unique : plusieurs threads peuvent écrire le même code en même temps
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(svg)
+            os.replace(tmp_path, path)  # Écriture atomique
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    return f"{STATIC_URL}/{relative}"
+
+
+def qr_matrix(payload: str) -> List[bytes]:
+    """Matrice des modules du QR code (une ligne d'octets 0/1 par rangée)."""
+    return [bytes(row) for row in segno.make(payload, error="m").matrix]
+
+
+# ---------------------------------------------------------------------------
+# Génération des QR codes manquants
+# ---------------------------------------------------------------------------
+
+def generate_qr_codes(asset_ids: Optional[List[int]] = None) -> int:
+    """
+    Génère les QR codes des actifs qui n'en ont pas (ou seulement de `asset_ids`).
+
+    `updated_at` n'est pas modifié : le QR code est une donnée dérivée (pas de conflit If-Match).
+    Retourne le nombre d'actifs traités.
+    """
+    db = SessionLocal()
+    total = 0
+    try:
+        while True:
+            params = {"limit": ASSET_QR_BATCH_SIZE}
+            condition = ""
+            if asset_ids is not None:
+                condition = " AND id = ANY(:ids)"
+                params["ids"] = list(asset_ids)
+            rows = db.execute(
+                text(
+                    "SELECT id, numero_de_serie FROM assets WHERE qr_code IS NULL"
+                    + condition
+                    + " ORDER BY id LIMIT :limit"
+                ),
+                params,
+            ).all()
+            if not rows:
+                break
+
+            urls = [store_qr_svg(qr_payload(row.id, row.numero_de_serie)) for row in rows]
+
+            db.execute(
+                text(
+                    """
+                    UPDATE assets a
+                    SET qr_code = generated.url
+                    FROM unnest(CAST(:ids AS integer[]), CAST(:urls AS text[])) AS generated(id, url)
+                    WHERE a.id = generated.id AND a.qr_code IS NULL
+                    """
+                ),
+                {"ids": [row.id for row in rows], "urls": urls},
+            )
+            db.commit()
+            total += len(rows)
+
+            if len(rows) < ASSET_QR_BATCH_SIZE:
+                break
+    except Exception as e:
+        print(f"Erreur lors de la génération des QR codes: {str(e)}")
+        db.rollback()
+    finally:
+        db.close()
+    return total
+
+
+def generate_missing_qr_codes() -> None:
+    """Tâche planifiée : rattrapage des QR codes manquants (actifs existants, imports)."""
+    count = generate_qr_codes()
+    if count:
+        print(f"QR codes: {count} actif(s) traité(s)")
+
+
+# ---------------------------------------------------------------------------
+# Planche d'étiquettes PDF (A4, 3 x 8 étiquettes de 70 x 37 mm)
+# ---------------------------------------------------------------------------
+
+MM = 72 / 25.4
+PAGE_WIDTH, PAGE_HEIGHT = 210 * MM, 297 * MM
+LABEL_COLUMNS, LABEL_ROWS = 3, 8
+LABEL_WIDTH, LABEL_HEIGHT = 70 * MM, 37 * MM
+LABEL_PADDING = 3 * MM
+LABELS_PER_PAGE = LABEL_COLUMNS * LABEL_ROWS
+LABEL_TOP_MARGIN = (PAGE_HEIGHT - LABEL_ROWS * LABEL_HEIGHT) / 2
+
+
+def _pdf_text(value: str) -> str:
+    """Chaîne PDF littérale (WinAnsiEncoding pour les accents)."""
+    raw = (value or "").encode("cp1252", errors="replace").decode("latin-1")
+    return "(" + raw.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+
+def _truncate(value: str, length: int) -> str:
+    value = value or ""
+    return value if len(value) <= length else value[: length - 1] + "…"
+
+
+def _label_commands(x: float, y: float, label: dict, matrix: List[bytes]) -> List[str]:
+    """Commandes PDF d'une étiquette dont le coin bas-gauche est (x, y)."""
+    commands = []
+    qr_size = LABEL_HEIGHT - 2 * LABEL_PADDING
+    module = qr_size / len(matrix)
+    qr_x, qr_y = x + LABEL_PADDING, y + LABEL_PADDING
+
+    # Modules noirs regroupés par segments horizontaux (moins de rectangles)
+    for row_index, row in enumerate(matrix):
+        top = qr_y + qr_size - (row_index + 1) * module
+        start = None
+        for col_index, dark in enumerate(list(row) + [0]):
+            if dark and start is None:
+                start = col_index
+            elif not dark and start is not None:
+                commands.append(
+                    f"{qr_x + start * module:.2f} {top:.2f} {(col_index - start) * module:.2f} {module:.2f} re"
+                )
+                start = None
+    commands.append("f")
+
+    text_x = qr_x + qr_size + LABEL_PADDING
+    lines = [
+        (9, _truncate(label["nom"], 24)),
+        (8, _truncate(label["numero_de_serie"], 28)),
+        (7, _truncate(f"{label['marque']} {label['modele']}", 30)),
+        (7, _truncate(label["departement"], 30)),
+    ]
+    text_y = y + LABEL_HEIGHT - LABEL_PADDING - 9
+    for size, value in lines:
+        commands.append(f"BT /F1 {size} Tf {text_x:.2f} {text_y:.2f} Td {_pdf_text(value)} Tj ET")
+        text_y -= size + 4
+    return commands
+
+
+def _page_content(labels: List[dict], matrices: List[List[bytes]]) -> bytes:
+    commands = ["0 g"]
+    for index, (label, matrix) in enumerate(zip(labels, matrices)):
+        column, row = index % LABEL_COLUMNS, index // LABEL_COLUMNS
+        x = column * LABEL_WIDTH
+        y = PAGE_HEIGHT - LABEL_TOP_MARGIN - (row + 1) * LABEL_HEIGHT
+        commands.extend(_label_commands(x, y, label, matrix))
+    return "\n".join(commands).encode("latin-1")
+
+
+def iter_labels_pdf(department: str) -> Iterator[bytes]:
+    """
+    Produit la planche d'étiquettes PDF des actifs d'un département, morceau par morceau.
+
+    Les actifs sont lus en flux (curseur serveur) et chaque page est écrite dès qu'elle est prête ;
+    l'objet /Pages (liste des pages) est écrit en dernier, suivi de la table xref.
+    """
+    offsets = {}
+    position = 0
+
+    def emit(chunk: bytes) -> bytes:
+        nonlocal position
+        position += len(chunk)
+        return chunk
+
+    def emit_object(number: int, body: bytes) -> bytes:
+        offsets[number] = position
+        return emit(f"{number} 0 obj\n".encode() + body + b"\nendobj\n")
+
+    # 1 : catalogue, 2 : arbre des pages (écrit à la fin), 3 : police
+    yield emit(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    yield emit_object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+    yield emit_object(
+        3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"
+    )
+
+    next_number = 4
+    page_numbers = []
+
+    def write_page(labels: List[dict]) -> Iterator[bytes]:
+        nonlocal next_number
+        matrices = [qr_matrix(qr_payload(l["id"], l["numero_de_serie"])) for l in labels]
+        content = _page_content(labels, matrices)
+        content_number, page_number = next_number, next_number + 1
+        next_number += 2
+        yield emit_object(
+            content_number,
+            f"<< /Length {len(content)} >>\nstream\n".encode() + content + b"\nendstream",
+        )
+        yield emit_object(
+            page_number,
+            (
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH:.2f} {PAGE_HEIGHT:.2f}] "
+                f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_number} 0 R >>"
+            ).encode(),
+        )
+        page_numbers.append(page_number)
+
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            text(
+                """
+                SELECT id, nom, numero_de_serie, marque, modele, departement
+                FROM assets
+                WHERE departement = :departement
+                ORDER BY nom, id
+                """
+            ).execution_options(stream_results=True, yield_per=LABELS_PER_PAGE),
+            {"departement": department},
+        ).mappings()
+
+        page = []
+        for row in result:
+            page.append(dict(row))
+            if len(page) == LABELS_PER_PAGE:
+                yield from write_page(page)
+                page = []
+        if page or not page_numbers:
+            yield from write_page(page)
+    finally:
+        db.close()
+
+    kids = " ".join(f"{number} 0 R" for number in page_numbers)
+    yield emit_object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(page_numbers)} >>".encode())
+
+    xref_position = position
+    xref = [f"xref\n0 {next_number}\n", "0000000000 65535 f \n"]
+    xref.extend(f"{offsets[number]:010d} 00000 n \n" for number in range(1, next_number))
+    yield emit("".join(xref).encode())
+    yield emit(f"trailer\n<< /Size {next_number} /Root 1 0 R >>\nstartxref\n{xref_position}\n%%EOF\n".encode())
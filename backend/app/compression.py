@@ -0,0 +1,272 @@
+"""
+Compression des réponses HTTP (brotli ou gzip selon l'en-tête Accept-Encoding).
+
+- CompressionMiddleware : compresse à la volée les réponses de plus de COMPRESSION_MINIMUM_SIZE
+  octets, y compris les réponses en flux (StreamingResponse : chaque morceau est compressé au fil
+  de l'eau). Les formats déjà compressés (images, PDF, XLSX, ZIP) ne sont pas recompressés.
+  Les petites réponses complètes (données de référence : types, catégories, priorités...) sont
+  identiques d'un appel à l'autre : leur version compressée est gardée dans un cache LRU indexé
+  par l'empreinte du contenu.
+- PrecompressedStaticFiles : fichiers statiques (QR codes SVG) servis depuis une version .br / .gz
+  générée une seule fois à côté du fichier d'origine (dans un thread : brotli 11 est coûteux),
+  avec un ETag propre à chaque encodage.
+
+brotli est préféré (15 à 30 % plus petit que gzip sur le JSON, pour un coût CPU moindre) lorsque le client l'accepte.
+"""
+import gzip
+import hashlib
+import os
+import tempfile
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import anyio
+import brotli
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+# Taille minimale compressée (en dessous, l'en-tête et le CPU coûtent plus que le gain)
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+# Niveaux à la volée : compromis débit / taille (gzip 1-9, brotli 0-11)
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+# Cache des réponses complètes compressées (données de référence)
+COMPRESSION_CACHE_ENTRIES = int(os.getenv("COMPRESSION_CACHE_ENTRIES", "256"))
+COMPRESSION_CACHE_MAX_BODY = 64 * 1024
+
+# Types déjà compressés ou diffusés en continu : envoyés tels quels
+EXCLUDED_CONTENT_TYPES = (
+    "text/event-stream",
+    "image/",
+    "application/pdf",
+    "application/zip",
+    "application/gzip",
+    "application/vnd.openxmlformats-officedocument",
+)
+# Types de fichiers statiques pour lesquels une version précompressée est utile
+PRECOMPRESSIBLE_CONTENT_TYPES = ("text/", "image/svg+xml", "application/json", "application/javascript")
+
+
+def accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """Encodages acceptés par le client et leur poids q (`gzip;q=0.8, br` → {gzip: 0.8, br: 1.0})."""
+    encodings = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        encodings[name.strip().lower()] = quality
+    return encodings
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """`br`, `gzip` ou None (pas de compression), selon les préférences du client."""
+    encodings = accepted_encodings(accept_encoding)
+    wildcard = encodings.get("*", 0.0)
+    candidates = [
+        (encodings.get(name, wildcard), preference, name)
+        for preference, name in ((1, "br"), (0, "gzip"))
+    ]
+    quality, _, name = max(candidates)
+    return name if quality > 0 else None
+
+
+class _CompressedResponseCache:
+    """Cache LRU des corps compressés, indexé par (encodage, empreinte du corps non compressé)."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, bytes], bytes]" = OrderedDict()
+
+    def get_or_compress(self, encoding: str, body: bytes, compress) -> bytes:
+        if self.max_entries <= 0 or len(body) > COMPRESSION_CACHE_MAX_BODY:
+            return compress(body)
+        key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+        compressed = self._entries.get(key)
+        if compressed is not None:
+            self._entries.move_to_end(key)
+            return compressed
+        compressed = compress(body)
+        self._entries[key] = compressed
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return compressed
+
+
+_cache = _CompressedResponseCache(COMPRESSION_CACHE_ENTRIES)
+
+
+class _ExcludedTypesMixin:
+    """Étend la liste des types non compressés de Starlette (text/event-stream seulement)."""
+
+    async def send_with_compression(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            content_type = Headers(raw=message["headers"]).get("content-type", "")
+            await super().send_with_compression(message)
+            self.content_type_is_excluded = content_type.startswith(EXCLUDED_CONTENT_TYPES)
+            return
+        await super().send_with_compression(message)
+
+
+class _IdentityResponder(_ExcludedTypesMixin, IdentityResponder):
+    pass
+
+
+class _GZipResponder(_ExcludedTypesMixin, GZipResponder):
+    def __init__(self, app: ASGIApp, minimum_size: int, compresslevel: int):
+        super().__init__(app, minimum_size, compresslevel=compresslevel)
+        self.compresslevel = compresslevel
+        self.streaming = False
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if not more_body and not self.streaming:
+            # Réponse complète : gzip.compress produit le même format que GzipFile
+            return _cache.get_or_compress(
+                "gzip", body, lambda data: gzip.compress(data, compresslevel=self.compresslevel, mtime=0)
+            )
+        self.streaming = True
+        return super().apply_compression(body, more_body=more_body)
+
+
+class _BrotliResponder(_ExcludedTypesMixin, IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int):
+        super().__init__(app, minimum_size)
+        self.quality = quality
+        self.compressor: Optional[brotli.Compressor] = None
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if not more_body and self.compressor is None:
+            return _cache.get_or_compress("br", body, lambda data: brotli.compress(data, quality=self.quality))
+        if self.compressor is None:
+            self.compressor = brotli.Compressor(quality=self.quality)
+        compressed = self.compressor.process(body)
+        if more_body:
+            # Envoyer ce qui est prêt sans attendre la fin du flux
+            return compressed + self.compressor.flush()
+        return compressed + self.compressor.finish()
+
+
+class CompressionMiddleware:
+    """Compression négociée (brotli ou gzip) des réponses, avec seuil de taille et flux."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = COMPRESSION_MINIMUM_SIZE,
+        gzip_level: int = COMPRESSION_GZIP_LEVEL,
+        brotli_quality: int = COMPRESSION_BROTLI_QUALITY,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding == "br":
+            responder = _BrotliResponder(self.app, self.minimum_size, self.brotli_quality)
+        elif encoding == "gzip":
+            responder = _GZipResponder(self.app, self.minimum_size, self.gzip_level)
+        else:
+            responder = _IdentityResponder(self.app, self.minimum_size)
+        await responder(scope, receive, send)
+
+
+# ---------------------------------------------------------------------------
+# Fichiers statiques précompressés
+# ---------------------------------------------------------------------------
+
+_PRECOMPRESSORS = {
+    "br": (".br", lambda data: brotli.compress(data, quality=11)),
+    "gzip": (".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0)),
+}
+
+
+def precompressed_path(path: str, encoding: str) -> Optional[str]:
+    """
+    Chemin de la version compressée de `path` (créée ou régénérée si le fichier est plus récent).
+    None si la compression n'apporte rien.
+    """
+    suffix, compress = _PRECOMPRESSORS[encoding]
+    target = path + suffix
+    try:
+        source_mtime = os.stat(path).st_mtime
+        if os.stat(target).st_mtime >= source_mtime:
+            return target
+    except FileNotFoundError:
+        pass
+
+    with open(path, "rb") as f:
+        data = f.read()
+    compressed = compress(data)
+    if len(compressed) >= len(data):
+        return None
+    # Fichier temporaire unique : plusieurs threads peuvent compresser le même fichier en même temps
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(compressed)
+        os.replace(tmp_path, target)  # Écriture atomique
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return target
+
+
+def variant_etag(etag: str, encoding: str) -> str:
+    """ETag d'une version compressée : distinct de celui de l'original (`"abc"` → `"abc-br"`)."""
+    if etag.endswith('"'):
+        return f'{etag[:-1]}-{encoding}"'
+    return f"{etag}-{encoding}"
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles servant la version .br / .gz des fichiers texte (SVG, JSON, CSS...) si le client l'accepte."""
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        response = await super().get_response(path, scope)
+        # 304 (ETag ou date de l'original), redirections, erreurs : inchangés
+        if not isinstance(response, FileResponse) or response.status_code != 200:
+            return response
+        if response.stat_result is None or response.stat_result.st_size < COMPRESSION_MINIMUM_SIZE:
+            return response
+        media_type = response.media_type or ""
+        if not media_type.startswith(PRECOMPRESSIBLE_CONTENT_TYPES):
+            return response
+
+        request_headers = Headers(scope=scope)
+        encoding = choose_encoding(request_headers.get("accept-encoding", ""))
+        variant = None
+        if encoding:
+            variant = await anyio.to_thread.run_sync(precompressed_path, str(response.path), encoding)
+        if variant is None:
+            response.headers["Vary"] = "Accept-Encoding"
+            return response
+
+        # Représentation différente : ETag propre (un cache ne doit pas la confondre avec l'original)
+        compressed = FileResponse(variant, media_type=media_type)
+        compressed.headers["etag"] = variant_etag(response.headers["etag"], encoding)
+        compressed.headers["last-modified"] = response.headers["last-modified"]
+        compressed.headers["Content-Encoding"] = encoding
+        compressed.headers["Vary"] = "Accept-Encoding"
+        if self.is_not_modified(compressed.headers, request_headers):
+            return NotModifiedResponse(compressed.headers)
+        return compressed
@@ -1,13 +1,11 @@
+from contextlib import contextmanager
+
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.exc import OperationalError, DisconnectionError
 from fastapi import HTTPException, status
 import os
 
-from dotenv import load_dotenv
-
-load_dotenv()
-
 
 POSTGRES_USER = os.getenv("POSTGRES_USER", "tickets_user")
 POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "password")
@@ -33,6 +31,36 @@ engine = create_engine(
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Réplique en lecture (optionnelle) : serveur secondaire en réplication, ou même serveur avec un
+# rôle en lecture seule. Activée dès que POSTGRES_READ_HOST ou POSTGRES_READ_USER est défini ;
+# les autres paramètres reprennent ceux du serveur principal. Voir app/read_replica.py.
+READ_REPLICA_ENABLED = bool(os.getenv("POSTGRES_READ_HOST") or os.getenv("POSTGRES_READ_USER"))
+
+if READ_REPLICA_ENABLED:
+    READ_DATABASE_URL = (
+        f"postgresql://{os.getenv('POSTGRES_READ_USER', POSTGRES_USER)}"
+        f":{os.getenv('POSTGRES_READ_PASSWORD', POSTGRES_PASSWORD)}"
+        f"@{os.getenv('POSTGRES_READ_HOST', POSTGRES_HOST)}:{os.getenv('POSTGRES_READ_PORT', POSTGRES_PORT)}"
+        f"/{os.getenv('POSTGRES_READ_DB', POSTGRES_DB)}"
+    )
+    read_engine = create_engine(
+        READ_DATABASE_URL,
+        echo=False,
+        future=True,
+        connect_args={
+            "connect_timeout": 5,
+            # Lectures de rapports : délai plus long, et toute écriture est refusée
+            "options": "-c statement_timeout=30000 -c default_transaction_read_only=on",
+        },
+        pool_pre_ping=True,
+    )
+else:
+    read_engine = engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+# Connexions ouvertes au démarrage (évite le coût de connexion sur les premières requêtes)
+DB_POOL_WARM_SIZE = int(os.getenv("DB_POOL_WARM_SIZE", str(engine.pool.size())))
+
 Base = declarative_base()
 
 
@@ -58,3 +86,59 @@ def get_db():
         db.close()
 
 
+def warm_pool(connections: int = DB_POOL_WARM_SIZE, target=None) -> int:
+    """Ouvre `connections` connexions du pool de `target` (défaut : engine) puis les y remet. Retourne le nombre ouvert."""
+    target = target if target is not None else engine
+    opened = []
+    try:
+        for _ in range(connections):
+            connection = target.connect()
+            opened.append(connection)
+            connection.exec_driver_sql("SELECT 1")
+    except (OperationalError, DisconnectionError) as e:
+        print(f"[DB] Préchauffage du pool interrompu : {e}")
+    finally:
+        for connection in opened:
+            connection.close()
+    return len(opened)
+
+
+# ---------------------------------------------------------------------------
+# Scripts de migration
+# ---------------------------------------------------------------------------
+
+@contextmanager
+def migration_connection(autocommit: bool = False):
+    """
+    Connexion pour les scripts de migration, sans statement_timeout : créations d'index,
+    mises à jour en masse et VACUUM dépassent les 10 s des requêtes de l'application.
+    La connexion n'est pas remise dans le pool (son réglage ne doit pas servir aux requêtes).
+    """
+    conn = engine.connect()
+    if autocommit:
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+    try:
+        conn.exec_driver_sql("SET statement_timeout = 0")
+        if not autocommit:
+            conn.commit()  # Réglage de session conservé pour les transactions suivantes
+        yield conn
+    finally:
+        conn.invalidate()
+        conn.close()
+
+
+def create_index_concurrently(conn, index_name: str, definition: str) -> None:
+    """
+    `CREATE INDEX CONCURRENTLY IF NOT EXISTS <index_name> <definition>` (connexion AUTOCOMMIT).
+
+    Une création CONCURRENTLY interrompue (délai, annulation) laisse un index INVALID, que
+    IF NOT EXISTS ignorerait ensuite : il est supprimé puis recréé.
+    """
+    valid = conn.execute(
+        text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+        {"name": index_name},
+    ).scalar()
+    if valid is False:
+        print(f"Index '{index_name}' invalide (création précédente interrompue) : suppression...")
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}"))
+    conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name} {definition}"))
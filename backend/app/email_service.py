@@ -1,15 +1,12 @@
 """
 Service d'envoi d'emails pour les notifications de tickets
 """
-import smtplib
 import os
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import threading
 from typing import List, Optional
 from urllib.parse import urlencode
-from dotenv import load_dotenv
 
-load_dotenv()
+from .metrics import EMAIL_DISABLED, EMAIL_FAILED, EMAIL_NO_RECIPIENT, EMAIL_SENT, record_email
 
 
 class EmailService:
@@ -64,18 +61,26 @@ class EmailService:
         """
         if not self.email_enabled:
             print(f"[EMAIL] Envoi désactivé - Email non envoyé à {to_emails}")
+            record_email(EMAIL_DISABLED)
             return False
         
         if not to_emails:
             print("[EMAIL] Aucun destinataire spécifié")
+            record_email(EMAIL_NO_RECIPIENT)
             return False
         
         # Filtrer les emails vides
         to_emails = [email for email in to_emails if email and email.strip()]
         if not to_emails:
             print("[EMAIL] Aucun email valide dans la liste")
+            record_email(EMAIL_NO_RECIPIENT)
             return False
         
+        # Importés au premier envoi : inutiles au démarrage des processus
+        import smtplib
+        from email.mime.multipart import MIMEMultipart
+        from email.mime.text import MIMEText
+
         try:
             # Créer le message
             msg = MIMEMultipart('alternative')
@@ -108,10 +113,12 @@ class EmailService:
             server.quit()
             
             print(f"[EMAIL] Email envoyé avec succès à {to_emails}")
+            record_email(EMAIL_SENT)
             return True
             
         except Exception as e:
             print(f"[EMAIL] Erreur lors de l'envoi de l'email: {str(e)}")
+            record_email(EMAIL_FAILED)
             return False
     
     def send_ticket_created_notification(
@@ -1425,6 +1432,18 @@ Cordialement,
         return self.send_email([to_email.strip()], subject, body, html_body)
 
 
-# Instance globale du service email
-email_service = EmailService()
+# Instance globale du service email, construite au premier envoi (et non à l'import) :
+# la configuration SMTP est lue après le chargement de .env et des variables du processus.
+_email_service: Optional[EmailService] = None
+_email_service_lock = threading.Lock()
+
+
+def get_email_service() -> EmailService:
+    """Service email partagé par l'application (les paramètres modifiés via /settings/email y sont conservés)."""
+    global _email_service
+    if _email_service is None:
+        with _email_service_lock:
+            if _email_service is None:
+                _email_service = EmailService()
+    return _email_service
 
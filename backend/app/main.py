@@ -1,14 +1,92 @@
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
 
 from .routers import auth, tickets, users, notifications, settings, ticket_config, assets, maintenance
-from .scheduler import run_scheduled_tasks
+from .asset_labels import STATIC_DIR, STATIC_URL, generate_missing_qr_codes
+from .database import READ_REPLICA_ENABLED, engine, read_engine, warm_pool
+from . import metrics, profiling, query_counter
+from .read_replica import ReadYourWritesMiddleware
+from .compression import COMPRESSION_ENABLED, CompressionMiddleware, PrecompressedStaticFiles
+from .serialization import ORJSONResponse
+from .scheduler import (
+    SCHEDULER_ENABLED,
+    SchedulerElection,
+    check_warranty_expirations,
+    run_scheduled_tasks,
+)
+
+
+def start_scheduler():
+    """Crée et démarre le scheduler des tâches planifiées (uniquement dans le processus désigné)."""
+    # Importé ici : les processus sans tâches planifiées ne chargent pas APScheduler
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from apscheduler.triggers.cron import CronTrigger
+
+    # Configurer le scheduler pour exécuter les tâches planifiées
+    scheduler = BackgroundScheduler()
+    # Exécuter toutes les heures
+    scheduler.add_job(
+        profiling.profiled_job(run_scheduled_tasks),
+        trigger=CronTrigger(minute=0),  # Toutes les heures à la minute 0
+        id='run_scheduled_tasks',
+        name='Exécuter les tâches planifiées (rappels et clôtures)',
+        replace_existing=True
+    )
+    # Alertes d'expiration de garantie des actifs : une fois par jour
+    scheduler.add_job(
+        profiling.profiled_job(check_warranty_expirations),
+        trigger=CronTrigger(hour=7, minute=0),  # Tous les jours à 7h00
+        id='check_warranty_expirations',
+        name="Alertes d'expiration de garantie des actifs",
+        replace_existing=True
+    )
+    # Rattrapage des QR codes manquants (actifs existants, imports) : toutes les heures
+    scheduler.add_job(
+        profiling.profiled_job(generate_missing_qr_codes),
+        trigger=CronTrigger(minute=30),  # Toutes les heures à la minute 30
+        id='generate_missing_qr_codes',
+        name='Générer les QR codes manquants des actifs',
+        replace_existing=True
+    )
+    scheduler.start()
+    return scheduler
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Démarrage et arrêt de chaque processus serveur (et non à l'import du module) :
+    préchauffage du pool de connexions, puis tâches planifiées dans un seul processus
+    (verrou PostgreSQL repris par un autre worker si son détenteur s'arrête, voir
+    scheduler.SchedulerElection).
+    """
+    warm_pool()
+    if READ_REPLICA_ENABLED:
+        warm_pool(target=read_engine)
+    election = None
+    if SCHEDULER_ENABLED:
+        election = SchedulerElection(engine, start_scheduler)
+        election.start()
+    try:
+        yield
+    finally:
+        if election is not None:
+            election.stop()
+        engine.dispose()
+        if READ_REPLICA_ENABLED:
+            read_engine.dispose()
 
 
 def create_app() -> FastAPI:
-    app = FastAPI(title="Système de gestion des tickets")
+    # Réponses JSON encodées par orjson (voir app/serialization.py)
+    app = FastAPI(
+        title="Système de gestion des tickets",
+        default_response_class=ORJSONResponse,
+        lifespan=lifespan,
+    )
 
     # Configuration CORS pour permettre les requêtes depuis le frontend
     app.add_middleware(
@@ -25,6 +103,34 @@ def create_app() -> FastAPI:
         expose_headers=["*"],
     )
 
+    # Compression brotli/gzip des réponses volumineuses (listes de tickets, d'actifs, d'utilisateurs).
+    # Ajoutée avant les métriques et le profilage : leur mesure inclut le coût de la compression.
+    if COMPRESSION_ENABLED:
+        app.add_middleware(CompressionMiddleware)
+
+    # Métriques Prometheus (latence par route, requêtes SQL par requête, pool, emails)
+    if metrics.METRICS_ENABLED:
+        metrics.instrument_engine(engine)
+        if READ_REPLICA_ENABLED:
+            metrics.instrument_engine(read_engine, pool_gauges=False)
+        app.add_middleware(metrics.MetricsMiddleware)
+        app.add_route(metrics.METRICS_PATH, metrics.metrics_endpoint, include_in_schema=False)
+
+    # Profilage à la demande (Admin : X-Profile: 1) et échantillon d'une requête sur N
+    app.add_middleware(profiling.ProfilingMiddleware)
+
+    # Comptage des requêtes SQL par requête HTTP et détection des N+1.
+    # Ajouté en dernier : englobe MetricsMiddleware, qui lit ces compteurs.
+    query_counter.instrument_engine(engine)
+    if READ_REPLICA_ENABLED:
+        query_counter.instrument_engine(read_engine)
+    app.add_middleware(query_counter.QueryCounterMiddleware)
+
+    # Lecture de ses propres écritures : les lectures qui suivent une modification
+    # de l'utilisateur restent sur le serveur principal (voir app/read_replica.py)
+    if READ_REPLICA_ENABLED:
+        app.add_middleware(ReadYourWritesMiddleware)
+
     # Routers principaux
     app.include_router(auth.router, prefix="/auth", tags=["auth"])
     app.include_router(tickets.router, prefix="/tickets", tags=["tickets"])
@@ -37,17 +143,12 @@ def create_app() -> FastAPI:
     # Routes de maintenance (statistiques base de données, etc.)
     app.include_router(maintenance.router, tags=["maintenance"])
 
-    # Configurer le scheduler pour exécuter les tâches planifiées
-    scheduler = BackgroundScheduler()
-    # Exécuter toutes les heures
-    scheduler.add_job(
-        run_scheduled_tasks,
-        trigger=CronTrigger(minute=0),  # Toutes les heures à la minute 0
-        id='run_scheduled_tasks',
-        name='Exécuter les tâches planifiées (rappels et clôtures)',
-        replace_existing=True
-    )
-    scheduler.start()
+    # Rattacher les handlers synchrones au profileur (après l'ajout de toutes les routes)
+    profiling.instrument_routes(app)
+
+    # Fichiers générés (QR codes des actifs), servis précompressés
+    os.makedirs(STATIC_DIR, exist_ok=True)
+    app.mount(STATIC_URL, PrecompressedStaticFiles(directory=STATIC_DIR), name="static")
 
     return app
 
@@ -0,0 +1,223 @@
+"""
+Métriques Prometheus de l'API (exposées sur /metrics).
+
+- Requêtes HTTP : nombre par méthode / route / code de statut, latence (histogramme),
+  requêtes en cours.
+- Base de données : nombre et durée des requêtes SQL de chaque requête HTTP,
+  connexions du pool (utilisées / disponibles / débordement).
+- Emails : résultat des envois (envoyé, échec, désactivé, sans destinataire).
+
+Les routes sont étiquetées par leur modèle (`/tickets/{ticket_id}`) et non par l'URL appelée :
+le nombre de séries reste borné.
+
+Accès à /metrics (routes, volumes, erreurs : à ne pas exposer publiquement) : adresses de
+METRICS_ALLOWED_IPS (boucle locale par défaut), ou en-tête `Authorization: Bearer <METRICS_TOKEN>`
+si METRICS_TOKEN est défini (`authorization` / `bearer_token_file` côté Prometheus). Sinon : 403.
+L'adresse du client est celle de X-Forwarded-For lorsque la connexion vient d'un proxy de
+FORWARDED_ALLOW_IPS (serve.py, 127.0.0.1 par défaut) : derrière un proxy inverse local, toute
+requête passée par le proxy sans cet en-tête est vue comme locale. Bloquer alors /metrics sur le
+proxy, ou vider METRICS_ALLOWED_IPS et utiliser le jeton.
+
+Plusieurs workers : définir PROMETHEUS_MULTIPROC_DIR (répertoire vide, accessible en écriture)
+avant le démarrage des processus ; /metrics agrège alors les valeurs de tous les workers.
+"""
+import hmac
+import ipaddress
+import os
+import time
+from typing import Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.requests import Request
+from starlette.responses import Response
+
+from .query_counter import current_query_stats
+
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+METRICS_PATH = "/metrics"
+# Jeton exigé des clients hors de METRICS_ALLOWED_IPS (vide : ces clients sont refusés)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+# Adresses ou réseaux autorisés sans jeton, séparés par des virgules
+METRICS_ALLOWED_IPS = [
+    ipaddress.ip_network(value.strip(), strict=False)
+    for value in os.getenv("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",")
+    if value.strip()
+]
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+DB_QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "Requêtes HTTP traitées", ["method", "route", "status"]
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Durée de traitement des requêtes HTTP",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Requêtes HTTP en cours", ["method"], multiprocess_mode="livesum"
+)
+HTTP_REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Nombre de requêtes SQL par requête HTTP",
+    ["method", "route"],
+    buckets=DB_QUERY_COUNT_BUCKETS,
+)
+HTTP_REQUEST_DB_DURATION = Histogram(
+    "http_request_db_duration_seconds",
+    "Temps passé en base de données par requête HTTP",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_QUERIES = Counter(
+    "db_queries_total", "Requêtes SQL exécutées (requêtes HTTP, tâches planifiées et de fond)"
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections",
+    "Connexions du pool SQLAlchemy par état",
+    ["state"],
+    multiprocess_mode="livesum",
+)
+EMAILS = Counter("emails_total", "Envois d'emails par résultat", ["outcome"])
+
+EMAIL_SENT = "sent"
+EMAIL_FAILED = "failed"
+EMAIL_DISABLED = "disabled"
+EMAIL_NO_RECIPIENT = "no_recipient"
+for _outcome in (EMAIL_SENT, EMAIL_FAILED, EMAIL_DISABLED, EMAIL_NO_RECIPIENT):
+    EMAILS.labels(_outcome)  # Séries présentes dès le démarrage (valeur 0)
+
+
+_engine: Optional[Engine] = None
+
+
+def record_email(outcome: str) -> None:
+    EMAILS.labels(outcome).inc()
+
+
+# ---------------------------------------------------------------------------
+# Instrumentation SQLAlchemy
+# ---------------------------------------------------------------------------
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    DB_QUERIES.inc()
+
+
+def instrument_engine(engine: Engine, pool_gauges: bool = True) -> None:
+    """
+    Branche le compteur global de requêtes SQL sur le moteur (sans effet s'il l'est déjà).
+    `pool_gauges` : l'état de son pool est publié (moteur principal uniquement).
+    """
+    global _engine
+    if pool_gauges:
+        _engine = engine
+    if not event.contains(engine, "after_cursor_execute", _count_query):
+        event.listen(engine, "after_cursor_execute", _count_query)
+
+
+def _update_pool_gauges() -> None:
+    if _engine is None:
+        return
+    pool = _engine.pool
+    if hasattr(pool, "checkedout"):
+        DB_POOL_CONNECTIONS.labels("checked_out").set(pool.checkedout())
+        DB_POOL_CONNECTIONS.labels("idle").set(pool.checkedin())
+        DB_POOL_CONNECTIONS.labels("overflow").set(max(pool.overflow(), 0))
+
+
+# ---------------------------------------------------------------------------
+# Middleware et route /metrics
+# ---------------------------------------------------------------------------
+
+def _route_label(scope, root_path: str) -> str:
+    """Modèle de la route appelée (`/assets/{asset_id}`), ou préfixe de l'application montée."""
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    mounted_path = scope.get("root_path", "")[len(root_path):]
+    return mounted_path or "<unmatched>"
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI (et non BaseHTTPMiddleware) : les réponses en flux ne sont pas
+    mises en mémoire et la durée mesurée inclut l'envoi complet du corps.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == METRICS_PATH:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        root_path = scope.get("root_path", "")
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_progress.dec()
+
+            route = _route_label(scope, root_path)
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+            HTTP_REQUEST_DURATION.labels(method, route).observe(elapsed)
+            stats = current_query_stats()  # Fournies par QueryCounterMiddleware
+            if stats is not None:
+                HTTP_REQUEST_DB_QUERIES.labels(method, route).observe(stats.queries)
+                HTTP_REQUEST_DB_DURATION.labels(method, route).observe(stats.duration)
+            _update_pool_gauges()
+
+
+def metrics_allowed(request: Request) -> bool:
+    """Client autorisé : adresse dans METRICS_ALLOWED_IPS ou jeton METRICS_TOKEN valide."""
+    if METRICS_TOKEN:
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and hmac.compare_digest(token.encode(), METRICS_TOKEN.encode()):
+            return True
+    if request.client is None:
+        return False
+    try:
+        address = ipaddress.ip_address(request.client.host)
+    except ValueError:
+        return False
+    return any(address in network for network in METRICS_ALLOWED_IPS)
+
+
+def metrics_endpoint(request: Request) -> Response:
+    """Exposition au format texte Prometheus."""
+    if not metrics_allowed(request):
+        return Response("Forbidden", status_code=403, media_type="text/plain")
+    _update_pool_gauges()
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
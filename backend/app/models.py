@@ -6,6 +6,7 @@ from sqlalchemy import (
     DateTime,
     Enum,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
@@ -104,6 +105,7 @@ class Ticket(Base):
     user_agency = Column(String(100), nullable=True)  # Agence de l'utilisateur créateur
 
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)  # Mis à jour à chaque modification (flux /tickets/changes)
     assigned_at = Column(DateTime, nullable=True)
     resolved_at = Column(DateTime, nullable=True)
     closed_at = Column(DateTime, nullable=True)
@@ -120,6 +122,24 @@ class Ticket(Base):
     comments = relationship("Comment", back_populates="ticket", cascade="all, delete-orphan")
     history = relationship("TicketHistory", back_populates="ticket", cascade="all, delete-orphan")
 
+    # Synchronisation incrémentale : tickets modifiés après un curseur (updated_at, id)
+    __table_args__ = (Index("ix_tickets_updated_at", "updated_at", "id"),)
+
+
+class TicketTombstone(Base):
+    """
+    Trace d'un ticket supprimé, pour que le flux GET /tickets/changes puisse signaler les suppressions.
+    Pas de clé étrangère vers tickets : le ticket n'existe plus.
+    """
+    __tablename__ = "ticket_tombstones"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    ticket_id = Column(Integer, nullable=False)
+    number = Column(Integer, nullable=True)
+    creator_id = Column(Integer, nullable=True)
+    technician_id = Column(Integer, nullable=True)
+    deleted_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+
 
 class CommentType(str, PyEnum):
     TECHNIQUE = "technique"
@@ -142,6 +162,14 @@ class Comment(Base):
     ticket = relationship("Ticket", back_populates="comments")
     user = relationship("User")
 
+    # Pagination par curseur des commentaires d'un ticket (ordre chronologique)
+    __table_args__ = (Index("ix_comments_ticket_created", "ticket_id", "created_at", "id"),)
+
+
+class HistoryEventType(str, PyEnum):
+    STATUT = "statut"  # Action sur le ticket (changement de statut, assignation, modification...)
+    COMMENTAIRE = "commentaire"  # Ajout d'un commentaire : le texte reste dans comments (via comment_id)
+
 
 class TicketHistory(Base):
     __tablename__ = "ticket_history"
@@ -153,9 +181,15 @@ class TicketHistory(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     reason = Column(Text, nullable=True)
     changed_at = Column(DateTime, default=datetime.utcnow)
+    event_type = Column(String(30), nullable=False, default=HistoryEventType.STATUT.value, server_default=HistoryEventType.STATUT.value)
+    comment_id = Column(Integer, ForeignKey("comments.id", ondelete="SET NULL"), nullable=True)  # Renseigné pour les événements "commentaire" (NULL si le commentaire est supprimé)
 
     ticket = relationship("Ticket", back_populates="history")
     user = relationship("User")
+    comment = relationship("Comment")
+
+    # Pagination par curseur de l'historique d'un ticket (ordre chronologique)
+    __table_args__ = (Index("ix_ticket_history_ticket_changed", "ticket_id", "changed_at", "id"),)
 
 
 class TicketTypeModel(Base):
@@ -243,6 +277,7 @@ class NotificationType(str, PyEnum):
     RAPPORT_PERFORMANCE = "rapport_performance"
     PROBLEME_RECURRENT = "problème_récurrent"
     SATISFACTION_FAIBLE = "satisfaction_faible"
+    GARANTIE_EXPIRATION = "garantie_expiration"
     
     # Notifications générales
     RESOLUTION = "resolution"
@@ -0,0 +1,309 @@
+"""
+Profilage à la demande des requêtes HTTP et des tâches planifiées.
+
+Un profileur par échantillonnage relève périodiquement (PROFILING_INTERVAL_MS) la pile
+d'appels du thread qui exécute la route ou la tâche, sans instrumenter le code.
+Le résultat est écrit au format « collapsed stacks » (une pile par ligne, suivie du nombre
+d'échantillons), lisible par flamegraph.pl, speedscope ou inferno :
+
+    GET /assets/42;get_asset (app/routers/assets.py:412);execute (sqlalchemy/orm/session.py:2262) 42
+
+Déclenchement :
+- requête d'un Admin avec l'en-tête `X-Profile: 1` ou le paramètre `?profile=1` :
+  l'identifiant du profil est renvoyé dans l'en-tête X-Profile-Id ;
+- échantillon glissant : une requête sur PROFILING_SAMPLE_RATE (0 = désactivé) ;
+- tâches planifiées : chaque exécution si PROFILING_JOBS=true.
+
+Les profils sont écrits dans PROFILING_DIR (les PROFILING_MAX_FILES plus récents sont
+conservés) et consultables via /maintenance/profiles.
+"""
+import functools
+import itertools
+import os
+import re
+import sys
+import threading
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from urllib.parse import parse_qs
+
+from fastapi.routing import APIRoute
+from jose import JWTError, jwt
+from starlette.concurrency import run_in_threadpool
+
+from . import models
+from .database import SessionLocal
+from .security import ALGORITHM, SECRET_KEY
+
+
+PROFILING_DIR = os.getenv(
+    "PROFILING_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "profiles"),
+)
+PROFILING_INTERVAL_MS = float(os.getenv("PROFILING_INTERVAL_MS", "5"))
+PROFILING_SAMPLE_RATE = int(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_MAX_FILES = int(os.getenv("PROFILING_MAX_FILES", "200"))
+PROFILING_JOBS = os.getenv("PROFILING_JOBS", "false").lower() == "true"
+
+PROFILE_EXTENSION = ".folded"
+PROFILE_ID_PATTERN = re.compile(r"^\d{8}T\d{6}-[0-9a-f]{8}$")
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_current_profile: ContextVar[Optional["Profile"]] = ContextVar("profile", default=None)
+_request_counter = itertools.count(1)
+_short_paths: Dict[str, str] = {}
+
+
+def _short_path(filename: str) -> str:
+    """Chemin lisible : relatif au backend, ou à partir de site-packages."""
+    short = _short_paths.get(filename)
+    if short is None:
+        if filename.startswith(_BACKEND_DIR):
+            short = os.path.relpath(filename, _BACKEND_DIR)
+        elif "site-packages" in filename:
+            short = filename.split("site-packages", 1)[1].lstrip("/\\")
+        else:
+            short = os.path.basename(filename)
+        short = _short_paths[filename] = short.replace("\\", "/")
+    return short
+
+
+class Profile:
+    """Échantillonne la pile des threads rattachés au profil jusqu'à l'appel de stop()."""
+
+    def __init__(self, label: str):
+        self.id = f"{datetime.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        self.label = label
+        self.samples: Counter = Counter()
+        self._threads: Dict[int, str] = {}  # id du thread -> racine des piles
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._sampler = threading.Thread(target=self._sample, name=f"profiler-{self.id}", daemon=True)
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+
+    def _sample(self) -> None:
+        interval = PROFILING_INTERVAL_MS / 1000
+        while not self._stop.wait(interval):
+            if not self._threads:
+                continue
+            frames = sys._current_frames()
+            for thread_id, root in list(self._threads.items()):
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    self.samples[_collapse(frame, root)] += 1
+
+    def run(self, func: Callable, *args, **kwargs):
+        """Exécute `func` dans le thread courant en l'échantillonnant."""
+        thread_id = threading.get_ident()
+        self._threads[thread_id] = self.label
+        try:
+            return _run_attached(func, args, kwargs)
+        finally:
+            self._threads.pop(thread_id, None)
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+def _run_attached(func: Callable, args, kwargs):
+    # Cadre de référence : les piles échantillonnées s'arrêtent à cette fonction
+    return func(*args, **kwargs)
+
+
+_RUN_ATTACHED_CODE = _run_attached.__code__
+
+
+def _collapse(frame, root: str) -> str:
+    names = []
+    while frame is not None and frame.f_code is not _RUN_ATTACHED_CODE:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    names.append(root)
+    names.reverse()
+    return ";".join(names)
+
+
+# ---------------------------------------------------------------------------
+# Stockage des profils
+# ---------------------------------------------------------------------------
+
+def _slug(label: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "-", label).strip("-")[:80]
+
+
+def save_profile(profile: Profile) -> Optional[str]:
+    """Écrit le profil dans PROFILING_DIR et supprime les plus anciens. Retourne le chemin du fichier."""
+    if not profile.samples:
+        return None
+    try:
+        os.makedirs(PROFILING_DIR, exist_ok=True)
+        path = os.path.join(PROFILING_DIR, f"{profile.id}_{_slug(profile.label)}{PROFILE_EXTENSION}")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(profile.collapsed())
+
+        files = sorted(name for name in os.listdir(PROFILING_DIR) if name.endswith(PROFILE_EXTENSION))
+        for name in files[: max(len(files) - PROFILING_MAX_FILES, 0)]:
+            os.remove(os.path.join(PROFILING_DIR, name))
+        return path
+    except OSError as e:
+        print(f"[PROFIL] Erreur lors de l'écriture du profil {profile.id}: {e}")
+        return None
+
+
+def list_profiles() -> List[dict]:
+    """Profils enregistrés, du plus récent au plus ancien."""
+    if not os.path.isdir(PROFILING_DIR):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(PROFILING_DIR), reverse=True):
+        if not name.endswith(PROFILE_EXTENSION):
+            continue
+        profile_id, _, label = name[: -len(PROFILE_EXTENSION)].partition("_")
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            continue
+        profiles.append(
+            {
+                "id": profile_id,
+                "label": label,
+                "created_at": datetime.strptime(profile_id[:15], "%Y%m%dT%H%M%S"),
+                "size_bytes": os.path.getsize(os.path.join(PROFILING_DIR, name)),
+            }
+        )
+    return profiles
+
+
+def profile_path(profile_id: str) -> Optional[str]:
+    """Chemin du fichier d'un profil (None si l'identifiant est invalide ou inconnu)."""
+    if not PROFILE_ID_PATTERN.match(profile_id) or not os.path.isdir(PROFILING_DIR):
+        return None
+    for name in os.listdir(PROFILING_DIR):
+        if name.startswith(f"{profile_id}_") and name.endswith(PROFILE_EXTENSION):
+            return os.path.join(PROFILING_DIR, name)
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Requêtes HTTP
+# ---------------------------------------------------------------------------
+
+def _profiled_endpoint(func: Callable) -> Callable:
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profile = _current_profile.get()
+        if profile is None:
+            return func(*args, **kwargs)
+        return profile.run(func, *args, **kwargs)
+
+    wrapper.profiling_wrapped = True
+    return wrapper
+
+
+def instrument_routes(app) -> None:
+    """
+    Rattache le thread d'exécution des routes synchrones au profil de la requête.
+
+    FastAPI exécute les handlers synchrones dans un pool de threads : le profil (contextvar)
+    y est visible, mais le profileur doit savoir quel thread échantillonner.
+    """
+    for route in app.routes:
+        if not isinstance(route, APIRoute) or route.dependant.is_coroutine_callable:
+            continue
+        call = route.dependant.call
+        if not getattr(call, "profiling_wrapped", False):
+            route.dependant.call = _profiled_endpoint(call)
+
+
+def _is_admin_token(token: str) -> bool:
+    try:
+        user_id = int(jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub"))
+    except (JWTError, TypeError, ValueError):
+        return False
+    db = SessionLocal()
+    try:
+        user = db.get(models.User, user_id)
+        return user is not None and user.role is not None and user.role.name == "Admin"
+    finally:
+        db.close()
+
+
+def _profile_requested(scope) -> Optional[str]:
+    """Jeton Bearer de la requête si le profilage est demandé (en-tête ou paramètre)."""
+    headers = dict(scope.get("headers") or [])
+    flag = headers.get(b"x-profile", b"").decode()
+    if not flag:
+        flag = parse_qs(scope.get("query_string", b"").decode()).get("profile", [""])[0]
+    if flag.lower() not in ("1", "true"):
+        return None
+    authorization = headers.get(b"authorization", b"").decode()
+    scheme, _, token = authorization.partition(" ")
+    return token if scheme.lower() == "bearer" and token else None
+
+
+class ProfilingMiddleware:
+    """Middleware ASGI : profile les requêtes demandées par un Admin et une requête sur N."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = _profile_requested(scope)
+        requested = token is not None and await run_in_threadpool(_is_admin_token, token)
+        sampled = PROFILING_SAMPLE_RATE > 0 and next(_request_counter) % PROFILING_SAMPLE_RATE == 0
+        if not (requested or sampled):
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(f"{scope['method']} {scope['path']}")
+
+        async def send_wrapper(message):
+            if requested and message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", profile.id.encode())
+                ]
+            await send(message)
+
+        context_token = _current_profile.set(profile)
+        profile.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile.stop()
+            _current_profile.reset(context_token)
+            await run_in_threadpool(save_profile, profile)
+
+
+# ---------------------------------------------------------------------------
+# Tâches planifiées
+# ---------------------------------------------------------------------------
+
+def profiled_job(func: Callable) -> Callable:
+    """Profile chaque exécution d'une tâche planifiée si PROFILING_JOBS=true."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not PROFILING_JOBS:
+            return func(*args, **kwargs)
+        profile = Profile(f"job {func.__name__}")
+        profile.start()
+        try:
+            return profile.run(func, *args, **kwargs)
+        finally:
+            profile.stop()
+            save_profile(profile)
+
+    return wrapper
@@ -0,0 +1,57 @@
+"""
+Requêtes ORM fréquentes, construites une seule fois à l'import.
+
+Un `db.query(...).options(...).filter(...)` reconstruit à chaque appel la requête, ses options
+de chargement et sa clé de cache (de l'ordre de 200 µs de Python pour un ticket avec son créateur
+et son technicien), avant même de trouver le SQL déjà compilé dans le cache du moteur.
+Les `select()` de ce module sont immuables : leur clé de cache est calculée une fois, et seule
+la valeur des paramètres (bindparam) change d'un appel à l'autre.
+
+Les recherches par clé primaire sans options passent par `db.get(Modèle, id)` : l'objet déjà
+présent dans la session (utilisateur connecté, créateur chargé avec le ticket...) est renvoyé
+sans requête SQL.
+
+Mesure : `python -m benchmarks.statements` (voir BENCHMARKS.md).
+"""
+from typing import List, Optional
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import Session, joinedload
+
+from . import models
+
+
+# Ticket avec son créateur et son technicien (réponse TicketRead)
+TICKET_WITH_PEOPLE = (
+    select(models.Ticket)
+    .options(
+        joinedload(models.Ticket.creator).joinedload(models.User.role),
+        joinedload(models.Ticket.technician).joinedload(models.User.role),
+    )
+    .where(models.Ticket.id == bindparam("ticket_id"))
+)
+
+# Tickets créés par un utilisateur, du plus récent au plus ancien (GET /tickets/me)
+TICKETS_BY_CREATOR = (
+    select(models.Ticket)
+    .options(
+        joinedload(models.Ticket.creator).joinedload(models.User.role),
+        joinedload(models.Ticket.technician).joinedload(models.User.role),
+    )
+    .where(models.Ticket.creator_id == bindparam("creator_id"))
+    .order_by(models.Ticket.created_at.desc())
+)
+
+ROLE_BY_NAME = select(models.Role).where(models.Role.name == bindparam("name")).limit(1)
+
+
+def get_ticket_with_people(db: Session, ticket_id: int) -> Optional[models.Ticket]:
+    return db.execute(TICKET_WITH_PEOPLE, {"ticket_id": ticket_id}).scalars().first()
+
+
+def list_tickets_created_by(db: Session, creator_id: int) -> List[models.Ticket]:
+    return db.execute(TICKETS_BY_CREATOR, {"creator_id": creator_id}).scalars().all()
+
+
+def get_role_by_name(db: Session, name: str) -> Optional[models.Role]:
+    return db.execute(ROLE_BY_NAME, {"name": name}).scalars().first()
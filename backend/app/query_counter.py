@@ -0,0 +1,155 @@
+"""
+Comptage des requêtes SQL par requête HTTP et détection des N+1.
+
+Chaque requête HTTP reçoit un objet QueryStats (contextvar) alimenté par les événements
+SQLAlchemy du moteur : nombre de requêtes, temps passé en base et nombre d'exécutions
+de chaque requête SQL. À la fin de la requête HTTP :
+
+- au-delà de DB_QUERY_WARNING_THRESHOLD requêtes, un avertissement est affiché ;
+- une même forme de requête exécutée DB_QUERY_REPEAT_THRESHOLD fois ou plus (chargement
+  paresseux d'une relation ou requête dans une boucle : N+1 probable) est signalée ;
+- en développement (DB_QUERY_DEBUG=true), les en-têtes X-DB-Queries et X-DB-Time-Ms
+  sont ajoutés à la réponse.
+
+Voir app/testing.py pour borner le nombre de requêtes d'une route dans les tests.
+"""
+import os
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+DB_QUERY_WARNING_THRESHOLD = int(os.getenv("DB_QUERY_WARNING_THRESHOLD", "50"))
+DB_QUERY_REPEAT_THRESHOLD = int(os.getenv("DB_QUERY_REPEAT_THRESHOLD", "10"))
+DB_QUERY_DEBUG = os.getenv("DB_QUERY_DEBUG", "false").lower() == "true"
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+# Listes IN (...) développées par SQLAlchemy : %(id_1_1)s, %(id_1_2)s, ...
+_PARAMETER_LIST = re.compile(r"%\(\w+\)s(?:\s*,\s*%\(\w+\)s)+")
+_EXPANDED_PARAMETER = re.compile(r"%\((\w+?)_\d+\)s")
+
+
+class QueryStats:
+    """Requêtes SQL exécutées pendant une requête HTTP (ou un bloc de code)."""
+
+    __slots__ = ("queries", "duration", "statements")
+
+    def __init__(self):
+        self.queries = 0
+        self.duration = 0.0
+        self.statements: Counter = Counter()
+
+    def add(self, statement: str, elapsed: float) -> None:
+        self.queries += 1
+        self.duration += elapsed
+        self.statements[statement] += 1
+
+    def repeated_statements(self, threshold: int = DB_QUERY_REPEAT_THRESHOLD) -> List[Tuple[str, int]]:
+        """Formes de requêtes exécutées au moins `threshold` fois, de la plus fréquente à la moins fréquente."""
+        shapes: Counter = Counter()
+        for statement, count in self.statements.items():
+            shapes[statement_shape(statement)] += count
+        return [(shape, count) for shape, count in shapes.most_common() if count >= threshold]
+
+
+def statement_shape(statement: str) -> str:
+    """Forme d'une requête SQL : littéraux et listes de paramètres remplacés par des marqueurs."""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _STRING_LITERAL.sub("?", shape)
+    shape = _PARAMETER_LIST.sub("?, ...", shape)
+    shape = _EXPANDED_PARAMETER.sub(r"%(\1)s", shape)
+    return _NUMBER_LITERAL.sub("?", shape)
+
+
+# Objet mutable : les handlers synchrones s'exécutent dans des threads qui reçoivent
+# une copie du contexte, mais partagent le même objet QueryStats.
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Statistiques SQL de la requête HTTP en cours (None hors requête)."""
+    return _current_stats.get()
+
+
+# ---------------------------------------------------------------------------
+# Événements SQLAlchemy
+# ---------------------------------------------------------------------------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started_at"].pop()
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.add(statement, elapsed)
+
+
+def _handle_error(exception_context):
+    # Requête en erreur : after_cursor_execute n'est pas appelé
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started_at"):
+        connection.info["query_started_at"].pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Branche le comptage des requêtes SQL sur le moteur (sans effet s'il l'est déjà)."""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+# ---------------------------------------------------------------------------
+# Middleware
+# ---------------------------------------------------------------------------
+
+def report_query_stats(label: str, stats: QueryStats) -> None:
+    """Affiche un avertissement si la requête HTTP a exécuté trop de requêtes SQL ou des requêtes répétées."""
+    repeated = stats.repeated_statements()
+    if stats.queries <= DB_QUERY_WARNING_THRESHOLD and not repeated:
+        return
+    print(
+        f"[SQL] ATTENTION - {label} : {stats.queries} requête(s) SQL "
+        f"en {stats.duration * 1000:.1f} ms"
+    )
+    for shape, count in repeated[:5]:
+        print(f"[SQL]   {count} x {shape[:300]}  <- N+1 probable")
+
+
+class QueryCounterMiddleware:
+    """Middleware ASGI : compte les requêtes SQL de chaque requête HTTP."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+
+        async def send_wrapper(message):
+            if DB_QUERY_DEBUG and message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-db-queries", str(stats.queries).encode()),
+                    (b"x-db-time-ms", f"{stats.duration * 1000:.1f}".encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_stats.reset(token)
+            report_query_stats(f"{scope['method']} {scope['path']}", stats)
@@ -0,0 +1,217 @@
+"""
+Routage des lectures vers la réplique PostgreSQL (optionnelle, voir database.READ_REPLICA_ENABLED).
+
+Les routes de lecture lourdes (listes de tickets, statistiques, recherche d'actifs) utilisent
+`get_read_db` au lieu de `get_db` :
+
+    @router.get("/")
+    def list_all_tickets(db: Session = Depends(get_read_db), ...):
+
+La session est ouverte sur la réplique, sauf :
+- lecture de ses propres écritures : l'utilisateur a modifié des données (POST, PUT, PATCH,
+  DELETE réussis) depuis moins de READ_YOUR_WRITES_SECONDS secondes. Le retard de la réplique
+  pourrait lui masquer sa modification : la lecture se fait sur le serveur principal.
+  Cette fenêtre vaut au moins READ_REPLICA_MAX_LAG_SECONDS + READ_REPLICA_LAG_CHECK_SECONDS
+  (retard maximal possible d'une lecture sur la réplique, 15 s par défaut) ;
+- retard de la réplique supérieur à READ_REPLICA_MAX_LAG_SECONDS (mesuré au plus toutes les
+  READ_REPLICA_LAG_CHECK_SECONDS secondes par processus), ou réplique inaccessible.
+
+Retard d'une réplique à jour de ce qu'elle a reçu : temps écoulé depuis le dernier message du
+serveur principal (pg_stat_wal_receiver.last_msg_receipt_time). Une réplique déconnectée
+(réception WAL arrêtée, ou état non visible : accorder pg_read_all_stats au rôle de lecture)
+a un retard infini. Sur un serveur principal sans aucune écriture, la réplique ne reçoit plus
+de messages : les lectures repassent sur le principal jusqu'à la prochaine écriture.
+
+Les dernières écritures sont marquées par un fichier par utilisateur dans READ_YOUR_WRITES_DIR
+(date de modification) : la règle vaut pour tous les workers d'une même machine (serve.py).
+Avec plusieurs machines derrière un répartiteur, partager ce répertoire ou utiliser des sessions
+persistantes (affinité par client).
+"""
+import os
+import tempfile
+import threading
+import time
+from typing import Optional
+
+from fastapi import Request
+from jose import JWTError, jwt
+from sqlalchemy import text
+from sqlalchemy.exc import DisconnectionError, OperationalError
+
+from .database import READ_REPLICA_ENABLED, ReadSessionLocal, get_db, read_engine
+from .security import ALGORITHM, SECRET_KEY
+
+
+READ_REPLICA_MAX_LAG_SECONDS = float(os.getenv("READ_REPLICA_MAX_LAG_SECONDS", "10"))
+READ_REPLICA_LAG_CHECK_SECONDS = float(os.getenv("READ_REPLICA_LAG_CHECK_SECONDS", "5"))
+
+# Retard maximal d'une lecture sur la réplique : le retard mesuré (au plus MAX_LAG) peut encore
+# croître pendant la durée de validité de la mesure (LAG_CHECK). La fenêtre de lecture de ses
+# propres écritures doit le couvrir, sinon une modification récente pourrait disparaître.
+REPLICA_STALENESS_BOUND_SECONDS = READ_REPLICA_MAX_LAG_SECONDS + READ_REPLICA_LAG_CHECK_SECONDS
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", str(REPLICA_STALENESS_BOUND_SECONDS)))
+if READ_YOUR_WRITES_SECONDS < REPLICA_STALENESS_BOUND_SECONDS:
+    print(
+        f"[DB] READ_YOUR_WRITES_SECONDS={READ_YOUR_WRITES_SECONDS:g} inférieur au retard maximal "
+        f"de la réplique ({REPLICA_STALENESS_BOUND_SECONDS:g} s) : {REPLICA_STALENESS_BOUND_SECONDS:g} s utilisé"
+    )
+    READ_YOUR_WRITES_SECONDS = REPLICA_STALENESS_BOUND_SECONDS
+READ_YOUR_WRITES_DIR = os.getenv(
+    "READ_YOUR_WRITES_DIR", os.path.join(tempfile.gettempdir(), "tickets-recent-writes")
+)
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Retard de la réplique en secondes (0 si ce n'est pas un serveur en réplication, ex. même
+# serveur avec un autre rôle). NULL si la réception WAL n'est pas active : pg_last_wal_receive_lsn()
+# n'avance plus, des LSN égaux ne signifient alors pas que la réplique est à jour.
+REPLICA_LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        ELSE (
+            SELECT CASE
+                WHEN r.status IS DISTINCT FROM 'streaming' THEN NULL
+                WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()
+                    THEN EXTRACT(EPOCH FROM now() - r.last_msg_receipt_time)
+                ELSE GREATEST(
+                    EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()),
+                    EXTRACT(EPOCH FROM now() - r.last_msg_receipt_time)
+                )
+            END
+            FROM pg_stat_wal_receiver AS r
+        )
+    END
+    """
+)
+
+_lag_lock = threading.Lock()
+_lag: Optional[float] = None
+_lag_checked_at = 0.0
+
+
+# ---------------------------------------------------------------------------
+# Écritures récentes par utilisateur
+# ---------------------------------------------------------------------------
+
+def token_user_id(authorization: str) -> Optional[int]:
+    """Identifiant de l'utilisateur d'un en-tête `Authorization: Bearer <jeton>` (sans accès à la base)."""
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return int(jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub"))
+    except (JWTError, TypeError, ValueError):
+        return None
+
+
+def _marker_path(user_id: int) -> str:
+    return os.path.join(READ_YOUR_WRITES_DIR, str(user_id))
+
+
+def record_write(user_id: int) -> None:
+    """Marque une écriture de l'utilisateur (date de modification du fichier)."""
+    path = _marker_path(user_id)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        os.makedirs(READ_YOUR_WRITES_DIR, exist_ok=True)
+        with open(path, "a"):
+            pass
+
+
+def wrote_recently(user_id: int) -> bool:
+    try:
+        return time.time() - os.stat(_marker_path(user_id)).st_mtime < READ_YOUR_WRITES_SECONDS
+    except FileNotFoundError:
+        return False
+
+
+class ReadYourWritesMiddleware:
+    """Middleware ASGI : enregistre les écritures réussies de chaque utilisateur authentifié."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        authorization = dict(scope.get("headers") or []).get(b"authorization", b"").decode()
+        user_id = token_user_id(authorization)
+        if user_id is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            # La route a validé sa transaction avant d'envoyer la réponse
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                record_write(user_id)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+# ---------------------------------------------------------------------------
+# Retard de la réplique
+# ---------------------------------------------------------------------------
+
+def replica_lag() -> float:
+    """Retard de la réplique en secondes (mis en cache) ; infini si elle est inaccessible ou déconnectée."""
+    global _lag, _lag_checked_at
+    now = time.monotonic()
+    if _lag is not None and now - _lag_checked_at < READ_REPLICA_LAG_CHECK_SECONDS:
+        return _lag
+    with _lag_lock:
+        if _lag is None or now - _lag_checked_at >= READ_REPLICA_LAG_CHECK_SECONDS:
+            try:
+                with read_engine.connect() as conn:
+                    lag = conn.execute(REPLICA_LAG_QUERY).scalar()
+                if lag is None:
+                    print("[DB] Réplique en lecture sans réception WAL active, lectures sur le serveur principal")
+                    _lag = float("inf")
+                else:
+                    _lag = max(float(lag), 0.0)
+            except Exception as e:
+                print(f"[DB] Réplique en lecture inaccessible, lectures sur le serveur principal : {e}")
+                _lag = float("inf")
+            _lag_checked_at = time.monotonic()
+        return _lag
+
+
+def _mark_unavailable() -> None:
+    global _lag, _lag_checked_at
+    with _lag_lock:
+        _lag = float("inf")
+        _lag_checked_at = time.monotonic()
+
+
+def use_replica(request: Request) -> bool:
+    if not READ_REPLICA_ENABLED:
+        return False
+    user_id = token_user_id(request.headers.get("authorization", ""))
+    if user_id is not None and wrote_recently(user_id):
+        return False
+    return replica_lag() <= READ_REPLICA_MAX_LAG_SECONDS
+
+
+def get_read_db(request: Request):
+    """Session de lecture : réplique si elle est à jour pour cet utilisateur, serveur principal sinon."""
+    if not use_replica(request):
+        yield from get_db()
+        return
+
+    db = ReadSessionLocal()
+    try:
+        db.execute(text("SELECT 1"))
+    except (OperationalError, DisconnectionError) as e:
+        db.close()
+        print(f"[DB] Réplique en lecture inaccessible, lectures sur le serveur principal : {e}")
+        _mark_unavailable()
+        yield from get_db()
+        return
+    try:
+        yield db
+    finally:
+        db.close()
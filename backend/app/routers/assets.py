@@ -1,11 +1,38 @@
-from typing import List, Optional
-
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    File,
+    Header,
+    HTTPException,
+    Query,
+    Response,
+    UploadFile,
+    status,
+)
+from fastapi.responses import StreamingResponse
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from .. import models, schemas
+from ..asset_history import (
+    ACTION_CREATE,
+    ACTION_UPDATE,
+    HISTORY_SELECT,
+    changed_fields_description,
+    changes_sql,
+)
+from ..asset_import import AssetImportError, import_assets
+from ..asset_labels import generate_qr_codes, iter_labels_pdf
 from ..database import get_db
+from ..read_replica import get_read_db
 from ..security import get_current_user, require_role
 
 
@@ -28,6 +55,79 @@ def _ensure_can_view_assets(current_user: models.User) -> None:
         )
 
 
+# Colonnes renvoyées pour un actif (schemas.AssetRead)
+ASSET_COLUMNS = """
+    id,
+    nom,
+    type,
+    numero_de_serie,
+    marque,
+    modele,
+    statut,
+    localisation,
+    departement,
+    date_d_achat,
+    date_de_fin_garantie,
+    prix_d_achat,
+    fournisseur,
+    assigned_to_user_id,
+    assigned_to_name,
+    specifications,
+    notes,
+    qr_code,
+    created_at,
+    updated_at,
+    created_by
+"""
+
+
+def _asset_filters(
+    search: Optional[str],
+    status_filter: Optional[str],
+    type_filter: Optional[str],
+    department_filter: Optional[str],
+):
+    """
+    Construit les conditions SQL (et leurs paramètres) communes à la liste et à la recherche d'actifs.
+
+    La recherche utilise ILIKE directement sur les colonnes pour pouvoir s'appuyer sur les index
+    trigrammes (pg_trgm) créés par `migrate_assets_search_indexes.py`.
+    """
+    conditions = []
+    params: dict = {}
+
+    if search:
+        conditions.append(
+            "(nom ILIKE :search "
+            "OR numero_de_serie ILIKE :search "
+            "OR marque ILIKE :search "
+            "OR modele ILIKE :search)"
+        )
+        params["search"] = f"%{search}%"
+
+    if status_filter and status_filter != "all":
+        conditions.append("statut = :statut")
+        params["statut"] = status_filter
+
+    if type_filter and type_filter != "all":
+        conditions.append("type = :type")
+        params["type"] = type_filter
+
+    if department_filter and department_filter != "all":
+        conditions.append("departement = :departement")
+        params["departement"] = department_filter
+
+    return conditions, params
+
+
+def _where(conditions: List[str]) -> str:
+    return " WHERE " + " AND ".join(conditions) if conditions else ""
+
+
+# Pagination par curseur : actifs plus anciens que l'actif `before` (ordre created_at DESC, id DESC)
+KEYSET_BEFORE_CONDITION = "(created_at, id) < (SELECT created_at, id FROM assets WHERE id = :before)"
+
+
 @router.get(
     "/assets/",
     response_model=List[schemas.AssetRead],
@@ -53,82 +153,310 @@ def list_assets(
         alias="department",
         description="Filtre sur le département/localisation logique",
     ),
-    db: Session = Depends(get_db),
+    limit: Optional[int] = Query(
+        None,
+        ge=1,
+        le=500,
+        description="Nombre maximum d'actifs (pagination). Absent : tous les actifs",
+    ),
+    before: Optional[int] = Query(
+        None,
+        description="Curseur : id du dernier actif reçu",
+    ),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user),
 ) -> List[schemas.AssetRead]:
     """
-    Retourne la liste des actifs.
+    Retourne la liste des actifs (du plus récent au plus ancien).
 
     Cette route ne modifie aucune donnée existante et se contente d'interroger la table `assets`
     créée par la migration `migrate_create_assets_tables.py`.
+    Avec `limit` (et `before` pour les pages suivantes), la liste est paginée par curseur.
     """
 
     _ensure_can_view_assets(current_user)
 
-    conditions = []
-    params: dict = {}
-
-    if search:
-        conditions.append(
-            "(LOWER(nom) LIKE :search "
-            "OR LOWER(numero_de_serie) LIKE :search "
-            "OR LOWER(marque) LIKE :search "
-            "OR LOWER(modele) LIKE :search)"
-        )
-        params["search"] = f"%{search.lower()}%"
-
-    if status_filter and status_filter != "all":
-        conditions.append("statut = :statut")
-        params["statut"] = status_filter
+    conditions, params = _asset_filters(search, status_filter, type_filter, department_filter)
 
-    if type_filter and type_filter != "all":
-        conditions.append("type = :type")
-        params["type"] = type_filter
+    if before is not None:
+        conditions.append(KEYSET_BEFORE_CONDITION)
+        params["before"] = before
 
-    if department_filter and department_filter != "all":
-        conditions.append("departement = :departement")
-        params["departement"] = department_filter
-
-    where_clause = ""
-    if conditions:
-        where_clause = " WHERE " + " AND ".join(conditions)
+    limit_clause = ""
+    if limit is not None:
+        limit_clause = " LIMIT :limit"
+        params["limit"] = limit
 
     query = text(
-        """
-        SELECT
-            id,
-            nom,
-            type,
-            numero_de_serie,
-            marque,
-            modele,
-            statut,
-            localisation,
-            departement,
-            date_d_achat,
-            date_de_fin_garantie,
-            prix_d_achat,
-            fournisseur,
-            assigned_to_user_id,
-            assigned_to_name,
-            specifications,
-            notes,
-            qr_code,
-            created_at,
-            updated_at,
-            created_by
-        FROM assets
-        """
-        + where_clause
-        + """
-        ORDER BY created_at DESC
-        """
+        "SELECT" + ASSET_COLUMNS + "FROM assets"
+        + _where(conditions)
+        + " ORDER BY created_at DESC, id DESC"
+        + limit_clause
     )
 
     result = db.execute(query, params).mappings().all()
     return [schemas.AssetRead(**row) for row in result]
 
 
+@router.get(
+    "/assets/search",
+    response_model=schemas.AssetSearchResult,
+    summary="Rechercher des actifs (paginé, avec facettes)",
+)
+def search_assets(
+    search: Optional[str] = Query(
+        None,
+        description="Recherche par nom, n° de série, marque ou modèle",
+    ),
+    status_filter: Optional[str] = Query(None, alias="status", description="Filtre sur le statut"),
+    type_filter: Optional[str] = Query(None, alias="type", description="Filtre sur le type d'actif"),
+    department_filter: Optional[str] = Query(None, alias="department", description="Filtre sur le département"),
+    limit: int = Query(50, ge=1, le=500, description="Nombre maximum d'actifs par page"),
+    before: Optional[int] = Query(None, description="Curseur : next_cursor de la page précédente"),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user),
+) -> schemas.AssetSearchResult:
+    """
+    Recherche paginée dans l'inventaire.
+
+    - Un n° de série saisi en entier est résolu directement par l'index unique (pas de recherche partielle).
+    - Sinon : recherche partielle (index trigrammes), pagination par curseur (`before`).
+    - Les facettes (nombre d'actifs par statut, type et département pour la recherche courante)
+      sont calculées en une seule requête (GROUPING SETS) et renvoyées avec la première page.
+    """
+
+    _ensure_can_view_assets(current_user)
+
+    term = search.strip() if search else None
+
+    # Chemin rapide : n° de série exact
+    if term and before is None:
+        conditions, params = _asset_filters(None, status_filter, type_filter, department_filter)
+        conditions.append("numero_de_serie = :numero_de_serie")
+        params["numero_de_serie"] = term
+        row = db.execute(
+            text("SELECT" + ASSET_COLUMNS + "FROM assets" + _where(conditions)), params
+        ).mappings().first()
+        if row:
+            asset = schemas.AssetRead(**row)
+            return schemas.AssetSearchResult(
+                items=[asset],
+                total=1,
+                facets=schemas.AssetFacets(
+                    statut={asset.statut: 1},
+                    type={asset.type: 1},
+                    departement={asset.departement: 1},
+                ),
+            )
+
+    conditions, params = _asset_filters(term, status_filter, type_filter, department_filter)
+
+    total = None
+    facets = None
+    if before is None:
+        facets = schemas.AssetFacets()
+        facet_rows = db.execute(
+            text(
+                "SELECT GROUPING(statut) AS g_statut, GROUPING(type) AS g_type, "
+                "GROUPING(departement) AS g_departement, statut, type, departement, COUNT(*) AS n "
+                "FROM assets" + _where(conditions)
+                + " GROUP BY GROUPING SETS ((statut), (type), (departement), ())"
+            ),
+            params,
+        ).mappings().all()
+        total = 0
+        for facet in facet_rows:
+            if facet["g_statut"] == 0:
+                facets.statut[facet["statut"]] = facet["n"]
+            elif facet["g_type"] == 0:
+                facets.type[facet["type"]] = facet["n"]
+            elif facet["g_departement"] == 0:
+                facets.departement[facet["departement"]] = facet["n"]
+            else:
+                total = facet["n"]
+
+    page_conditions = list(conditions)
+    page_params = dict(params, limit=limit)
+    if before is not None:
+        page_conditions.append(KEYSET_BEFORE_CONDITION)
+        page_params["before"] = before
+
+    rows = db.execute(
+        text(
+            "SELECT" + ASSET_COLUMNS + "FROM assets"
+            + _where(page_conditions)
+            + " ORDER BY created_at DESC, id DESC LIMIT :limit"
+        ),
+        page_params,
+    ).mappings().all()
+    items = [schemas.AssetRead(**row) for row in rows]
+
+    return schemas.AssetSearchResult(
+        items=items,
+        next_cursor=items[-1].id if len(items) == limit else None,
+        total=total,
+        facets=facets,
+    )
+
+
+# Cache des statistiques d'inventaire (par processus).
+# Invalidé à chaque écriture sur les actifs :
+# - dans le processus, un numéro de génération écarte un calcul commencé avant l'invalidation ;
+# - pour les autres workers de la machine (serve.py), la date de modification du fichier
+#   ASSET_STATS_STAMP_PATH est comparée à celle lue avant le calcul en cache.
+# Le TTL reste la borne de cohérence dans les autres cas (plusieurs machines sans répertoire
+# partagé, statistiques calculées sur une réplique en retard).
+ASSET_STATS_TTL_SECONDS = int(os.getenv("ASSET_STATS_TTL_SECONDS", "300"))
+ASSET_STATS_STAMP_PATH = os.getenv(
+    "ASSET_STATS_STAMP_PATH", os.path.join(tempfile.gettempdir(), "tickets-asset-stats-stamp")
+)
+_asset_stats_cache = {"value": None, "expires_at": 0.0, "stamp": None}
+_asset_stats_generation = 0
+_asset_stats_lock = threading.Lock()
+
+
+def _asset_stats_stamp() -> Optional[int]:
+    """Date (ns) de la dernière invalidation, tous workers confondus (None : jamais invalidé)."""
+    try:
+        return os.stat(ASSET_STATS_STAMP_PATH).st_mtime_ns
+    except OSError:
+        return None
+
+
+def invalidate_asset_stats() -> None:
+    """Vide le cache des statistiques d'inventaire (à appeler après toute modification d'actifs)."""
+    global _asset_stats_generation
+    with _asset_stats_lock:
+        _asset_stats_generation += 1
+        _asset_stats_cache["value"] = None
+        _asset_stats_cache["expires_at"] = 0.0
+    try:
+        with open(ASSET_STATS_STAMP_PATH, "a"):
+            pass
+        os.utime(ASSET_STATS_STAMP_PATH)
+    except OSError as e:
+        print(f"[ASSETS] Invalidation des statistiques non partagée avec les autres workers : {e}")
+
+
+def _compute_asset_stats(db: Session) -> schemas.AssetStats:
+    """Calcule toutes les statistiques en un seul parcours de `assets` (GROUPING SETS)."""
+    rows = db.execute(
+        text(
+            """
+            SELECT
+                GROUPING(statut) AS g_statut,
+                GROUPING(type) AS g_type,
+                GROUPING(departement) AS g_departement,
+                statut,
+                type,
+                departement,
+                COUNT(*) AS count,
+                COALESCE(SUM(prix_d_achat), 0) AS total_value,
+                COUNT(*) FILTER (
+                    WHERE assigned_to_user_id IS NOT NULL OR COALESCE(assigned_to_name, '') <> ''
+                ) AS assigned,
+                COUNT(*) FILTER (WHERE date_de_fin_garantie < CURRENT_DATE) AS expired,
+                COUNT(*) FILTER (
+                    WHERE date_de_fin_garantie BETWEEN CURRENT_DATE AND CURRENT_DATE + 30
+                ) AS expiring_30_days,
+                COUNT(*) FILTER (
+                    WHERE date_de_fin_garantie BETWEEN CURRENT_DATE AND CURRENT_DATE + 60
+                ) AS expiring_60_days,
+                COUNT(*) FILTER (
+                    WHERE date_de_fin_garantie BETWEEN CURRENT_DATE AND CURRENT_DATE + 90
+                ) AS expiring_90_days,
+                COUNT(*) FILTER (WHERE date_de_fin_garantie IS NULL) AS without_warranty
+            FROM assets
+            GROUP BY GROUPING SETS ((statut), (type), (departement), ())
+            ORDER BY count DESC
+            """
+        )
+    ).mappings().all()
+
+    buckets = {"statut": [], "type": [], "departement": []}
+    totals = None
+    for row in rows:
+        group = next((g for g in buckets if row[f"g_{g}"] == 0), None)
+        if group is None:
+            totals = row
+            continue
+        buckets[group].append(
+            schemas.AssetStatsBucket(
+                value=row[group],
+                count=row["count"],
+                total_value=float(row["total_value"]),
+                assigned=row["assigned"],
+            )
+        )
+
+    total = totals["count"] if totals else 0
+    assigned = totals["assigned"] if totals else 0
+    return schemas.AssetStats(
+        total=total,
+        total_value=float(totals["total_value"]) if totals else 0.0,
+        assigned=assigned,
+        unassigned=total - assigned,
+        assignment_rate=assigned / total if total else 0.0,
+        warranty=schemas.AssetWarrantyStats(
+            expired=totals["expired"] if totals else 0,
+            expiring_30_days=totals["expiring_30_days"] if totals else 0,
+            expiring_60_days=totals["expiring_60_days"] if totals else 0,
+            expiring_90_days=totals["expiring_90_days"] if totals else 0,
+            without_warranty=totals["without_warranty"] if totals else 0,
+        ),
+        by_statut=buckets["statut"],
+        by_type=buckets["type"],
+        by_departement=buckets["departement"],
+        generated_at=datetime.utcnow(),
+    )
+
+
+@router.get(
+    "/assets/stats",
+    response_model=schemas.AssetStats,
+    summary="Statistiques de l'inventaire",
+)
+def get_asset_stats(
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user),
+) -> schemas.AssetStats:
+    """
+    Retourne les statistiques de l'inventaire calculées en base :
+
+    - nombre et valeur d'achat totale par statut, type et département ;
+    - garanties expirées / expirant dans les 30, 60 et 90 jours ;
+    - taux d'assignation des actifs.
+
+    Le résultat est mis en cache (ASSET_STATS_TTL_SECONDS, 300 s par défaut)
+    et recalculé après chaque création, modification ou import d'actifs.
+    """
+
+    _ensure_can_view_assets(current_user)
+
+    now = time.monotonic()
+    stamp = _asset_stats_stamp()
+    with _asset_stats_lock:
+        cached = _asset_stats_cache["value"]
+        if (
+            cached is not None
+            and now < _asset_stats_cache["expires_at"]
+            and _asset_stats_cache["stamp"] == stamp
+        ):
+            return cached
+        generation = _asset_stats_generation
+
+    stats = _compute_asset_stats(db)
+
+    with _asset_stats_lock:
+        # Invalidé pendant le calcul : le résultat peut précéder la modification, ne pas le garder
+        if _asset_stats_generation == generation:
+            _asset_stats_cache["value"] = stats
+            _asset_stats_cache["expires_at"] = now + ASSET_STATS_TTL_SECONDS
+            _asset_stats_cache["stamp"] = stamp
+
+    return stats
+
+
 @router.post(
     "/assets/",
     response_model=schemas.AssetRead,
@@ -137,6 +465,7 @@ def list_assets(
 )
 def create_asset(
     asset_in: schemas.AssetCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(
         require_role("Adjoint DSI", "DSI", "Admin", "Technicien")
@@ -147,72 +476,82 @@ def create_asset(
 
     - Ne supprime ni ne modifie aucun actif existant.
     - Renseigne automatiquement la colonne `created_by` avec l'utilisateur connecté.
+    - Le QR code est généré en tâche de fond après la réponse (colonne `qr_code`).
     """
 
+    # Création + entrée d'historique en une seule requête
     insert_query = text(
         """
-        INSERT INTO assets (
-            nom,
-            type,
-            numero_de_serie,
-            marque,
-            modele,
-            statut,
-            localisation,
-            departement,
-            date_d_achat,
-            date_de_fin_garantie,
-            prix_d_achat,
-            fournisseur,
-            assigned_to_user_id,
-            assigned_to_name,
-            specifications,
-            notes,
-            qr_code,
-            created_by
-        )
-        VALUES (
-            :nom,
-            :type,
-            :numero_de_serie,
-            :marque,
-            :modele,
-            :statut,
-            :localisation,
-            :departement,
-            :date_d_achat,
-            :date_de_fin_garantie,
-            :prix_d_achat,
-            :fournisseur,
-            :assigned_to_user_id,
-            :assigned_to_name,
-            :specifications,
-            :notes,
-            :qr_code,
-            :created_by
+        WITH created AS (
+            INSERT INTO assets (
+                nom,
+                type,
+                numero_de_serie,
+                marque,
+                modele,
+                statut,
+                localisation,
+                departement,
+                date_d_achat,
+                date_de_fin_garantie,
+                prix_d_achat,
+                fournisseur,
+                assigned_to_user_id,
+                assigned_to_name,
+                specifications,
+                notes,
+                qr_code,
+                created_by
+            )
+            VALUES (
+                :nom,
+                :type,
+                :numero_de_serie,
+                :marque,
+                :modele,
+                :statut,
+                :localisation,
+                :departement,
+                :date_d_achat,
+                :date_de_fin_garantie,
+                :prix_d_achat,
+                :fournisseur,
+                :assigned_to_user_id,
+                :assigned_to_name,
+                :specifications,
+                :notes,
+                :qr_code,
+                :created_by
+            )
+            RETURNING
+                id,
+                nom,
+                type,
+                numero_de_serie,
+                marque,
+                modele,
+                statut,
+                localisation,
+                departement,
+                date_d_achat,
+                date_de_fin_garantie,
+                prix_d_achat,
+                fournisseur,
+                assigned_to_user_id,
+                assigned_to_name,
+                specifications,
+                notes,
+                qr_code,
+                created_at,
+                updated_at,
+                created_by
+        ),
+        history AS (
+            INSERT INTO asset_history (asset_id, action, description, performed_by)
+            SELECT id, :history_action, :history_description, created_by
+            FROM created
         )
-        RETURNING
-            id,
-            nom,
-            type,
-            numero_de_serie,
-            marque,
-            modele,
-            statut,
-            localisation,
-            departement,
-            date_d_achat,
-            date_de_fin_garantie,
-            prix_d_achat,
-            fournisseur,
-            assigned_to_user_id,
-            assigned_to_name,
-            specifications,
-            notes,
-            qr_code,
-            created_at,
-            updated_at,
-            created_by
+        SELECT * FROM created
         """
     )
 
@@ -233,8 +572,10 @@ def create_asset(
         "assigned_to_name": asset_in.assigned_to_name,
         "specifications": asset_in.specifications,
         "notes": asset_in.notes,
-        "qr_code": None,  # Génération de QR code éventuelle dans une évolution ultérieure
+        "qr_code": None,  # Généré en tâche de fond (app/asset_labels.py)
         "created_by": current_user.id,
+        "history_action": ACTION_CREATE,
+        "history_description": "Création de l'actif",
     }
 
     try:
@@ -253,9 +594,167 @@ def create_asset(
             detail="Erreur lors de la création de l'actif",
         )
 
+    invalidate_asset_stats()
+    background_tasks.add_task(generate_qr_codes, [row["id"]])
     return schemas.AssetRead(**row)
 
 
+@router.post(
+    "/assets/import",
+    response_model=schemas.AssetImportReport,
+    summary="Importer des actifs en masse (CSV / XLSX)",
+)
+def import_assets_file(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(..., description="Fichier CSV (séparateur , ou ;) ou XLSX, avec une ligne d'en-tête"),
+    dry_run: bool = Query(False, description="Valider le fichier sans rien enregistrer"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(
+        require_role("Adjoint DSI", "DSI", "Admin", "Technicien")
+    ),
+) -> schemas.AssetImportReport:
+    """
+    Importe des actifs en masse.
+
+    - Les en-têtes reprennent les noms de colonnes de la table `assets` (nom, type, numero_de_serie, ...).
+    - Un actif dont le n° de série existe déjà est mis à jour, sinon il est créé (`created_by` = utilisateur connecté).
+    - Seules les colonnes présentes dans l'en-tête sont mises à jour. Sans toutes les colonnes obligatoires
+      (ex. `numero_de_serie;localisation`), le fichier ne fait que mettre à jour des actifs existants.
+    - Les lignes invalides sont ignorées et listées dans le rapport (numéro de ligne + erreurs).
+    - Aucun actif n'est supprimé.
+    """
+
+    try:
+        report = import_assets(
+            db,
+            file.file,
+            file.filename or "",
+            created_by=current_user.id,
+            dry_run=dry_run,
+        )
+    except AssetImportError as exc:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc),
+        ) from exc
+
+    if not dry_run and (report["inserted"] or report["updated"]):
+        invalidate_asset_stats()
+        # QR codes des actifs créés (ou dont le QR code a été réinitialisé)
+        background_tasks.add_task(generate_qr_codes)
+
+    return schemas.AssetImportReport(**report)
+
+
+def _query_asset_history(
+    db: Session,
+    condition: str,
+    params: dict,
+    limit: int,
+    before: Optional[int],
+) -> List[schemas.AssetHistoryRead]:
+    """Historique d'actifs, du plus récent au plus ancien, paginé par curseur (id de la dernière entrée reçue)."""
+    conditions = [condition]
+    params = dict(params, limit=limit)
+    if before is not None:
+        conditions.append(
+            "(h.created_at, h.id) < (SELECT created_at, id FROM asset_history WHERE id = :before)"
+        )
+        params["before"] = before
+
+    rows = db.execute(
+        text(
+            HISTORY_SELECT
+            + _where(conditions)
+            + " ORDER BY h.created_at DESC, h.id DESC LIMIT :limit"
+        ),
+        params,
+    ).mappings().all()
+    return [schemas.AssetHistoryRead(**row) for row in rows]
+
+
+@router.get(
+    "/assets/{asset_id}/history",
+    response_model=List[schemas.AssetHistoryRead],
+    summary="Historique d'un actif",
+)
+def get_asset_history(
+    asset_id: int,
+    limit: int = Query(50, ge=1, le=200, description="Nombre maximum d'entrées"),
+    before: Optional[int] = Query(None, description="Curseur : id de la dernière entrée reçue"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+) -> List[schemas.AssetHistoryRead]:
+    """
+    Retourne l'historique d'un actif (création, modifications avec le détail des champs,
+    interventions liées à un ticket), du plus récent au plus ancien.
+    """
+
+    _ensure_can_view_assets(current_user)
+
+    return _query_asset_history(db, "h.asset_id = :asset_id", {"asset_id": asset_id}, limit, before)
+
+
+@router.get(
+    "/assets/history/ticket/{ticket_id}",
+    response_model=List[schemas.AssetHistoryRead],
+    summary="Interventions sur les actifs liées à un ticket",
+)
+def get_ticket_asset_history(
+    ticket_id: int,
+    limit: int = Query(50, ge=1, le=200, description="Nombre maximum d'entrées"),
+    before: Optional[int] = Query(None, description="Curseur : id de la dernière entrée reçue"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+) -> List[schemas.AssetHistoryRead]:
+    """Retourne les modifications d'actifs effectuées dans le cadre d'un ticket."""
+
+    _ensure_can_view_assets(current_user)
+
+    return _query_asset_history(db, "h.ticket_id = :ticket_id", {"ticket_id": ticket_id}, limit, before)
+
+
+@router.get(
+    "/assets/labels",
+    summary="Planche d'étiquettes PDF des actifs d'un département",
+    response_class=StreamingResponse,
+)
+def print_asset_labels(
+    department: str = Query(..., description="Département des actifs à étiqueter"),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Retourne un PDF A4 (3 x 8 étiquettes par page : QR code, nom, n° de série, modèle, département).
+
+    Le document est envoyé au fil de sa génération, page par page.
+    """
+
+    _ensure_can_view_assets(current_user)
+
+    filename = "".join(c if c.isalnum() else "_" for c in department) or "actifs"
+    return StreamingResponse(
+        iter_labels_pdf(department),
+        media_type="application/pdf",
+        headers={"Content-Disposition": f'attachment; filename="etiquettes_{filename}.pdf"'},
+    )
+
+
+@router.post(
+    "/assets/qr-codes/generate",
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Générer les QR codes manquants",
+)
+def generate_missing_asset_qr_codes(
+    background_tasks: BackgroundTasks,
+    current_user: models.User = Depends(require_role("DSI", "Admin")),
+):
+    """Lance en tâche de fond la génération des QR codes des actifs qui n'en ont pas."""
+
+    background_tasks.add_task(generate_qr_codes)
+    return {"message": "Génération des QR codes lancée"}
+
+
 @router.get(
     "/asset-types",
     response_model=List[schemas.AssetTypeConfig],
@@ -481,97 +980,160 @@ def toggle_department(
     return schemas.DepartmentConfig(**row)
 
 
-@router.put(
-    "/assets/{asset_id}",
-    response_model=schemas.AssetRead,
-    summary="Mettre à jour un actif",
+# Colonnes modifiables d'un actif (PUT / PATCH)
+UPDATABLE_ASSET_COLUMNS = (
+    "nom",
+    "type",
+    "numero_de_serie",
+    "marque",
+    "modele",
+    "statut",
+    "localisation",
+    "departement",
+    "date_d_achat",
+    "date_de_fin_garantie",
+    "prix_d_achat",
+    "fournisseur",
+    "assigned_to_user_id",
+    "assigned_to_name",
+    "specifications",
+    "notes",
 )
-def update_asset(
+
+# Colonnes NOT NULL en base (ne peuvent pas être vidées par un PATCH)
+REQUIRED_ASSET_COLUMNS = (
+    "nom",
+    "type",
+    "numero_de_serie",
+    "marque",
+    "modele",
+    "statut",
+    "localisation",
+    "departement",
+    "date_d_achat",
+)
+
+# Champs texte nettoyés (strip) avant enregistrement
+STRIPPED_ASSET_COLUMNS = (
+    "nom",
+    "type",
+    "numero_de_serie",
+    "marque",
+    "modele",
+    "statut",
+    "localisation",
+    "departement",
+    "fournisseur",
+)
+
+
+# ETag d'un actif sans date de modification (updated_at NULL : colonne sans contrainte NOT NULL)
+UNDATED_ASSET_ETAG = '"0"'
+
+ASSET_MODIFIED_DETAIL = "L'actif a été modifié entre-temps : rechargez-le avant de le modifier"
+
+
+def _asset_etag(updated_at: Optional[datetime]) -> str:
+    """ETag d'un actif : sa date de dernière modification."""
+    if updated_at is None:
+        return UNDATED_ASSET_ETAG
+    return f'"{updated_at.isoformat()}"'
+
+
+def _parse_if_match(if_match: Optional[str]) -> Tuple[bool, Optional[datetime]]:
+    """
+    Lit l'en-tête If-Match (ETag renvoyé par l'API ou valeur `updated_at` de l'actif).
+
+    Retourne (précondition à vérifier, updated_at attendu, None pour un actif sans date).
+    If-Match exige une comparaison forte : un ETag faible (W/...) ne correspond jamais (412).
+    """
+    if not if_match or if_match.strip() == "*":
+        return False, None
+    value = if_match.strip()
+    if value.startswith("W/"):
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="If-Match n'accepte pas les ETag faibles (W/)",
+        )
+    if value == UNDATED_ASSET_ETAG:
+        return True, None
+    try:
+        return True, datetime.fromisoformat(value.strip('"').replace("Z", "+00:00"))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="En-tête If-Match invalide",
+        )
+
+
+def _apply_asset_update(
+    db: Session,
     asset_id: int,
-    asset_in: schemas.AssetCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(
-        require_role("Adjoint DSI", "DSI", "Admin", "Technicien")
-    ),
+    values: dict,
+    current_user: models.User,
+    ticket_id: Optional[int],
+    precondition: Tuple[bool, Optional[datetime]],
+    background_tasks: Optional[BackgroundTasks] = None,
 ) -> schemas.AssetRead:
-    """Met à jour un actif existant sans supprimer d'autres enregistrements."""
+    """
+    Met à jour les colonnes fournies d'un actif en une seule requête :
 
-    # Vérifier que l'actif existe
-    exists_query = text("SELECT id FROM assets WHERE id = :id")
-    exists_row = db.execute(exists_query, {"id": asset_id}).first()
-    if not exists_row:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Actif introuvable",
+    - seules les colonnes présentes dans `values` sont réécrites ;
+    - `previous` verrouille la ligne et fournit les valeurs avant mise à jour (historique des champs modifiés) ;
+    - avec If-Match (`precondition`, lu par _parse_if_match), la mise à jour n'a lieu que si
+      `updated_at` n'a pas changé (sinon 412) ;
+    - l'existence de l'actif est lue dans la même requête (404) : pas de requête préalable.
+    """
+    check_updated_at, expected_updated_at = precondition
+
+    params = {f"v_{column}": value for column, value in values.items()}
+    params.update(
+        {
+            "id": asset_id,
+            "history_action": ACTION_UPDATE,
+            "performed_by": current_user.id,
+            "ticket_id": ticket_id,
+        }
+    )
+
+    conditions = ["assets.id = previous.id"]
+    if check_updated_at:
+        conditions.append("assets.updated_at IS NOT DISTINCT FROM :expected_updated_at")
+        params["expected_updated_at"] = expected_updated_at
+
+    set_clause = "".join(f"{column} = :v_{column}, " for column in values)
+    if "numero_de_serie" in values:
+        # Le QR code encode le n° de série : il est régénéré si celui-ci change
+        set_clause += (
+            "qr_code = CASE WHEN assets.numero_de_serie IS DISTINCT FROM :v_numero_de_serie "
+            "THEN NULL ELSE assets.qr_code END, "
         )
 
     update_query = text(
         """
-        UPDATE assets
-        SET
-            nom = :nom,
-            type = :type,
-            numero_de_serie = :numero_de_serie,
-            marque = :marque,
-            modele = :modele,
-            statut = :statut,
-            localisation = :localisation,
-            departement = :departement,
-            date_d_achat = :date_d_achat,
-            date_de_fin_garantie = :date_de_fin_garantie,
-            prix_d_achat = :prix_d_achat,
-            fournisseur = :fournisseur,
-            assigned_to_user_id = :assigned_to_user_id,
-            assigned_to_name = :assigned_to_name,
-            specifications = :specifications,
-            notes = :notes,
-            updated_at = now()
-        WHERE id = :id
-        RETURNING
-            id,
-            nom,
-            type,
-            numero_de_serie,
-            marque,
-            modele,
-            statut,
-            localisation,
-            departement,
-            date_d_achat,
-            date_de_fin_garantie,
-            prix_d_achat,
-            fournisseur,
-            assigned_to_user_id,
-            assigned_to_name,
-            specifications,
-            notes,
-            qr_code,
-            created_at,
-            updated_at,
-            created_by
+        WITH updated AS (
+            UPDATE assets
+            SET """ + set_clause + """updated_at = now()
+            FROM (SELECT * FROM assets WHERE id = :id FOR UPDATE) AS previous
+            WHERE """ + " AND ".join(conditions) + """
+            RETURNING assets.*, to_jsonb(previous) AS previous_row
+        ),
+        history AS (
+            INSERT INTO asset_history (asset_id, action, description, performed_by, ticket_id, changes)
+            SELECT id, :history_action, """ + changed_fields_description("changes", "Modification : ") + """,
+                   :performed_by, :ticket_id, changes
+            FROM (
+                SELECT id, """ + changes_sql("previous_row", "to_jsonb(updated)") + """ AS changes
+                FROM updated
+            ) AS diff
+            WHERE changes IS NOT NULL
+        )
+        SELECT EXISTS (SELECT 1 FROM assets WHERE id = :id) AS asset_exists, updated.*
+        FROM (SELECT 1) AS one
+        LEFT JOIN updated ON TRUE
         """
     )
 
-    params = {
-        "id": asset_id,
-        "nom": asset_in.nom.strip(),
-        "type": asset_in.type.strip(),
-        "numero_de_serie": asset_in.numero_de_serie.strip(),
-        "marque": asset_in.marque.strip(),
-        "modele": asset_in.modele.strip(),
-        "statut": asset_in.statut.strip() if asset_in.statut else "in_stock",
-        "localisation": asset_in.localisation.strip(),
-        "departement": asset_in.departement.strip(),
-        "date_d_achat": asset_in.date_d_achat,
-        "date_de_fin_garantie": asset_in.date_de_fin_garantie,
-        "prix_d_achat": asset_in.prix_d_achat,
-        "fournisseur": asset_in.fournisseur.strip() if asset_in.fournisseur else None,
-        "assigned_to_user_id": asset_in.assigned_to_user_id,
-        "assigned_to_name": asset_in.assigned_to_name,
-        "specifications": asset_in.specifications,
-        "notes": asset_in.notes,
-    }
-
     try:
         row = db.execute(update_query, params).mappings().first()
         db.commit()
@@ -582,11 +1144,129 @@ def update_asset(
             detail=f"Erreur lors de la mise à jour de l'actif: {exc}",
         ) from exc
 
-    if not row:
+    if not row["asset_exists"]:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Erreur lors de la mise à jour de l'actif",
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Actif introuvable",
+        )
+    if row["id"] is None:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail=ASSET_MODIFIED_DETAIL,
         )
 
-    return schemas.AssetRead(**row)
+    invalidate_asset_stats()
+    asset = schemas.AssetRead(**row)
+    if asset.qr_code is None and background_tasks is not None:
+        background_tasks.add_task(generate_qr_codes, [asset.id])
+    return asset
+
+
+@router.put(
+    "/assets/{asset_id}",
+    response_model=schemas.AssetRead,
+    summary="Mettre à jour un actif",
+)
+def update_asset(
+    asset_id: int,
+    asset_in: schemas.AssetCreate,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    ticket_id: Optional[int] = Query(
+        None,
+        description="Ticket d'intervention à l'origine de la modification (historique de l'actif)",
+    ),
+    if_match: Optional[str] = Header(
+        None,
+        description="ETag (ou updated_at) de l'actif lu : la mise à jour échoue (412) s'il a été modifié depuis",
+    ),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(
+        require_role("Adjoint DSI", "DSI", "Admin", "Technicien")
+    ),
+) -> schemas.AssetRead:
+    """Met à jour un actif existant sans supprimer d'autres enregistrements."""
+
+    precondition = _parse_if_match(if_match)
+    values = asset_in.model_dump(include=set(UPDATABLE_ASSET_COLUMNS))
+    for column in STRIPPED_ASSET_COLUMNS:
+        if values[column]:
+            values[column] = values[column].strip()
+    if not values["statut"]:
+        values["statut"] = "in_stock"
+
+    asset = _apply_asset_update(
+        db, asset_id, values, current_user, ticket_id, precondition, background_tasks
+    )
+    response.headers["ETag"] = _asset_etag(asset.updated_at)
+    return asset
+
+
+@router.patch(
+    "/assets/{asset_id}",
+    response_model=schemas.AssetRead,
+    summary="Modifier partiellement un actif",
+)
+def patch_asset(
+    asset_id: int,
+    asset_in: schemas.AssetUpdate,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    ticket_id: Optional[int] = Query(
+        None,
+        description="Ticket d'intervention à l'origine de la modification (historique de l'actif)",
+    ),
+    if_match: Optional[str] = Header(
+        None,
+        description="ETag (ou updated_at) de l'actif lu : la mise à jour échoue (412) s'il a été modifié depuis",
+    ),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(
+        require_role("Adjoint DSI", "DSI", "Admin", "Technicien")
+    ),
+) -> schemas.AssetRead:
+    """
+    Met à jour uniquement les champs envoyés (les autres colonnes ne sont pas réécrites).
+
+    L'en-tête If-Match permet de refuser la modification si l'actif a changé depuis sa lecture
+    (vérifié aussi lorsque la requête ne modifie aucun champ).
+    """
+
+    precondition = _parse_if_match(if_match)
+    values = asset_in.model_dump(exclude_unset=True, include=set(UPDATABLE_ASSET_COLUMNS))
+
+    emptied = [column for column in REQUIRED_ASSET_COLUMNS if column in values and not values[column]]
+    if emptied:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Champs obligatoires : {', '.join(emptied)}",
+        )
+    for column in STRIPPED_ASSET_COLUMNS:
+        if values.get(column):
+            values[column] = values[column].strip()
+
+    if not values:
+        # Rien à modifier : renvoyer l'actif tel quel
+        row = db.execute(
+            text("SELECT" + ASSET_COLUMNS + "FROM assets WHERE id = :id"), {"id": asset_id}
+        ).mappings().first()
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Actif introuvable",
+            )
+        check_updated_at, expected_updated_at = precondition
+        if check_updated_at and row["updated_at"] != expected_updated_at:
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail=ASSET_MODIFIED_DETAIL,
+            )
+        asset = schemas.AssetRead(**row)
+    else:
+        asset = _apply_asset_update(
+            db, asset_id, values, current_user, ticket_id, precondition, background_tasks
+        )
+
+    response.headers["ETag"] = _asset_etag(asset.updated_at)
+    return asset
 
@@ -8,9 +8,9 @@ from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
-from .. import models, schemas
+from .. import models, queries, schemas
 from ..database import get_db
-from ..email_service import email_service
+from ..email_service import get_email_service
 from ..security import (
     ACCESS_TOKEN_EXPIRE_MINUTES,
     authenticate_user,
@@ -29,7 +29,7 @@ router = APIRouter()
 @router.get("/register-info", response_model=schemas.RegisterInfo)
 def get_register_info(db: Session = Depends(get_db)):
     """Retourne l'id du rôle Utilisateur et la liste des agences pour l'inscription publique (sans auth)."""
-    role = db.query(models.Role).filter(models.Role.name == "Utilisateur").first()
+    role = queries.get_role_by_name(db, "Utilisateur")
     if not role:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -82,7 +82,7 @@ def register_user(
     # Envoyer l'email avec identifiants (username + mot de passe par défaut)
     if user_in.email and user_in.email.strip():
         background_tasks.add_task(
-            email_service.send_registration_welcome,
+            get_email_service().send_registration_welcome,
             to_email=user_in.email.strip(),
             full_name=user_in.full_name,
             username=user_in.username,
@@ -113,7 +113,7 @@ def login_for_access_token(
         )
     
     # Charger le rôle pour s'assurer qu'il existe
-    user.role = db.query(models.Role).filter(models.Role.id == user.role_id).first()
+    user.role = db.get(models.Role, user.role_id)
     if not user.role:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -156,7 +156,7 @@ def forgot_password(
     reset_link = f"{app_base_url}/reset-password?token={token}"
     if user.email and user.email.strip():
         background_tasks.add_task(
-            email_service.send_password_reset_link,
+            get_email_service().send_password_reset_link,
             to_email=user.email.strip(),
             reset_link=reset_link,
             full_name=user.full_name,
@@ -178,7 +178,7 @@ def reset_password(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Lien invalide ou expiré. Veuillez refaire une demande de réinitialisation.",
         )
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = db.get(models.User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -227,7 +227,7 @@ def get_current_user_info(
     """Récupère les informations de l'utilisateur connecté"""
     # S'assurer que le rôle est chargé
     if current_user.role_id:
-        current_user.role = db.query(models.Role).filter(models.Role.id == current_user.role_id).first()
+        current_user.role = db.get(models.Role, current_user.role_id)
     return current_user
 
 
@@ -1,45 +1,147 @@
-from typing import List
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse
 from pydantic import BaseModel
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
-from .. import models
-from ..database import get_db
+from .. import models, profiling
+from ..database import get_db, read_engine
 from ..security import require_role
 
 
 router = APIRouter(prefix="/maintenance", tags=["maintenance"])
 
 
+# Comptages exacts (mode "exact") : parallélisme, délai maximum et durée de cache
+EXACT_COUNT_WORKERS = int(os.getenv("DB_STATS_EXACT_COUNT_WORKERS", "4"))
+EXACT_COUNT_TIMEOUT_SECONDS = float(os.getenv("DB_STATS_EXACT_COUNT_TIMEOUT_SECONDS", "5"))
+EXACT_COUNT_CACHE_SECONDS = int(os.getenv("DB_STATS_EXACT_COUNT_CACHE_SECONDS", "300"))
+
+# table -> (nombre de lignes exact, instant du comptage)
+_exact_count_cache: Dict[str, Tuple[int, float]] = {}
+_exact_count_lock = threading.Lock()
+
+
 class TableStats(BaseModel):
     """Statistiques simplifiées pour une table de la base de données."""
 
     name: str
     row_estimate: int
     rls_enabled: bool
+    exact: bool = False  # row_estimate est un comptage exact (mode "exact")
+    table_size_bytes: Optional[int] = None
+    indexes_size_bytes: Optional[int] = None
+    total_size_bytes: Optional[int] = None
+    live_tuples: Optional[int] = None
+    dead_tuples: Optional[int] = None
+    dead_tuple_ratio: Optional[float] = None  # Indicateur de fragmentation (bloat) : morts / (vivants + morts)
+    last_vacuum: Optional[datetime] = None
+    last_autovacuum: Optional[datetime] = None
+    last_autoanalyze: Optional[datetime] = None
+
+
+def _count_table(table_name: str) -> Optional[int]:
+    """
+    COUNT(*) exact d'une table, sur sa propre connexion, limité par statement_timeout.
+    Exécuté sur la réplique en lecture si elle est configurée (parcours complet des tables).
+    """
+    try:
+        with read_engine.connect() as conn:
+            conn.execute(text(f"SET LOCAL statement_timeout = {int(EXACT_COUNT_TIMEOUT_SECONDS * 1000)}"))
+            # Nom de table issu du catalogue (pas d'entrée utilisateur)
+            count = conn.execute(text(f'SELECT COUNT(*) FROM public."{table_name}"')).scalar() or 0
+            conn.rollback()
+            return int(count)
+    except Exception as e:
+        print(f"Comptage exact de '{table_name}' abandonné: {str(e).splitlines()[0]}")
+        return None
+
+
+def _exact_counts(table_names: List[str]) -> Dict[str, int]:
+    """
+    Comptages exacts, en parallèle et sous délai. Les valeurs sont mises en cache ;
+    une table dont le comptage dépasse le délai est absente du résultat.
+    """
+    now = time.monotonic()
+    counts: Dict[str, int] = {}
+    missing = []
+    with _exact_count_lock:
+        for name in table_names:
+            cached = _exact_count_cache.get(name)
+            if cached and now - cached[1] < EXACT_COUNT_CACHE_SECONDS:
+                counts[name] = cached[0]
+            else:
+                missing.append(name)
+
+    if missing:
+        executor = ThreadPoolExecutor(max_workers=max(1, EXACT_COUNT_WORKERS))
+        futures = {executor.submit(_count_table, name): name for name in missing}
+        # statement_timeout borne chaque comptage ; ce délai borne l'attente totale
+        done, _ = wait(futures, timeout=EXACT_COUNT_TIMEOUT_SECONDS * (len(missing) / max(1, EXACT_COUNT_WORKERS) + 1))
+        executor.shutdown(wait=False, cancel_futures=True)
+        counted_at = time.monotonic()
+        with _exact_count_lock:
+            for future in done:
+                count = future.result()
+                if count is not None:
+                    name = futures[future]
+                    counts[name] = count
+                    _exact_count_cache[name] = (count, counted_at)
+
+    return counts
 
 
 @router.get("/db-stats", response_model=List[TableStats])
 def get_database_stats(
+    mode: str = Query(
+        "estimate",
+        pattern="^(estimate|exact)$",
+        description="estimate : statistiques PostgreSQL (instantané) ; exact : COUNT(*) en parallèle, sous délai, mis en cache",
+    ),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(require_role("Admin", "DSI")),
 ) -> List[TableStats]:
     """
-    Retourne une vue d'ensemble des tables du schéma public avec un
-    comptage RÉEL du nombre de lignes (COUNT(*)), basé sur la base
-    de données elle-même et non sur les statistiques estimées.
+    Retourne une vue d'ensemble des tables du schéma public.
+
+    Par défaut (mode "estimate"), le nombre de lignes provient des statistiques de PostgreSQL
+    (pg_class.reltuples, ou pg_stat_user_tables.n_live_tup si la table n'a jamais été analysée) :
+    une seule requête sur le catalogue, sans parcourir les tables.
+
+    En mode "exact", un COUNT(*) est lancé en parallèle pour chaque table (délai maximum par table,
+    résultats mis en cache) ; les tables dont le comptage n'aboutit pas gardent l'estimation (exact = false).
+
+    Sont aussi renvoyés : tailles (table, index, total), tuples vivants / morts, ratio de tuples morts
+    et dates du dernier (auto)vacuum / autoanalyze.
     """
 
-    # 1) Récupérer la liste des tables du schéma public + info RLS
     tables_query = text(
         """
         SELECT
             c.relname AS table_name,
-            c.relrowsecurity AS rls_enabled
+            c.relrowsecurity AS rls_enabled,
+            CASE
+                WHEN c.reltuples >= 0 THEN c.reltuples::bigint
+                ELSE COALESCE(s.n_live_tup, 0)
+            END AS row_estimate,
+            pg_table_size(c.oid) AS table_size_bytes,
+            pg_indexes_size(c.oid) AS indexes_size_bytes,
+            pg_total_relation_size(c.oid) AS total_size_bytes,
+            s.n_live_tup AS live_tuples,
+            s.n_dead_tup AS dead_tuples,
+            s.last_vacuum,
+            s.last_autovacuum,
+            s.last_autoanalyze
         FROM pg_class c
         JOIN pg_namespace n ON n.oid = c.relnamespace
+        LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
         WHERE
             n.nspname = 'public'
             AND c.relkind = 'r'
@@ -47,29 +149,364 @@ def get_database_stats(
         """
     )
 
-    result = db.execute(tables_query)
-    rows = result.fetchall()
+    rows = db.execute(tables_query).mappings().all()
 
-    stats: List[TableStats] = []
+    exact_counts: Dict[str, int] = {}
+    if mode == "exact":
+        exact_counts = _exact_counts([row["table_name"] for row in rows])
 
-    # 2) Pour chaque table, faire un COUNT(*) exact
+    stats: List[TableStats] = []
     for row in rows:
-        table_name = row.table_name
-
-        # On construit la requête avec le nom de table issu du catalogue
-        # (pas d'entrée utilisateur), ce qui évite l'injection SQL.
-        count_query = text(f'SELECT COUNT(*) FROM public."{table_name}"')
-        count_result = db.execute(count_query).scalar() or 0
-
+        table_name = row["table_name"]
+        live, dead = row["live_tuples"], row["dead_tuples"]
         stats.append(
             TableStats(
                 name=table_name,
-                # On garde le champ row_estimate côté API / front,
-                # mais il contient désormais la valeur exacte.
-                row_estimate=int(count_result),
-                rls_enabled=bool(row.rls_enabled),
+                row_estimate=exact_counts.get(table_name, int(row["row_estimate"] or 0)),
+                rls_enabled=bool(row["rls_enabled"]),
+                exact=table_name in exact_counts,
+                table_size_bytes=row["table_size_bytes"],
+                indexes_size_bytes=row["indexes_size_bytes"],
+                total_size_bytes=row["total_size_bytes"],
+                live_tuples=live,
+                dead_tuples=dead,
+                dead_tuple_ratio=(dead / (live + dead)) if live is not None and dead and (live + dead) else 0.0,
+                last_vacuum=row["last_vacuum"],
+                last_autovacuum=row["last_autovacuum"],
+                last_autoanalyze=row["last_autoanalyze"],
             )
         )
 
     return stats
 
+
+# ---------------------------------------------------------------------------
+# Diagnostic des performances : requêtes lentes, utilisation des index, verrous
+# ---------------------------------------------------------------------------
+
+class SlowQuery(BaseModel):
+    """Statistiques cumulées d'une requête normalisée (pg_stat_statements)."""
+
+    query_id: Optional[int] = None
+    query: str
+    calls: int
+    total_time_ms: float
+    mean_time_ms: float
+    max_time_ms: Optional[float] = None
+    rows: int
+    cache_hit_ratio: Optional[float] = None  # Blocs lus en cache / blocs lus
+
+
+class SlowQueriesReport(BaseModel):
+    available: bool  # False si l'extension pg_stat_statements n'est pas installée
+    message: Optional[str] = None
+    statements: List[SlowQuery] = []
+
+
+class UnusedIndex(BaseModel):
+    table: str
+    index: str
+    size_bytes: int
+    index_scans: int
+    definition: str
+
+
+class SeqScanTable(BaseModel):
+    """Table souvent lue en parcours séquentiel : candidate à un index manquant."""
+
+    table: str
+    seq_scans: int
+    seq_tuples_read: int
+    avg_tuples_per_seq_scan: float
+    index_scans: int
+    live_tuples: int
+
+
+class UnindexedForeignKey(BaseModel):
+    table: str
+    constraint: str
+    columns: List[str]
+    referenced_table: str
+
+
+class IndexUsageReport(BaseModel):
+    stats_reset: Optional[datetime] = None  # Début de la période couverte par les compteurs
+    unused_indexes: List[UnusedIndex] = []
+    seq_scan_heavy_tables: List[SeqScanTable] = []
+    unindexed_foreign_keys: List[UnindexedForeignKey] = []
+
+
+class LockSession(BaseModel):
+    """Session impliquée dans une attente de verrou (bloquée et/ou bloquante)."""
+
+    pid: int
+    user: Optional[str] = None
+    application: Optional[str] = None
+    state: Optional[str] = None
+    wait_event_type: Optional[str] = None
+    wait_event: Optional[str] = None
+    blocked_by: List[int] = []
+    waiting_for_lock: Optional[str] = None  # ex: "RowExclusiveLock sur tickets"
+    transaction_seconds: Optional[float] = None
+    query_seconds: Optional[float] = None
+    query: Optional[str] = None
+
+
+class LocksReport(BaseModel):
+    root_blockers: List[int] = []  # Sessions qui bloquent sans être elles-mêmes bloquées
+    sessions: List[LockSession] = []
+
+
+@router.get("/slow-queries", response_model=SlowQueriesReport)
+def get_slow_queries(
+    limit: int = Query(20, ge=1, le=200, description="Nombre de requêtes"),
+    order_by: str = Query(
+        "total",
+        pattern="^(total|mean|calls)$",
+        description="Tri : temps total, temps moyen ou nombre d'appels",
+    ),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_role("Admin", "DSI")),
+) -> SlowQueriesReport:
+    """
+    Requêtes les plus coûteuses de la base courante (pg_stat_statements).
+
+    L'extension doit être chargée (shared_preload_libraries) et créée (CREATE EXTENSION pg_stat_statements) ;
+    sinon `available` vaut false et la liste est vide.
+    """
+
+    installed = db.execute(
+        text("SELECT 1 FROM pg_extension WHERE extname = 'pg_stat_statements'")
+    ).first()
+    if not installed:
+        return SlowQueriesReport(
+            available=False,
+            message="Extension pg_stat_statements non installée (shared_preload_libraries + CREATE EXTENSION pg_stat_statements)",
+        )
+
+    # Colonnes renommées en PostgreSQL 13 (total_time -> total_exec_time, ...)
+    version = int(db.execute(text("SHOW server_version_num")).scalar())
+    prefix = "exec_" if version >= 130000 else ""
+    order_columns = {"total": f"total_{prefix}time", "mean": f"mean_{prefix}time", "calls": "calls"}
+
+    try:
+        rows = db.execute(
+            text(
+                f"""
+                SELECT
+                    queryid AS query_id,
+                    left(query, 2000) AS query,
+                    calls,
+                    total_{prefix}time AS total_time_ms,
+                    mean_{prefix}time AS mean_time_ms,
+                    max_{prefix}time AS max_time_ms,
+                    rows,
+                    shared_blks_hit::float / NULLIF(shared_blks_hit + shared_blks_read, 0) AS cache_hit_ratio
+                FROM pg_stat_statements
+                WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+                ORDER BY {order_columns[order_by]} DESC
+                LIMIT :limit
+                """
+            ),
+            {"limit": limit},
+        ).mappings().all()
+    except Exception as e:
+        # Extension créée mais bibliothèque non chargée (shared_preload_libraries)
+        db.rollback()
+        return SlowQueriesReport(available=False, message=str(e).splitlines()[0])
+
+    return SlowQueriesReport(available=True, statements=[SlowQuery(**row) for row in rows])
+
+
+@router.get("/index-usage", response_model=IndexUsageReport)
+def get_index_usage(
+    min_table_rows: int = Query(
+        1000,
+        ge=0,
+        description="Taille minimale (lignes) d'une table pour être signalée comme candidate à un index",
+    ),
+    limit: int = Query(20, ge=1, le=200, description="Nombre maximum d'éléments par liste"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_role("Admin", "DSI")),
+) -> IndexUsageReport:
+    """
+    Utilisation des index du schéma public (pg_stat_user_indexes / pg_stat_user_tables) :
+
+    - index jamais utilisés depuis la remise à zéro des statistiques (hors clés primaires / contraintes d'unicité) ;
+    - tables volumineuses lues surtout en parcours séquentiel (index manquant probable) ;
+    - clés étrangères sans index sur leurs colonnes (jointures et suppressions en cascade lentes).
+    """
+
+    stats_reset = db.execute(
+        text("SELECT stats_reset FROM pg_stat_database WHERE datname = current_database()")
+    ).scalar()
+
+    unused = db.execute(
+        text(
+            """
+            SELECT
+                s.relname AS table,
+                s.indexrelname AS index,
+                pg_relation_size(s.indexrelid) AS size_bytes,
+                s.idx_scan AS index_scans,
+                pg_get_indexdef(s.indexrelid) AS definition
+            FROM pg_stat_user_indexes s
+            JOIN pg_index i ON i.indexrelid = s.indexrelid
+            WHERE s.schemaname = 'public'
+              AND s.idx_scan = 0
+              AND NOT i.indisunique
+              AND NOT i.indisprimary
+              AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = s.indexrelid)
+            ORDER BY pg_relation_size(s.indexrelid) DESC
+            LIMIT :limit
+            """
+        ),
+        {"limit": limit},
+    ).mappings().all()
+
+    seq_scans = db.execute(
+        text(
+            """
+            SELECT
+                relname AS table,
+                seq_scan AS seq_scans,
+                seq_tup_read AS seq_tuples_read,
+                seq_tup_read::float / NULLIF(seq_scan, 0) AS avg_tuples_per_seq_scan,
+                COALESCE(idx_scan, 0) AS index_scans,
+                n_live_tup AS live_tuples
+            FROM pg_stat_user_tables
+            WHERE schemaname = 'public'
+              AND seq_scan > 0
+              AND n_live_tup >= :min_table_rows
+              AND seq_scan > COALESCE(idx_scan, 0)
+            ORDER BY seq_tup_read DESC
+            LIMIT :limit
+            """
+        ),
+        {"min_table_rows": min_table_rows, "limit": limit},
+    ).mappings().all()
+
+    # Clé étrangère non indexée : aucun index dont les premières colonnes sont celles de la clé
+    unindexed_fks = db.execute(
+        text(
+            """
+            SELECT
+                c.conrelid::regclass::text AS table,
+                c.conname AS constraint,
+                ARRAY(
+                    SELECT a.attname
+                    FROM unnest(c.conkey) WITH ORDINALITY AS k(attnum, ord)
+                    JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = k.attnum
+                    ORDER BY k.ord
+                ) AS columns,
+                c.confrelid::regclass::text AS referenced_table
+            FROM pg_constraint c
+            JOIN pg_namespace n ON n.oid = c.connamespace
+            WHERE c.contype = 'f'
+              AND n.nspname = 'public'
+              AND NOT EXISTS (
+                  SELECT 1
+                  FROM pg_index i
+                  WHERE i.indrelid = c.conrelid
+                    AND (i.indkey::int2[])[0:cardinality(c.conkey) - 1] @> c.conkey
+                    AND (i.indkey::int2[])[0:cardinality(c.conkey) - 1] <@ c.conkey
+              )
+            ORDER BY 1, 2
+            LIMIT :limit
+            """
+        ),
+        {"limit": limit},
+    ).mappings().all()
+
+    return IndexUsageReport(
+        stats_reset=stats_reset,
+        unused_indexes=[UnusedIndex(**row) for row in unused],
+        seq_scan_heavy_tables=[SeqScanTable(**row) for row in seq_scans],
+        unindexed_foreign_keys=[UnindexedForeignKey(**row) for row in unindexed_fks],
+    )
+
+
+@router.get("/locks", response_model=LocksReport)
+def get_locks(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_role("Admin", "DSI")),
+) -> LocksReport:
+    """
+    Attentes de verrous en cours sur la base courante (pg_stat_activity, pg_locks, pg_blocking_pids).
+
+    Chaque session bloquée indique les sessions qui la bloquent (`blocked_by`) et le verrou attendu ;
+    `root_blockers` donne les sessions en tête des chaînes de blocage (à examiner / terminer en priorité).
+    """
+
+    rows = db.execute(
+        text(
+            """
+            WITH activity AS (
+                SELECT a.*, pg_blocking_pids(a.pid) AS blocked_by
+                FROM pg_stat_activity a
+                WHERE a.datname = current_database()
+            ),
+            blockers AS (
+                SELECT DISTINCT unnest(blocked_by) AS pid FROM activity
+            )
+            SELECT
+                a.pid,
+                a.usename AS user,
+                a.application_name AS application,
+                a.state,
+                a.wait_event_type,
+                a.wait_event,
+                a.blocked_by,
+                (
+                    SELECT l.mode || ' sur ' || COALESCE(l.relation::regclass::text, l.locktype)
+                    FROM pg_locks l
+                    WHERE l.pid = a.pid AND NOT l.granted
+                    LIMIT 1
+                ) AS waiting_for_lock,
+                EXTRACT(EPOCH FROM now() - a.xact_start) AS transaction_seconds,
+                EXTRACT(EPOCH FROM now() - a.query_start) AS query_seconds,
+                left(a.query, 2000) AS query
+            FROM activity a
+            WHERE cardinality(a.blocked_by) > 0
+               OR a.pid IN (SELECT pid FROM blockers)
+            ORDER BY a.xact_start NULLS LAST
+            """
+        )
+    ).mappings().all()
+
+    sessions = [LockSession(**row) for row in rows]
+    return LocksReport(
+        root_blockers=[session.pid for session in sessions if not session.blocked_by],
+        sessions=sessions,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Profils d'exécution (voir app/profiling.py)
+# ---------------------------------------------------------------------------
+
+class ProfileInfo(BaseModel):
+    id: str
+    label: str  # Route ou tâche profilée (ex: GET-assets-42, job-run_scheduled_tasks)
+    created_at: datetime
+    size_bytes: int
+
+
+@router.get("/profiles", response_model=List[ProfileInfo])
+def list_profiles(
+    current_user: models.User = Depends(require_role("Admin")),
+) -> List[ProfileInfo]:
+    """Profils enregistrés (requêtes profilées à la demande, échantillon 1/N, tâches planifiées)."""
+    return [ProfileInfo(**profile) for profile in profiling.list_profiles()]
+
+
+@router.get("/profiles/{profile_id}")
+def download_profile(
+    profile_id: str,
+    current_user: models.User = Depends(require_role("Admin")),
+) -> FileResponse:
+    """Télécharge un profil au format « collapsed stacks » (flamegraph.pl, speedscope)."""
+    path = profiling.profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profil introuvable")
+    return FileResponse(path, media_type="text/plain; charset=utf-8", filename=f"{profile_id}.folded")
@@ -9,7 +9,7 @@ from pydantic import BaseModel, EmailStr
 from .. import models
 from ..database import get_db
 from ..security import get_current_user, require_role
-from ..email_service import email_service
+from ..email_service import get_email_service
 
 router = APIRouter(prefix="/settings", tags=["settings"])
 
@@ -49,6 +49,7 @@ def get_email_settings(
     ),
 ):
     """Récupérer les paramètres email actuels"""
+    email_service = get_email_service()
     return EmailSettingsRead(
         smtp_server=email_service.smtp_server,
         smtp_port=email_service.smtp_port,
@@ -69,6 +70,7 @@ def update_email_settings(
     ),
 ):
     """Mettre à jour les paramètres email"""
+    email_service = get_email_service()
     # Mettre à jour les paramètres du service email
     if settings.smtp_server is not None:
         email_service.smtp_server = settings.smtp_server
@@ -113,6 +115,7 @@ def test_email_configuration(
     ),
 ):
     """Tester la configuration email en envoyant un email de test"""
+    email_service = get_email_service()
     subject = "Test de configuration email - Système de Gestion des Tickets"
     body = f"""
 Bonjour,
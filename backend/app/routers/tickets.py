@@ -1,17 +1,30 @@
+import os
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, or_, cast, String
+from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks, Response
+from sqlalchemy.orm import Session, joinedload, raiseload
+from sqlalchemy import func, or_, and_, not_, case, literal, null, cast, select, tuple_, type_coerce, union_all, String
 
-from .. import models, schemas
+from .. import models, queries, schemas
 from ..database import get_db
+from ..read_replica import get_read_db
 from ..security import get_current_user, require_role
-from ..email_service import email_service
+from ..email_service import get_email_service
+from ..serialization import ORJSONResponse, ticket_to_dict
 
 router = APIRouter()
 
+# Rôles ayant accès à tous les tickets (consultation, historique)
+AGENT_ROLES = ["Secrétaire DSI", "Adjoint DSI", "DSI", "Admin"]
+# Rôles qui voient les commentaires internes même lorsqu'ils sont créateurs du ticket
+INTERNAL_COMMENT_ROLES = ("DSI", "Adjoint DSI", "Secrétaire DSI", "Technicien", "Admin")
+INTERNAL_COMMENT_PREFIX = "Commentaire (interne):"
+# GET /tickets/changes : updated_at est fixé par l'application avant la validation de la transaction.
+# Une modification validée en retard (transaction longue, horloges des workers décalées) peut avoir
+# un updated_at antérieur au curseur déjà renvoyé : la fenêtre derrière le curseur est relue à chaque appel.
+CHANGES_SAFETY_WINDOW_SECONDS = float(os.getenv("CHANGES_SAFETY_WINDOW_SECONDS", "30"))
+
 
 def _get_priority_id_from_enum(db: Session, priority_value) -> Optional[int]:
     """Retourne l'id de la table priorities correspondant au code de l'enum (ex: TicketPriority.CRITIQUE → id de 'critique')."""
@@ -22,6 +35,164 @@ def _get_priority_id_from_enum(db: Session, priority_value) -> Optional[int]:
     return p.id if p else None
 
 
+def _ensure_can_view_ticket(ticket: models.Ticket, current_user: models.User) -> None:
+    """Vérifie les permissions de consultation : créateur, technicien assigné, ou agent/DSI."""
+    is_creator = ticket.creator_id == current_user.id
+    is_assigned_tech = ticket.technician_id == current_user.id
+    is_agent = current_user.role and current_user.role.name in AGENT_ROLES
+
+    if not (is_creator or is_assigned_tech or is_agent):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Access denied"
+        )
+
+
+def _hides_internal_comments(ticket: models.Ticket, current_user: models.User) -> bool:
+    """True si le créateur du ticket consulte et que son rôle ne lui permet pas de voir les commentaires internes."""
+    if ticket.creator_id != current_user.id:
+        return False
+    role_name = current_user.role.name if current_user.role else None
+    return role_name not in INTERNAL_COMMENT_ROLES
+
+
+def _keyset_before(db: Session, model, ts_column, ticket_id: int, before: str):
+    """
+    Condition de pagination par curseur (keyset) : éléments strictement plus anciens que
+    le curseur, selon l'ordre (horodatage, id) décroissant.
+
+    `before` : curseur X-Next-Cursor (horodatage et id, aucune requête : reste valable si
+    l'élément a été supprimé entre-temps), ou id d'un élément du ticket (400 s'il n'existe pas).
+    """
+    if not before.isdigit():
+        cursor_ts, _, cursor_id = _decode_cursor(before)
+        return or_(ts_column < cursor_ts, and_(ts_column == cursor_ts, model.id < cursor_id))
+
+    cursor = (
+        db.query(ts_column, model.id)
+        .filter(model.id == int(before), model.ticket_id == ticket_id)
+        .first()
+    )
+    if not cursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+    cursor_ts, cursor_id = cursor
+    return or_(ts_column < cursor_ts, and_(ts_column == cursor_ts, model.id < cursor_id))
+
+
+def _encode_cursor(ts: datetime, kind: str, item_id: int) -> str:
+    """Curseur opaque d'un événement : horodatage|type|id"""
+    return f"{ts.isoformat()}|{kind}|{item_id}"
+
+
+def _decode_cursor(value: str):
+    """Décode un curseur produit par _encode_cursor (400 si invalide)."""
+    try:
+        ts, kind, item_id = value.rsplit("|", 2)
+        return datetime.fromisoformat(ts), kind, int(item_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+def _query_comments(
+    db: Session,
+    ticket_id: int,
+    hide_internal: bool,
+    limit: Optional[int] = None,
+    before: Optional[str] = None,
+) -> List[models.Comment]:
+    """
+    Commentaires d'un ticket avec le filtre de visibilité appliqué en SQL, en ordre chronologique.
+    Avec `limit`/`before` : les `limit` commentaires les plus récents (antérieurs à `before`),
+    sélectionnés en ordre décroissant puis remis en ordre chronologique.
+    """
+    query = (
+        db.query(models.Comment)
+        .options(joinedload(models.Comment.user))
+        .filter(models.Comment.ticket_id == ticket_id)
+    )
+    if hide_internal:
+        query = query.filter(models.Comment.type != models.CommentType.TECHNIQUE)
+
+    if limit is None and before is None:
+        return query.order_by(models.Comment.created_at.asc(), models.Comment.id.asc()).all()
+
+    if before is not None:
+        query = query.filter(
+            _keyset_before(db, models.Comment, models.Comment.created_at, ticket_id, before)
+        )
+    query = query.order_by(models.Comment.created_at.desc(), models.Comment.id.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    comments = query.all()
+    comments.reverse()
+    return comments
+
+
+def _query_history(
+    db: Session,
+    ticket_id: int,
+    hide_internal: bool,
+    limit: Optional[int] = None,
+    before: Optional[str] = None,
+) -> List[schemas.TicketHistoryRead]:
+    """
+    Historique d'un ticket (du plus récent au plus ancien) avec les règles de visibilité en SQL :
+    les événements de commentaires internes sont exclus pour le créateur, et tous les événements
+    de commentaire sont renvoyés "Commentaire: <texte>" (texte lu dans comments via comment_id).
+    Un événement dont le commentaire a été supprimé (comment_id remis à NULL) est renvoyé
+    "Commentaire supprimé", et masqué au créateur (le type du commentaire n'est plus connu).
+    Les entrées anciennes "Commentaire (interne): ..." (avant migrate_ticket_history_comment_events.py)
+    suivent les mêmes règles.
+    """
+    reason = models.TicketHistory.reason
+    deleted_comment = and_(
+        models.TicketHistory.event_type == models.HistoryEventType.COMMENTAIRE.value,
+        models.TicketHistory.comment_id.is_(None),
+    )
+    display_reason = case(
+        (
+            models.TicketHistory.comment_id.isnot(None),
+            literal("Commentaire: ") + models.Comment.content,
+        ),
+        (deleted_comment, literal("Commentaire supprimé")),
+        (
+            reason.startswith(INTERNAL_COMMENT_PREFIX),
+            literal("Commentaire: ") + func.substr(reason, len(INTERNAL_COMMENT_PREFIX + " ") + 1),
+        ),
+        else_=reason,
+    ).label("display_reason")
+
+    query = (
+        db.query(models.TicketHistory, display_reason)
+        .outerjoin(models.Comment, models.Comment.id == models.TicketHistory.comment_id)
+        .options(joinedload(models.TicketHistory.user).joinedload(models.User.role))
+        .filter(models.TicketHistory.ticket_id == ticket_id)
+    )
+    if hide_internal:
+        query = query.filter(
+            or_(models.TicketHistory.comment_id.is_(None), models.Comment.type != models.CommentType.TECHNIQUE),
+            or_(reason.is_(None), not_(reason.startswith(INTERNAL_COMMENT_PREFIX))),
+            not_(deleted_comment),
+        )
+    if before is not None:
+        query = query.filter(
+            _keyset_before(db, models.TicketHistory, models.TicketHistory.changed_at, ticket_id, before)
+        )
+    query = query.order_by(models.TicketHistory.changed_at.desc(), models.TicketHistory.id.desc())
+    if limit is not None:
+        query = query.limit(limit)
+
+    result = []
+    for entry, entry_reason in query.all():
+        item = schemas.TicketHistoryRead.model_validate(entry)
+        item.reason = entry_reason
+        result.append(item)
+    return result
+
+
 @router.post("/", response_model=schemas.TicketRead)
 def create_ticket(
     ticket_in: schemas.TicketCreate,
@@ -96,7 +267,7 @@ def create_ticket(
         # Ajouter les tâches d'envoi d'emails en arrière-plan
         for user in notified_users:
             background_tasks.add_task(
-                email_service.send_ticket_created_notification_with_actions,
+                get_email_service().send_ticket_created_notification_with_actions,
                 ticket_id=str(ticket.id),
                 ticket_number=ticket.number,
                 ticket_title=ticket.title,
@@ -120,7 +291,7 @@ def create_ticket(
     # Envoyer un email de confirmation au créateur en arrière-plan (asynchrone)
     if current_user.email and current_user.email.strip():
         background_tasks.add_task(
-            email_service.send_ticket_created_to_creator_notification,
+            get_email_service().send_ticket_created_to_creator_notification,
             ticket_id=str(ticket.id),
             ticket_number=ticket.number,
             ticket_title=ticket.title,
@@ -129,42 +300,25 @@ def create_ticket(
         )
     
     # Charger les relations pour la réponse
-    ticket = (
-        db.query(models.Ticket)
-        .options(
-            joinedload(models.Ticket.creator),
-            joinedload(models.Ticket.technician)
-        )
-        .filter(models.Ticket.id == ticket.id)
-        .first()
-    )
+    ticket = queries.get_ticket_with_people(db, ticket.id)
     
     return ticket
 
 
 @router.get("/me", response_model=List[schemas.TicketRead])
 def list_my_tickets(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user),
 ):
     """Liste des tickets créés par l'utilisateur connecté"""
-    tickets = (
-        db.query(models.Ticket)
-        .options(
-            joinedload(models.Ticket.creator),
-            joinedload(models.Ticket.technician)
-        )
-        .filter(models.Ticket.creator_id == current_user.id)
-        .order_by(models.Ticket.created_at.desc())
-        .all()
-    )
-    return tickets
+    tickets = queries.list_tickets_created_by(db, current_user.id)
+    return ORJSONResponse([ticket_to_dict(ticket) for ticket in tickets])
 
 
 @router.get("/", response_model=List[schemas.TicketRead])
 def list_all_tickets(
     search: Optional[str] = Query(None, description="Rechercher par ID, Numéro, Titre ou Description"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(
         require_role("Secrétaire DSI", "Adjoint DSI", "DSI", "Admin")
     ),
@@ -173,8 +327,8 @@ def list_all_tickets(
     query = (
         db.query(models.Ticket)
         .options(
-            joinedload(models.Ticket.creator),
-            joinedload(models.Ticket.technician)
+            joinedload(models.Ticket.creator).joinedload(models.User.role),
+            joinedload(models.Ticket.technician).joinedload(models.User.role)
         )
     )
     
@@ -208,21 +362,21 @@ def list_all_tickets(
         query = query.filter(search_filter)
     
     tickets = query.order_by(models.Ticket.created_at.desc()).all()
-    return tickets
+    return ORJSONResponse([ticket_to_dict(ticket) for ticket in tickets])
 
 
 @router.get("/assigned", response_model=List[schemas.TicketRead])
 def list_assigned_tickets(
     search: Optional[str] = Query(None, description="Rechercher par ID, Numéro, Titre ou Description"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user),
 ):
     """Liste des tickets assignés au technicien connecté"""
     query = (
         db.query(models.Ticket)
         .options(
-            joinedload(models.Ticket.creator),
-            joinedload(models.Ticket.technician)
+            joinedload(models.Ticket.creator).joinedload(models.User.role),
+            joinedload(models.Ticket.technician).joinedload(models.User.role)
         )
         .filter(models.Ticket.technician_id == current_user.id)
     )
@@ -257,7 +411,103 @@ def list_assigned_tickets(
         query = query.filter(search_filter)
 
     tickets = query.order_by(models.Ticket.created_at.desc()).all()
-    return tickets
+    return ORJSONResponse([ticket_to_dict(ticket) for ticket in tickets])
+
+
+@router.get("/changes", response_model=schemas.TicketChangesRead)
+def list_ticket_changes(
+    since: Optional[str] = Query(None, description="Curseur next_cursor de l'appel précédent (ou date ISO). Absent : synchronisation complète"),
+    limit: int = Query(500, ge=1, le=1000, description="Nombre maximum de tickets renvoyés"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Flux de synchronisation incrémentale : tickets créés/modifiés après le curseur (ordre updated_at, id)
+    et tickets supprimés (tombstones, ordre deleted_at, ticket_id). Les agents/DSI voient tous les tickets,
+    les autres utilisateurs ceux qu'ils ont créés ou qui leur sont assignés.
+
+    Les éléments des CHANGES_SAFETY_WINDOW_SECONDS secondes précédant le curseur sont renvoyés à nouveau
+    (validations tardives) : le client remplace les tickets et applique les suppressions par id.
+    """
+    is_agent = current_user.role and current_user.role.name in AGENT_ROLES
+
+    query = db.query(models.Ticket).options(
+        joinedload(models.Ticket.creator).joinedload(models.User.role),
+        joinedload(models.Ticket.technician).joinedload(models.User.role)
+    )
+    deleted_query = db.query(models.TicketTombstone)
+    if not is_agent:
+        query = query.filter(
+            or_(models.Ticket.creator_id == current_user.id, models.Ticket.technician_id == current_user.id)
+        )
+        deleted_query = deleted_query.filter(
+            or_(models.TicketTombstone.creator_id == current_user.id, models.TicketTombstone.technician_id == current_user.id)
+        )
+
+    # Position d'un élément : (horodatage, id du ticket), unique pour les tickets et les suppressions
+    ticket_position = tuple_(models.Ticket.updated_at, models.Ticket.id)
+    deleted_position = tuple_(models.TicketTombstone.deleted_at, models.TicketTombstone.ticket_id)
+
+    late_tickets = []
+    if since:
+        if "|" in since:
+            since_ts, _, since_id = _decode_cursor(since)
+        else:
+            try:
+                since_ts, since_id = datetime.fromisoformat(since), 0
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid since"
+                )
+        window_start = since_ts - timedelta(seconds=CHANGES_SAFETY_WINDOW_SECONDS)
+        # Fenêtre relue hors limite : elle ne fait pas avancer le curseur
+        late_tickets = (
+            query.filter(
+                models.Ticket.updated_at > window_start,
+                ticket_position <= tuple_(since_ts, since_id),
+            )
+            .order_by(models.Ticket.updated_at.asc(), models.Ticket.id.asc())
+            .all()
+        )
+        query = query.filter(ticket_position > tuple_(since_ts, since_id))
+        deleted_query = deleted_query.filter(
+            or_(
+                models.TicketTombstone.deleted_at > window_start,
+                deleted_position > tuple_(since_ts, since_id),
+            )
+        )
+
+    # Une ligne de plus que la limite pour savoir s'il reste des modifications
+    tickets = (
+        query.order_by(models.Ticket.updated_at.asc(), models.Ticket.id.asc())
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(tickets) > limit
+    tickets = tickets[:limit]
+
+    if has_more:
+        # Suppressions jusqu'au dernier ticket renvoyé : les suivantes viendront avec la page suivante
+        last = tickets[-1]
+        deleted_query = deleted_query.filter(deleted_position <= tuple_(last.updated_at, last.id))
+    deleted = deleted_query.order_by(
+        models.TicketTombstone.deleted_at.asc(), models.TicketTombstone.ticket_id.asc()
+    ).all()
+
+    # Curseur : position du dernier élément renvoyé (ticket ou suppression), jamais en arrière
+    positions = [(t.updated_at, t.id) for t in tickets] + [(d.deleted_at, d.ticket_id) for d in deleted]
+    if since:
+        positions.append((since_ts, since_id))
+    if positions:
+        next_ts, next_id = max(positions)
+        next_cursor = _encode_cursor(next_ts, "ticket", next_id)
+    else:
+        next_cursor = since
+    tickets = late_tickets + tickets
+
+    return schemas.TicketChangesRead(
+        tickets=tickets, deleted=deleted, next_cursor=next_cursor, has_more=has_more
+    )
 
 
 @router.get("/{ticket_id}", response_model=schemas.TicketRead)
@@ -267,29 +517,14 @@ def get_ticket(
     current_user: models.User = Depends(get_current_user),
 ):
     """Récupérer un ticket par son ID"""
-    ticket = (
-        db.query(models.Ticket)
-        .options(
-            joinedload(models.Ticket.creator),
-            joinedload(models.Ticket.technician)
-        )
-        .filter(models.Ticket.id == ticket_id)
-        .first()
-    )
+    ticket = queries.get_ticket_with_people(db, ticket_id)
     if not ticket:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found"
         )
     
     # Vérifier les permissions : créateur, technicien assigné, ou agent/DSI
-    is_creator = ticket.creator_id == current_user.id
-    is_assigned_tech = ticket.technician_id == current_user.id
-    is_agent = current_user.role and current_user.role.name in ["Secrétaire DSI", "Adjoint DSI", "DSI", "Admin"]
-    
-    if not (is_creator or is_assigned_tech or is_agent):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="Access denied"
-        )
+    _ensure_can_view_ticket(ticket, current_user)
     
     return ticket
 
@@ -301,7 +536,7 @@ def edit_ticket(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    ticket = db.query(models.Ticket).filter(models.Ticket.id == ticket_id).first()
+    ticket = db.get(models.Ticket, ticket_id)
     if not ticket:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found")
 
@@ -344,15 +579,7 @@ def edit_ticket(
     db.commit()
     db.refresh(ticket)
 
-    ticket = (
-        db.query(models.Ticket)
-        .options(
-            joinedload(models.Ticket.creator),
-            joinedload(models.Ticket.technician)
-        )
-        .filter(models.Ticket.id == ticket.id)
-        .first()
-    )
+    ticket = queries.get_ticket_with_people(db, ticket.id)
     return ticket
 
 
@@ -362,7 +589,7 @@ def delete_ticket(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    ticket = db.query(models.Ticket).filter(models.Ticket.id == ticket_id).first()
+    ticket = db.get(models.Ticket, ticket_id)
     if not ticket:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found")
 
@@ -384,6 +611,13 @@ def delete_ticket(
     # Supprimer les notifications liées au ticket avant de supprimer le ticket
     try:
         db.query(models.Notification).filter(models.Notification.ticket_id == ticket.id).delete()
+        # Conserver une trace de la suppression pour le flux de synchronisation (/tickets/changes)
+        db.add(models.TicketTombstone(
+            ticket_id=ticket.id,
+            number=ticket.number,
+            creator_id=ticket.creator_id,
+            technician_id=ticket.technician_id,
+        ))
         # Les comments et history sont supprimés automatiquement grâce au cascade
         db.delete(ticket)
         db.commit()
@@ -407,14 +641,14 @@ def assign_ticket(
     ),
 ):
     """Assigner un ticket à un technicien"""
-    ticket = db.query(models.Ticket).filter(models.Ticket.id == ticket_id).first()
+    ticket = db.get(models.Ticket, ticket_id)
     if not ticket:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found"
         )
     
     # Vérifier que le technicien existe
-    technician = db.query(models.User).filter(models.User.id == assign_data.technician_id).first()
+    technician = db.get(models.User, assign_data.technician_id)
     if not technician:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Technician not found"
@@ -473,12 +707,12 @@ def assign_ticket(
     db.refresh(ticket)
     
     # Récupérer le créateur du ticket pour l'email
-    creator = db.query(models.User).filter(models.User.id == ticket.creator_id).first()
+    creator = db.get(models.User, ticket.creator_id)
     
     # Envoyer les emails en arrière-plan (asynchrone)
     if technician.email and technician.email.strip():
         background_tasks.add_task(
-            email_service.send_ticket_assigned_notification,
+            get_email_service().send_ticket_assigned_notification,
             ticket_id=str(ticket.id),
             ticket_number=ticket.number,
             ticket_title=ticket.title,
@@ -490,7 +724,7 @@ def assign_ticket(
     
     if creator and creator.email and creator.email.strip():
         background_tasks.add_task(
-            email_service.send_ticket_assigned_to_creator_notification,
+            get_email_service().send_ticket_assigned_to_creator_notification,
             ticket_id=str(ticket.id),
             ticket_number=ticket.number,
             ticket_title=ticket.title,
@@ -500,15 +734,7 @@ def assign_ticket(
         )
     
     # Charger les relations pour la réponse
-    ticket = (
-        db.query(models.Ticket)
-        .options(
-            joinedload(models.Ticket.creator),
-            joinedload(models.Ticket.technician)
-        )
-        .filter(models.Ticket.id == ticket.id)
-        .first()
-    )
+    ticket = queries.get_ticket_with_people(db, ticket.id)
     
     return ticket
 
@@ -524,7 +750,7 @@ def reassign_ticket(
     ),
 ):
     """Réassigner un ticket à un autre technicien"""
-    ticket = db.query(models.Ticket).filter(models.Ticket.id == ticket_id).first()
+    ticket = db.get(models.Ticket, ticket_id)
     if not ticket:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found"
@@ -538,7 +764,7 @@ def reassign_ticket(
         )
     
     # Vérifier que le technicien existe
-    technician = db.query(models.User).filter(models.User.id == assign_data.technician_id).first()
+    technician = db.get(models.User, assign_data.technician_id)
     if not technician:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Technician not found"
@@ -583,7 +809,7 @@ def reassign_ticket(
     db.add(notification)
     
     # Créer une notification pour l'ancien technicien
-    old_technician = db.query(models.User).filter(models.User.id == old_technician_id).first()
+    old_technician = db.get(models.User, old_technician_id) if old_technician_id else None
     if old_technician:
         old_notification = models.Notification(
             user_id=old_technician_id,
@@ -605,7 +831,7 @@ def reassign_ticket(
     db.add(creator_notification)
     
     # Récupérer le créateur pour l'email
-    creator = db.query(models.User).filter(models.User.id == ticket.creator_id).first()
+    creator = db.get(models.User, ticket.creator_id)
     old_technician_name = old_technician.full_name if old_technician else None
     
     db.commit()
@@ -614,7 +840,7 @@ def reassign_ticket(
     # Envoyer un email de notification au nouveau technicien en arrière-plan (asynchrone)
     if technician.email and technician.email.strip():
         background_tasks.add_task(
-            email_service.send_ticket_assigned_notification,
+            get_email_service().send_ticket_assigned_notification,
             ticket_id=str(ticket.id),
             ticket_number=ticket.number,
             ticket_title=ticket.title,
@@ -627,7 +853,7 @@ def reassign_ticket(
     # Envoyer un email au créateur pour le changement de technicien
     if creator and creator.email and creator.email.strip():
         background_tasks.add_task(
-            email_service.send_technician_changed_notification,
+            get_email_service().send_technician_changed_notification,
             ticket_id=str(ticket.id),
             ticket_number=ticket.number,
             ticket_title=ticket.title,
@@ -638,15 +864,7 @@ def reassign_ticket(
         )
     
     # Charger les relations pour la réponse
-    ticket = (
-        db.query(models.Ticket)
-        .options(
-            joinedload(models.Ticket.creator),
-            joinedload(models.Ticket.technician)
-        )
-        .filter(models.Ticket.id == ticket.id)
-        .first()
-    )
+    ticket = queries.get_ticket_with_people(db, ticket.id)
     
     return ticket
 
@@ -660,7 +878,7 @@ def escalate_ticket(
     ),
 ):
     """Escalader un ticket (augmenter la priorité)"""
-    ticket = db.query(models.Ticket).filter(models.Ticket.id == ticket_id).first()
+    ticket = db.get(models.Ticket, ticket_id)
     if not ticket:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found"
@@ -744,15 +962,7 @@ def escalate_ticket(
     db.refresh(ticket)
     
     # Charger les relations pour la réponse
-    ticket = (
-        db.query(models.Ticket)
-        .options(
-            joinedload(models.Ticket.creator),
-            joinedload(models.Ticket.technician)
-        )
-        .filter(models.Ticket.id == ticket.id)
-        .first()
-    )
+    ticket = queries.get_ticket_with_people(db, ticket.id)
     
     return ticket
 
@@ -766,15 +976,15 @@ def update_ticket_status(
     current_user: models.User = Depends(get_current_user),
 ):
     """Mettre à jour le statut d'un ticket"""
-    ticket = db.query(models.Ticket).filter(models.Ticket.id == ticket_id).first()
+    ticket = db.get(models.Ticket, ticket_id)
     if not ticket:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found"
         )
     
     # Récupérer le créateur pour les emails
-    creator = db.query(models.User).filter(models.User.id == ticket.creator_id).first()
-    technician = db.query(models.User).filter(models.User.id == ticket.technician_id).first() if ticket.technician_id else None
+    creator = db.get(models.User, ticket.creator_id)
+    technician = db.get(models.User, ticket.technician_id) if ticket.technician_id else None
     
     # Statut effectif à enregistrer (pour RESOLU → RETRAITE si le ticket a déjà été relancé)
     effective_new_status = status_update.status
@@ -815,7 +1025,7 @@ def update_ticket_status(
         # Envoyer un email au créateur
         if creator and creator.email and creator.email.strip():
             background_tasks.add_task(
-                email_service.send_ticket_resolved_notification,
+                get_email_service().send_ticket_resolved_notification,
                 ticket_id=str(ticket.id),
                 ticket_number=ticket.number,
                 ticket_title=ticket.title,
@@ -845,7 +1055,7 @@ def update_ticket_status(
         # Envoyer un email au créateur
         if creator and creator.email and creator.email.strip():
             background_tasks.add_task(
-                email_service.send_ticket_closed_notification_to_user,
+                get_email_service().send_ticket_closed_notification_to_user,
                 ticket_id=str(ticket.id),
                 ticket_number=ticket.number,
                 ticket_title=ticket.title,
@@ -884,7 +1094,7 @@ def update_ticket_status(
         # Envoyer un email au créateur
         if creator and creator.email and creator.email.strip() and technician:
             background_tasks.add_task(
-                email_service.send_ticket_in_progress_notification,
+                get_email_service().send_ticket_in_progress_notification,
                 ticket_id=str(ticket.id),
                 ticket_number=ticket.number,
                 ticket_title=ticket.title,
@@ -906,7 +1116,7 @@ def update_ticket_status(
         # Envoyer un email au créateur
         if creator and creator.email and creator.email.strip():
             background_tasks.add_task(
-                email_service.send_ticket_rejected_notification_to_user,
+                get_email_service().send_ticket_rejected_notification_to_user,
                 ticket_id=str(ticket.id),
                 ticket_number=ticket.number,
                 ticket_title=ticket.title,
@@ -935,15 +1145,7 @@ def update_ticket_status(
     db.refresh(ticket)
     
     # Charger les relations pour la réponse
-    ticket = (
-        db.query(models.Ticket)
-        .options(
-            joinedload(models.Ticket.creator),
-            joinedload(models.Ticket.technician)
-        )
-        .filter(models.Ticket.id == ticket.id)
-        .first()
-    )
+    ticket = queries.get_ticket_with_people(db, ticket.id)
     
     return ticket
 
@@ -957,7 +1159,7 @@ def add_comment(
     current_user: models.User = Depends(get_current_user),
 ):
     """Ajouter un commentaire à un ticket"""
-    ticket = db.query(models.Ticket).filter(models.Ticket.id == ticket_id).first()
+    ticket = db.get(models.Ticket, ticket_id)
     if not ticket:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found"
@@ -970,23 +1172,26 @@ def add_comment(
         type=comment_in.type,
     )
     db.add(comment)
-    # Inscrire l'ajout du commentaire dans l'historique du ticket (marquer (interne) pour filtrage créateur)
+    db.flush()  # Obtenir comment.id pour l'événement d'historique
+    # Inscrire l'ajout du commentaire dans l'historique du ticket : l'événement référence le commentaire
+    # (le texte n'est pas recopié, la visibilité interne est déterminée par comments.type)
     is_internal = comment_in.type == models.CommentType.TECHNIQUE
-    comment_reason = f"Commentaire (interne): {comment_in.content}" if is_internal else f"Commentaire: {comment_in.content}"
     history = models.TicketHistory(
         ticket_id=ticket_id,
         old_status=ticket.status,
         new_status=ticket.status,
         user_id=current_user.id,
-        reason=comment_reason,
+        event_type=models.HistoryEventType.COMMENTAIRE.value,
+        comment_id=comment.id,
     )
     db.add(history)
+    ticket.updated_at = datetime.utcnow()  # Activité sur le ticket : le signaler dans /tickets/changes
     db.commit()
     db.refresh(comment)
     
     # Si le commentaire n'est pas interne et n'est pas du créateur, notifier le créateur
     if not is_internal and ticket.creator_id != current_user.id:
-        creator = db.query(models.User).filter(models.User.id == ticket.creator_id).first()
+        creator = db.get(models.User, ticket.creator_id)
         if creator:
             # Créer une notification pour le créateur
             notification = models.Notification(
@@ -1002,7 +1207,7 @@ def add_comment(
             # Envoyer un email au créateur
             if creator.email and creator.email.strip():
                 background_tasks.add_task(
-                    email_service.send_comment_notification_to_user,
+                    get_email_service().send_comment_notification_to_user,
                     ticket_id=str(ticket.id),
                     ticket_number=ticket.number,
                     ticket_title=ticket.title,
@@ -1018,30 +1223,27 @@ def add_comment(
 @router.get("/{ticket_id}/comments", response_model=List[schemas.CommentRead])
 def get_ticket_comments(
     ticket_id: int,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=200, description="Nombre maximum de commentaires (pagination : pages du plus récent au plus ancien, chacune en ordre chronologique)"),
+    before: Optional[str] = Query(None, description="Curseur : en-tête X-Next-Cursor de la page reçue (ou id de son plus ancien commentaire)"),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    """Récupérer tous les commentaires d'un ticket"""
-    ticket = db.query(models.Ticket).filter(models.Ticket.id == ticket_id).first()
+    """Récupérer les commentaires d'un ticket (tous, ou par pages avec limit/before)"""
+    ticket = db.get(models.Ticket, ticket_id)
     if not ticket:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found"
         )
     
-    comments = (
-        db.query(models.Comment)
-        .options(joinedload(models.Comment.user))
-        .filter(models.Comment.ticket_id == ticket_id)
-        .order_by(models.Comment.created_at.asc())
-        .all()
-    )
     # Si le créateur du ticket consulte : masquer les commentaires internes (technique)
     # sauf pour DSI, Adjoint DSI, Secrétaire DSI, Technicien et Admin : ils voient tous les commentaires (y compris internes) dans la section Commentaires
-    if ticket.creator_id == current_user.id:
-        role = db.query(models.Role).filter(models.Role.id == current_user.role_id).first()
-        role_name = role.name if role else None
-        if role_name not in ("DSI", "Adjoint DSI", "Secrétaire DSI", "Technicien", "Admin"):
-            comments = [c for c in comments if c.type != models.CommentType.TECHNIQUE]
+    comments = _query_comments(
+        db, ticket_id, _hides_internal_comments(ticket, current_user), limit=limit, before=before
+    )
+    if limit is not None and len(comments) == limit:
+        # Page pleine : position du plus ancien commentaire, pour la page suivante
+        response.headers["X-Next-Cursor"] = _encode_cursor(comments[0].created_at, "comment", comments[0].id)
     return comments
 
 
@@ -1054,7 +1256,7 @@ def validate_ticket_resolution(
     current_user: models.User = Depends(get_current_user),
 ):
     """Valider ou rejeter la résolution d'un ticket (par le créateur du ticket)"""
-    ticket = db.query(models.Ticket).filter(models.Ticket.id == ticket_id).first()
+    ticket = db.get(models.Ticket, ticket_id)
     if not ticket:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found"
@@ -1083,7 +1285,7 @@ def validate_ticket_resolution(
         history_reason = "Validation utilisateur: Validé"
         
         # Récupérer le créateur pour l'email
-        creator = db.query(models.User).filter(models.User.id == ticket.creator_id).first()
+        creator = db.get(models.User, ticket.creator_id)
         
         # Créer une notification pour le créateur
         creator_notification = models.Notification(
@@ -1098,7 +1300,7 @@ def validate_ticket_resolution(
         # Envoyer un email au créateur
         if creator and creator.email and creator.email.strip():
             background_tasks.add_task(
-                email_service.send_ticket_closed_notification_to_user,
+                get_email_service().send_ticket_closed_notification_to_user,
                 ticket_id=str(ticket.id),
                 ticket_number=ticket.number,
                 ticket_title=ticket.title,
@@ -1142,11 +1344,11 @@ def validate_ticket_resolution(
                 read=False
             )
             db.add(notification)
-            technician = db.query(models.User).filter(models.User.id == ticket.technician_id).first()
+            technician = db.get(models.User, ticket.technician_id)
             if technician and technician.email and technician.email.strip():
                 # Envoyer l'email de rejet en arrière-plan pour ne pas bloquer la réponse API
                 background_tasks.add_task(
-                    email_service.send_ticket_rejected_notification,
+                    get_email_service().send_ticket_rejected_notification,
                     ticket_number=ticket.number,
                     ticket_title=ticket.title,
                     technician_email=technician.email,
@@ -1190,15 +1392,7 @@ def validate_ticket_resolution(
     db.refresh(ticket)
     
     # Charger les relations pour la réponse
-    ticket = (
-        db.query(models.Ticket)
-        .options(
-            joinedload(models.Ticket.creator),
-            joinedload(models.Ticket.technician)
-        )
-        .filter(models.Ticket.id == ticket.id)
-        .first()
-    )
+    ticket = queries.get_ticket_with_people(db, ticket.id)
     return ticket
 
 @router.put("/{ticket_id}/delegate-adjoint", response_model=schemas.TicketRead)
@@ -1209,12 +1403,12 @@ def delegate_to_adjoint(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(require_role("DSI")),
 ):
-    ticket = db.query(models.Ticket).filter(models.Ticket.id == ticket_id).first()
+    ticket = db.get(models.Ticket, ticket_id)
     if not ticket:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found"
         )
-    adjoint = db.query(models.User).filter(models.User.id == delegate_data.adjoint_id).first()
+    adjoint = db.get(models.User, delegate_data.adjoint_id)
     if not adjoint or not adjoint.role or adjoint.role.name != "Adjoint DSI":
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Adjoint DSI not found"
@@ -1248,7 +1442,7 @@ def delegate_to_adjoint(
     # Envoyer un email à l'adjoint DSI en arrière-plan
     if adjoint.email and adjoint.email.strip():
         background_tasks.add_task(
-            email_service.send_ticket_delegated_to_adjoint_notification,
+            get_email_service().send_ticket_delegated_to_adjoint_notification,
             ticket_id=str(ticket.id),
             ticket_number=ticket.number,
             ticket_title=ticket.title,
@@ -1259,15 +1453,7 @@ def delegate_to_adjoint(
         )
     
     db.refresh(ticket)
-    ticket = (
-        db.query(models.Ticket)
-        .options(
-            joinedload(models.Ticket.creator),
-            joinedload(models.Ticket.technician)
-        )
-        .filter(models.Ticket.id == ticket.id)
-        .first()
-    )
+    ticket = queries.get_ticket_with_people(db, ticket.id)
     return ticket
 
 
@@ -1278,7 +1464,7 @@ def accept_assignment(
     current_user: models.User = Depends(get_current_user),
 ):
     """Accepter une assignation de ticket"""
-    ticket = db.query(models.Ticket).filter(models.Ticket.id == ticket_id).first()
+    ticket = db.get(models.Ticket, ticket_id)
     if not ticket:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found"
@@ -1310,15 +1496,7 @@ def accept_assignment(
     db.commit()
     db.refresh(ticket)
     
-    ticket = (
-        db.query(models.Ticket)
-        .options(
-            joinedload(models.Ticket.creator),
-            joinedload(models.Ticket.technician)
-        )
-        .filter(models.Ticket.id == ticket.id)
-        .first()
-    )
+    ticket = queries.get_ticket_with_people(db, ticket.id)
     return ticket
 
 
@@ -1330,7 +1508,7 @@ def reject_assignment(
     reason: Optional[str] = Query(None),
 ):
     """Refuser une assignation de ticket (demande de réassignation)"""
-    ticket = db.query(models.Ticket).filter(models.Ticket.id == ticket_id).first()
+    ticket = db.get(models.Ticket, ticket_id)
     if not ticket:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found"
@@ -1378,15 +1556,7 @@ def reject_assignment(
     db.commit()
     db.refresh(ticket)
     
-    ticket = (
-        db.query(models.Ticket)
-        .options(
-            joinedload(models.Ticket.creator),
-            joinedload(models.Ticket.technician)
-        )
-        .filter(models.Ticket.id == ticket.id)
-        .first()
-    )
+    ticket = queries.get_ticket_with_people(db, ticket.id)
     return ticket
 
 
@@ -1398,7 +1568,7 @@ def submit_ticket_feedback(
     current_user: models.User = Depends(get_current_user),
 ):
     """Soumettre le feedback/satisfaction pour un ticket clôturé"""
-    ticket = db.query(models.Ticket).filter(models.Ticket.id == ticket_id).first()
+    ticket = db.get(models.Ticket, ticket_id)
     if not ticket:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found"
@@ -1433,15 +1603,7 @@ def submit_ticket_feedback(
     db.refresh(ticket)
     
     # Charger les relations pour la réponse
-    ticket = (
-        db.query(models.Ticket)
-        .options(
-            joinedload(models.Ticket.creator),
-            joinedload(models.Ticket.technician)
-        )
-        .filter(models.Ticket.id == ticket.id)
-        .first()
-    )
+    ticket = queries.get_ticket_with_people(db, ticket.id)
     return ticket
 
 
@@ -1453,7 +1615,7 @@ def reopen_ticket_by_user(
     current_user: models.User = Depends(get_current_user),
 ):
     """Permet à l'utilisateur créateur de réouvrir un ticket clôturé automatiquement (dans les 7 jours)"""
-    ticket = db.query(models.Ticket).filter(models.Ticket.id == ticket_id).first()
+    ticket = db.get(models.Ticket, ticket_id)
     if not ticket:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found"
@@ -1547,10 +1709,10 @@ def reopen_ticket_by_user(
     db.refresh(ticket)
     
     # Envoyer un email au créateur
-    creator = db.query(models.User).filter(models.User.id == ticket.creator_id).first()
+    creator = db.get(models.User, ticket.creator_id)
     if creator and creator.email and creator.email.strip():
         background_tasks.add_task(
-            email_service.send_ticket_reopened_notification,
+            get_email_service().send_ticket_reopened_notification,
             ticket_id=str(ticket.id),
             ticket_number=ticket.number,
             ticket_title=ticket.title,
@@ -1559,15 +1721,7 @@ def reopen_ticket_by_user(
         )
     
     # Charger les relations pour la réponse
-    ticket = (
-        db.query(models.Ticket)
-        .options(
-            joinedload(models.Ticket.creator),
-            joinedload(models.Ticket.technician)
-        )
-        .filter(models.Ticket.id == ticket.id)
-        .first()
-    )
+    ticket = queries.get_ticket_with_people(db, ticket.id)
     
     return ticket
 
@@ -1583,7 +1737,7 @@ def reopen_ticket(
     ),
 ):
     """Réouvrir un ticket rejeté et le réassigner à un technicien"""
-    ticket = db.query(models.Ticket).filter(models.Ticket.id == ticket_id).first()
+    ticket = db.get(models.Ticket, ticket_id)
     if not ticket:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found"
@@ -1597,7 +1751,7 @@ def reopen_ticket(
         )
     
     # Vérifier que le technicien existe
-    technician = db.query(models.User).filter(models.User.id == assign_data.technician_id).first()
+    technician = db.get(models.User, assign_data.technician_id)
     if not technician:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Technician not found"
@@ -1621,7 +1775,7 @@ def reopen_ticket(
     )
     db.add(history)
     # Récupérer le créateur pour l'email
-    creator = db.query(models.User).filter(models.User.id == ticket.creator_id).first()
+    creator = db.get(models.User, ticket.creator_id)
     
     if ticket.creator_id:
         creator_notification = models.Notification(
@@ -1639,7 +1793,7 @@ def reopen_ticket(
     # Envoyer un email au créateur
     if creator and creator.email and creator.email.strip():
         background_tasks.add_task(
-            email_service.send_ticket_reopened_notification,
+            get_email_service().send_ticket_reopened_notification,
             ticket_id=str(ticket.id),
             ticket_number=ticket.number,
             ticket_title=ticket.title,
@@ -1648,57 +1802,176 @@ def reopen_ticket(
         )
     
     # Charger les relations pour la réponse
-    ticket = (
-        db.query(models.Ticket)
-        .options(
-            joinedload(models.Ticket.creator),
-            joinedload(models.Ticket.technician)
-        )
-        .filter(models.Ticket.id == ticket.id)
-        .first()
-    )
+    ticket = queries.get_ticket_with_people(db, ticket.id)
     return ticket
 
 
 @router.get("/{ticket_id}/history", response_model=List[schemas.TicketHistoryRead])
 def get_ticket_history(
     ticket_id: int,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=200, description="Nombre maximum d'entrées (pagination)"),
+    before: Optional[str] = Query(None, description="Curseur : en-tête X-Next-Cursor de la page reçue (ou id de sa dernière entrée)"),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    """Récupérer l'historique d'un ticket"""
-    ticket = db.query(models.Ticket).filter(models.Ticket.id == ticket_id).first()
+    """Récupérer l'historique d'un ticket (du plus récent au plus ancien)"""
+    ticket = db.get(models.Ticket, ticket_id)
     if not ticket:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found"
         )
     
     # Vérifier les permissions : créateur, technicien assigné, ou agent/DSI
-    is_creator = ticket.creator_id == current_user.id
-    is_assigned_tech = ticket.technician_id == current_user.id
-    is_agent = current_user.role and current_user.role.name in ["Secrétaire DSI", "Adjoint DSI", "DSI", "Admin"]
+    _ensure_can_view_ticket(ticket, current_user)
     
-    if not (is_creator or is_assigned_tech or is_agent):
+    # Si le créateur consulte : masquer les entrées de commentaires internes, sauf pour DSI, Adjoint DSI, Secrétaire DSI, Technicien, Admin (ils voient tous les commentaires dans l'historique)
+    history = _query_history(
+        db, ticket_id, _hides_internal_comments(ticket, current_user), limit=limit, before=before
+    )
+    if limit is not None and len(history) == limit:
+        response.headers["X-Next-Cursor"] = _encode_cursor(history[-1].changed_at, "history", history[-1].id)
+    return history
+
+
+@router.get("/{ticket_id}/full", response_model=schemas.TicketFullRead)
+def get_ticket_full(
+    ticket_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Récupérer un ticket avec ses commentaires et son historique en un seul appel.
+    Équivalent de GET /{id}, /{id}/comments et /{id}/history, avec une seule vérification d'accès.
+
+    Nombre de requêtes fixe, quel que soit le nombre de commentaires ou d'entrées : ticket avec
+    créateur et technicien (jointures), commentaires avec leurs auteurs (jointure), historique
+    (une requête). Les autres relations du ticket ne sont jamais chargées à la volée (raiseload).
+    """
+    ticket = (
+        db.query(models.Ticket)
+        .options(
+            joinedload(models.Ticket.creator).joinedload(models.User.role),
+            joinedload(models.Ticket.technician).joinedload(models.User.role),
+            raiseload("*"),
+        )
+        .filter(models.Ticket.id == ticket_id)
+        .first()
+    )
+    if not ticket:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="Access denied"
+            status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found"
         )
-    
-    history = (
-        db.query(models.TicketHistory)
-        .options(joinedload(models.TicketHistory.user))
-        .filter(models.TicketHistory.ticket_id == ticket_id)
-        .order_by(models.TicketHistory.changed_at.desc())
-        .all()
+
+    _ensure_can_view_ticket(ticket, current_user)
+    hide_internal = _hides_internal_comments(ticket, current_user)
+
+    # Mêmes requêtes filtrées que les routes dédiées (visibilité appliquée en SQL)
+    comments = _query_comments(db, ticket_id, hide_internal)
+    return schemas.TicketFullRead(
+        ticket=schemas.TicketRead.model_validate(ticket),
+        comments=[schemas.CommentRead.model_validate(c) for c in comments],
+        history=_query_history(db, ticket_id, hide_internal),
     )
-    # Si le créateur consulte : masquer les entrées de commentaires internes, sauf pour DSI, Adjoint DSI, Secrétaire DSI, Technicien, Admin (ils voient tous les commentaires dans l'historique)
-    role = db.query(models.Role).filter(models.Role.id == current_user.role_id).first()
-    role_name = role.name if role else None
-    creator_sees_internal = is_creator and role_name in ("DSI", "Adjoint DSI", "Secrétaire DSI", "Technicien", "Admin")
-    if is_creator and not creator_sees_internal:
-        history = [h for h in history if not (h.reason and h.reason.startswith("Commentaire (interne):"))]
+
+
+@router.get("/{ticket_id}/timeline", response_model=schemas.TicketTimelineRead)
+def get_ticket_timeline(
+    ticket_id: int,
+    limit: int = Query(50, ge=1, le=200, description="Nombre maximum d'événements"),
+    before: Optional[str] = Query(None, description="Curseur : événements plus anciens que celui-ci (next_cursor)"),
+    since: Optional[str] = Query(None, description="Curseur (latest_cursor) ou date ISO : uniquement les événements plus récents"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Fil d'activité d'un ticket : commentaires et historique fusionnés côté serveur (UNION ALL).
+    Par défaut du plus récent au plus ancien (pagination avec before=) ; avec since=,
+    uniquement les nouveaux événements, du plus ancien au plus récent (polling).
+    """
+    ticket = db.get(models.Ticket, ticket_id)
+    if not ticket:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found"
+        )
+
+    _ensure_can_view_ticket(ticket, current_user)
+    hide_internal = _hides_internal_comments(ticket, current_user)
+
+    comments_query = select(
+        literal("commentaire").label("kind"),
+        models.Comment.id.label("id"),
+        models.Comment.created_at.label("created_at"),
+        models.Comment.user_id.label("user_id"),
+        models.Comment.content.label("content"),
+        models.Comment.type.label("comment_type"),
+        type_coerce(null(), models.TicketHistory.old_status.type).label("old_status"),
+        type_coerce(null(), models.TicketHistory.new_status.type).label("new_status"),
+    ).where(models.Comment.ticket_id == ticket_id)
+    if hide_internal:
+        comments_query = comments_query.where(models.Comment.type != models.CommentType.TECHNIQUE)
+
+    # Les événements "commentaire" de l'historique (y compris les anciennes copies textuelles)
+    # sont déjà représentés par la branche comments
+    reason = models.TicketHistory.reason
+    history_query = select(
+        literal("historique"),
+        models.TicketHistory.id,
+        models.TicketHistory.changed_at,
+        models.TicketHistory.user_id,
+        reason,
+        type_coerce(null(), models.Comment.type.type),
+        models.TicketHistory.old_status,
+        models.TicketHistory.new_status,
+    ).where(
+        models.TicketHistory.ticket_id == ticket_id,
+        models.TicketHistory.comment_id.is_(None),
+        models.TicketHistory.event_type != models.HistoryEventType.COMMENTAIRE.value,
+        or_(
+            reason.is_(None),
+            not_(or_(reason.startswith(INTERNAL_COMMENT_PREFIX), reason.startswith("Commentaire: "))),
+        ),
+    )
+
+    events = union_all(comments_query, history_query).subquery("events")
+    query = select(events, models.User.full_name.label("user_name")).outerjoin(
+        models.User, models.User.id == events.c.user_id
+    )
+    position = tuple_(events.c.created_at, events.c.kind, events.c.id)
+
+    if since:
+        if "|" in since:
+            query = query.where(position > tuple_(*_decode_cursor(since)))
+        else:
+            try:
+                query = query.where(events.c.created_at > datetime.fromisoformat(since))
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid since"
+                )
+        query = query.order_by(
+            events.c.created_at.asc(), events.c.kind.asc(), events.c.id.asc()
+        )
     else:
-        # Afficher "Commentaire: ..." sans "(interne)" pour une lecture plus claire
-        for h in history:
-            if h.reason and h.reason.startswith("Commentaire (interne):"):
-                h.reason = "Commentaire: " + h.reason[len("Commentaire (interne): "):]
-    return history
+        if before:
+            query = query.where(position < tuple_(*_decode_cursor(before)))
+        query = query.order_by(
+            events.c.created_at.desc(), events.c.kind.desc(), events.c.id.desc()
+        )
+
+    rows = db.execute(query.limit(limit)).mappings().all()
+    timeline = [
+        schemas.TimelineEvent(**row, cursor=_encode_cursor(row["created_at"], row["kind"], row["id"]))
+        for row in rows
+    ]
+
+    if since:
+        latest_cursor = timeline[-1].cursor if timeline else since
+        next_cursor = None
+    else:
+        latest_cursor = timeline[0].cursor if timeline else None
+        next_cursor = timeline[-1].cursor if len(timeline) == limit else None
+
+    return schemas.TicketTimelineRead(
+        events=timeline, next_cursor=next_cursor, latest_cursor=latest_cursor
+    )
@@ -5,12 +5,14 @@ from datetime import datetime
 
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from sqlalchemy import func
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
-from .. import models, schemas
+from .. import models, queries, schemas
 from ..database import get_db
+from ..read_replica import get_read_db
 from ..security import get_current_user, require_role, get_password_hash
-from ..email_service import email_service
+from ..email_service import get_email_service
+from ..serialization import ORJSONResponse, user_to_dict
 
 router = APIRouter()
 
@@ -24,7 +26,7 @@ class TechnicianWithWorkload(schemas.UserRead):
         from_attributes = True
 
 
-@router.get("/technicians", response_model=List[schemas.UserRead])
+@router.get("/technicians", response_model=List[TechnicianWithWorkload])
 def list_technicians(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(
@@ -32,12 +34,13 @@ def list_technicians(
     ),
 ):
     """Liste tous les techniciens avec leur charge de travail pour l'assignation de tickets"""
-    technician_role = db.query(models.Role).filter(models.Role.name == "Technicien").first()
+    technician_role = queries.get_role_by_name(db, "Technicien")
     if not technician_role:
         return []
     
     technicians = (
         db.query(models.User)
+        .options(joinedload(models.User.role))
         .filter(
             models.User.role_id == technician_role.id,
             models.User.actif == True
@@ -45,54 +48,41 @@ def list_technicians(
         .all()
     )
     
-    # Ajouter la charge de travail pour chaque technicien
-    result = []
-    for tech in technicians:
-        assigned_count = (
-            db.query(models.Ticket)
-            .filter(
-                models.Ticket.technician_id == tech.id,
-                models.Ticket.status.in_([
-                    models.TicketStatus.ASSIGNE_TECHNICIEN,
-                    models.TicketStatus.EN_COURS
-                ])
-            )
-            .count()
+    # Charge de travail de tous les techniciens en une seule requête
+    workloads = {
+        row.technician_id: row
+        for row in db.query(
+            models.Ticket.technician_id,
+            func.count(models.Ticket.id).label("assigned"),
+            func.count(models.Ticket.id)
+            .filter(models.Ticket.status == models.TicketStatus.EN_COURS)
+            .label("in_progress"),
         )
-        in_progress_count = (
-            db.query(models.Ticket)
-            .filter(
-                models.Ticket.technician_id == tech.id,
-                models.Ticket.status == models.TicketStatus.EN_COURS
-            )
-            .count()
+        .filter(
+            models.Ticket.technician_id.in_([tech.id for tech in technicians]),
+            models.Ticket.status.in_([
+                models.TicketStatus.ASSIGNE_TECHNICIEN,
+                models.TicketStatus.EN_COURS
+            ])
         )
-        
-        tech_dict = {
-            "id": tech.id,
-            "full_name": tech.full_name,
-            "email": tech.email,
-            "agency": tech.agency,
-            "phone": tech.phone,
-            "role": {
-                "id": tech.role.id,
-                "name": tech.role.name,
-                "description": tech.role.description,
-            },
-            "actif": tech.actif,
-            "specialization": tech.specialization,
-            "assigned_tickets_count": assigned_count,
-            "in_progress_tickets_count": in_progress_count,
-        }
+        .group_by(models.Ticket.technician_id)
+    }
+    
+    result = []
+    for tech in technicians:
+        workload = workloads.get(tech.id)
+        tech_dict = user_to_dict(tech)
+        tech_dict["assigned_tickets_count"] = workload.assigned if workload else 0
+        tech_dict["in_progress_tickets_count"] = workload.in_progress if workload else 0
         result.append(tech_dict)
     
-    return result
+    return ORJSONResponse(result)
 
 
 @router.get("/technicians/{technician_id}/stats")
 def get_technician_stats(
     technician_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(
         require_role("Secrétaire DSI", "Adjoint DSI", "DSI", "Admin")
     ),
@@ -283,7 +273,7 @@ def create_user(
         )
     
     # Vérifier que le rôle existe
-    role = db.query(models.Role).filter(models.Role.id == user_in.role_id).first()
+    role = db.get(models.Role, user_in.role_id)
     if not role:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -320,7 +310,7 @@ def create_user(
     # Envoyer automatiquement l'email avec les identifiants
     if user_in.email and user_in.email.strip():
         background_tasks.add_task(
-            email_service.send_user_credentials,
+            get_email_service().send_user_credentials,
             to_email=user_in.email.strip(),
             full_name=user_in.full_name,
             username=user_in.username,
@@ -337,27 +327,8 @@ def list_all_users(
     current_user: models.User = Depends(require_role("DSI", "Admin")),
 ):
     """Liste tous les utilisateurs (Admin uniquement)"""
-    users = db.query(models.User).all()
-    
-    result = []
-    for user in users:
-        user_dict = {
-            "id": user.id,
-            "full_name": user.full_name,
-            "email": user.email,
-            "agency": user.agency,
-            "phone": user.phone,
-            "role": {
-                "id": user.role.id,
-                "name": user.role.name,
-                "description": user.role.description
-            },
-            "actif": user.actif,
-            "specialization": user.specialization
-        }
-        result.append(user_dict)
-    
-    return result
+    users = db.query(models.User).options(joinedload(models.User.role)).all()
+    return ORJSONResponse([user_to_dict(user) for user in users])
 
 
 @router.get("/{user_id}", response_model=schemas.UserRead)
@@ -367,7 +338,7 @@ def get_user(
     current_user: models.User = Depends(require_role("DSI", "Admin")),
 ):
     """Récupérer un utilisateur par son ID"""
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = db.get(models.User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -384,7 +355,7 @@ def update_user(
     current_user: models.User = Depends(require_role("DSI", "Admin")),
 ):
     """Modifier un utilisateur"""
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = db.get(models.User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -422,7 +393,7 @@ def update_user(
         user.notes = user_update.notes
     if user_update.role_id is not None:
         # Vérifier que le rôle existe
-        role = db.query(models.Role).filter(models.Role.id == user_update.role_id).first()
+        role = db.get(models.Role, user_update.role_id)
         if not role:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -434,7 +405,7 @@ def update_user(
     db.refresh(user)
     
     # Charger le rôle pour la réponse
-    user.role = db.query(models.Role).filter(models.Role.id == user.role_id).first()
+    user.role = db.get(models.Role, user.role_id)
     
     return user
 
@@ -446,7 +417,7 @@ def delete_user(
     current_user: models.User = Depends(require_role("DSI", "Admin")),
 ):
     """Supprimer un utilisateur"""
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = db.get(models.User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -484,7 +455,7 @@ def reset_user_password(
     current_user: models.User = Depends(require_role("DSI", "Admin")),
 ):
     """Réinitialiser le mot de passe d'un utilisateur"""
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = db.get(models.User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1,13 +1,16 @@
 """
 Système de tâches planifiées pour les notifications et clôtures automatiques
 """
+import os
+import threading
 from datetime import datetime, timedelta
+from sqlalchemy import insert, text
 from sqlalchemy.orm import Session
 from typing import List
 
 from .database import SessionLocal
 from . import models
-from .email_service import email_service
+from .email_service import get_email_service
 
 
 def check_validation_reminders():
@@ -61,7 +64,7 @@ def check_validation_reminders():
             
             # Envoyer le premier rappel après 3 jours
             if days_since_resolution >= 3 and 1 not in reminder_numbers_sent:
-                creator = db.query(models.User).filter(models.User.id == ticket.creator_id).first()
+                creator = db.get(models.User, ticket.creator_id)
                 if creator and creator.email and creator.email.strip():
                     # Créer la notification
                     notification = models.Notification(
@@ -75,7 +78,7 @@ def check_validation_reminders():
                     db.commit()
                     
                     # Envoyer l'email
-                    email_service.send_validation_reminder(
+                    get_email_service().send_validation_reminder(
                         ticket_id=str(ticket.id),
                         ticket_number=ticket.number,
                         ticket_title=ticket.title,
@@ -87,7 +90,7 @@ def check_validation_reminders():
             
             # Envoyer le second rappel après 7 jours
             elif days_since_resolution >= 7 and 2 not in reminder_numbers_sent:
-                creator = db.query(models.User).filter(models.User.id == ticket.creator_id).first()
+                creator = db.get(models.User, ticket.creator_id)
                 if creator and creator.email and creator.email.strip():
                     # Créer la notification
                     notification = models.Notification(
@@ -101,7 +104,7 @@ def check_validation_reminders():
                     db.commit()
                     
                     # Envoyer l'email
-                    email_service.send_validation_reminder(
+                    get_email_service().send_validation_reminder(
                         ticket_id=str(ticket.id),
                         ticket_number=ticket.number,
                         ticket_title=ticket.title,
@@ -113,7 +116,7 @@ def check_validation_reminders():
             
             # Envoyer le troisième rappel après 10 jours
             elif days_since_resolution >= 10 and 3 not in reminder_numbers_sent:
-                creator = db.query(models.User).filter(models.User.id == ticket.creator_id).first()
+                creator = db.get(models.User, ticket.creator_id)
                 if creator and creator.email and creator.email.strip():
                     # Créer la notification
                     notification = models.Notification(
@@ -127,7 +130,7 @@ def check_validation_reminders():
                     db.commit()
                     
                     # Envoyer l'email
-                    email_service.send_validation_reminder(
+                    get_email_service().send_validation_reminder(
                         ticket_id=str(ticket.id),
                         ticket_number=ticket.number,
                         ticket_title=ticket.title,
@@ -193,10 +196,10 @@ def auto_close_unvalidated_tickets():
             db.add(notification)
             
             # Récupérer le créateur pour l'email
-            creator = db.query(models.User).filter(models.User.id == ticket.creator_id).first()
+            creator = db.get(models.User, ticket.creator_id)
             if creator and creator.email and creator.email.strip():
                 # Envoyer l'email
-                email_service.send_ticket_auto_closed_notification(
+                get_email_service().send_ticket_auto_closed_notification(
                     ticket_id=str(ticket.id),
                     ticket_number=ticket.number,
                     ticket_title=ticket.title,
@@ -225,6 +228,123 @@ def auto_close_unvalidated_tickets():
         db.close()
 
 
+# Fenêtres d'alerte d'expiration de garantie (en jours), ex: "30,60,90"
+WARRANTY_ALERT_WINDOWS_DAYS = sorted(
+    int(days) for days in os.getenv("WARRANTY_ALERT_WINDOWS_DAYS", "30,60,90").split(",") if days.strip()
+)
+# Nombre d'actifs cités dans le message d'une notification (les autres sont résumés)
+WARRANTY_ALERT_MAX_LISTED = 10
+WARRANTY_ALERT_ROLES = ("DSI", "Admin")
+
+
+def check_warranty_expirations():
+    """
+    Alerte les DSI / Admin des garanties d'actifs qui expirent bientôt.
+
+    - Seuls les actifs dont la garantie expire dans la plus grande fenêtre sont lus
+      (parcours de l'index partiel sur assets.date_de_fin_garantie, pas de tout l'inventaire).
+    - Chaque actif est alerté une seule fois par fenêtre et par date de fin de garantie
+      (table asset_warranty_alerts, INSERT ... ON CONFLICT DO NOTHING).
+    - Une notification par destinataire et par fenêtre, insérées en une seule requête.
+    """
+    if not WARRANTY_ALERT_WINDOWS_DAYS:
+        return
+
+    db: Session = SessionLocal()
+    try:
+        # Pour chaque actif : plus petite fenêtre atteinte. Seules les alertes nouvelles sont retournées.
+        new_alerts = db.execute(
+            text(
+                """
+                WITH due AS (
+                    SELECT
+                        a.id,
+                        a.nom,
+                        a.numero_de_serie,
+                        a.date_de_fin_garantie,
+                        (
+                            SELECT MIN(w)
+                            FROM unnest(CAST(:windows AS integer[])) AS w
+                            WHERE a.date_de_fin_garantie <= CURRENT_DATE + w
+                        ) AS window_days
+                    FROM assets a
+                    WHERE a.date_de_fin_garantie >= CURRENT_DATE
+                      AND a.date_de_fin_garantie <= CURRENT_DATE + CAST(:max_window AS integer)
+                ),
+                inserted AS (
+                    INSERT INTO asset_warranty_alerts (asset_id, window_days, warranty_end)
+                    SELECT id, window_days, date_de_fin_garantie FROM due
+                    ON CONFLICT (asset_id, window_days, warranty_end) DO NOTHING
+                    RETURNING asset_id, window_days
+                )
+                SELECT inserted.window_days, due.nom, due.numero_de_serie, due.date_de_fin_garantie
+                FROM inserted
+                JOIN due ON due.id = inserted.asset_id
+                ORDER BY inserted.window_days, due.date_de_fin_garantie, due.id
+                """
+            ),
+            {"windows": WARRANTY_ALERT_WINDOWS_DAYS, "max_window": WARRANTY_ALERT_WINDOWS_DAYS[-1]},
+        ).mappings().all()
+
+        if not new_alerts:
+            db.commit()
+            return
+
+        assets_by_window = {}
+        for alert in new_alerts:
+            assets_by_window.setdefault(alert["window_days"], []).append(alert)
+
+        messages = []
+        for window_days, assets in assets_by_window.items():
+            listed = ", ".join(
+                f"{a['nom']} ({a['numero_de_serie']}, {a['date_de_fin_garantie'].strftime('%d/%m/%Y')})"
+                for a in assets[:WARRANTY_ALERT_MAX_LISTED]
+            )
+            if len(assets) > WARRANTY_ALERT_MAX_LISTED:
+                listed += f" et {len(assets) - WARRANTY_ALERT_MAX_LISTED} autre(s)"
+            messages.append(
+                f"Garantie : {len(assets)} actif(s) dont la garantie expire dans les {window_days} jours : {listed}"
+            )
+
+        recipient_ids = [
+            user_id
+            for (user_id,) in db.query(models.User.id)
+            .join(models.Role)
+            .filter(models.Role.name.in_(WARRANTY_ALERT_ROLES), models.User.actif.is_(True))
+            .all()
+        ]
+
+        if recipient_ids:
+            now = datetime.utcnow()
+            db.execute(
+                insert(models.Notification),
+                [
+                    {
+                        "user_id": user_id,
+                        "type": models.NotificationType.GARANTIE_EXPIRATION,
+                        "ticket_id": None,
+                        "message": message,
+                        "read": False,
+                        "created_at": now,
+                    }
+                    for user_id in recipient_ids
+                    for message in messages
+                ],
+            )
+
+        db.commit()
+        print(
+            f"Garanties: {len(new_alerts)} actif(s) signalé(s), "
+            f"{len(recipient_ids) * len(messages)} notification(s) créée(s)"
+        )
+
+    except Exception as e:
+        print(f"Erreur lors de la vérification des garanties: {str(e)}")
+        db.rollback()
+    finally:
+        db.close()
+
+
 def run_scheduled_tasks():
     """
     Fonction principale pour exécuter toutes les tâches planifiées
@@ -238,3 +358,116 @@ def run_scheduled_tasks():
 
 
 
+
+
+# ---------------------------------------------------------------------------
+# Processus désigné pour exécuter les tâches planifiées
+# ---------------------------------------------------------------------------
+
+# false : aucune tâche planifiée dans ce processus (tests, benchmarks, workers secondaires)
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+# Clé du verrou consultatif PostgreSQL réservé au scheduler
+SCHEDULER_LOCK_KEY = 7_240_311
+# Période des tentatives de prise du verrou (workers sans tâches) et de vérification (détenteur)
+SCHEDULER_LOCK_RETRY_SECONDS = float(os.getenv("SCHEDULER_LOCK_RETRY_SECONDS", "30"))
+
+
+def acquire_scheduler_lock(engine):
+    """
+    Désigne le processus qui exécute les tâches planifiées lorsque plusieurs workers démarrent.
+
+    Le premier processus qui obtient le verrou consultatif le garde sur une connexion dédiée
+    jusqu'à son arrêt (le verrou est libéré par PostgreSQL si le processus meurt).
+    Retourne cette connexion, ou None si un autre processus détient déjà le verrou ou si la
+    base est inaccessible (pas de tâches dans ce processus : évite les emails en double).
+    """
+    try:
+        connection = engine.connect()
+    except Exception as e:
+        print(f"[SCHEDULER] Base inaccessible, tâches planifiées non démarrées : {e}")
+        return None
+    try:
+        locked = connection.execute(
+            text("SELECT pg_try_advisory_lock(:key)"), {"key": SCHEDULER_LOCK_KEY}
+        ).scalar()
+        # Valider la transaction implicite : le verrou de session reste acquis
+        connection.commit()
+    except Exception as e:
+        connection.close()
+        print(f"[SCHEDULER] Verrou non obtenu, tâches planifiées non démarrées : {e}")
+        return None
+    if not locked:
+        connection.close()
+        return None
+    return connection
+
+
+def holds_scheduler_lock(connection) -> bool:
+    """Vrai si la connexion est toujours ouverte et détient le verrou du scheduler."""
+    try:
+        held = connection.execute(
+            text(
+                "SELECT EXISTS (SELECT 1 FROM pg_locks WHERE locktype = 'advisory' "
+                "AND classid = 0 AND objid = :key AND objsubid = 1 "
+                "AND pid = pg_backend_pid() AND granted)"
+            ),
+            {"key": SCHEDULER_LOCK_KEY},
+        ).scalar()
+        connection.commit()
+        return bool(held)
+    except Exception:
+        return False
+
+
+class SchedulerElection:
+    """
+    Exécute les tâches planifiées dans un seul processus, y compris pendant les redémarrages.
+
+    Chaque worker lance ce thread au démarrage. Toutes les SCHEDULER_LOCK_RETRY_SECONDS
+    secondes, il tente de prendre le verrou. Il le prend notamment quand l'ancien détenteur
+    s'arrête : rechargement `kill -HUP`, remplacement du maître USR2 / QUIT, worker recyclé.
+    Le processus qui obtient le verrou démarre le scheduler (`start_scheduler()`), puis
+    vérifie à chaque période qu'il le détient toujours. Si la connexion du verrou est perdue,
+    il arrête le scheduler et se remet en attente : un autre worker prend le relais.
+    """
+
+    def __init__(self, engine, start_scheduler, retry_seconds: float = SCHEDULER_LOCK_RETRY_SECONDS):
+        self.engine = engine
+        self.start_scheduler = start_scheduler
+        self.retry_seconds = retry_seconds
+        self.connection = None
+        self.scheduler = None
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="scheduler-election", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            if self.connection is None:
+                self.connection = acquire_scheduler_lock(self.engine)
+                if self.connection is not None:
+                    self.scheduler = self.start_scheduler()
+                    print(f"[SCHEDULER] Tâches planifiées démarrées (processus {os.getpid()})")
+            elif not holds_scheduler_lock(self.connection):
+                print(f"[SCHEDULER] Verrou perdu, tâches planifiées arrêtées (processus {os.getpid()})")
+                self._release()
+            self._stopping.wait(self.retry_seconds)
+
+    def _release(self) -> None:
+        if self.scheduler is not None:
+            self.scheduler.shutdown(wait=False)
+            self.scheduler = None
+        if self.connection is not None:
+            try:
+                self.connection.close()  # Libère le verrou
+            except Exception:
+                pass
+            self.connection = None
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=15)
+        self._release()
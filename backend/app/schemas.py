@@ -1,5 +1,5 @@
 from datetime import datetime, date
-from typing import List, Optional, Any
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel
 
@@ -131,6 +131,7 @@ class TicketRead(TicketBase):
     assigned_at: Optional[datetime] = None
     resolved_at: Optional[datetime] = None
     closed_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
     # priority peut être None tant que le DSI/Adjoint DSI ne l'a pas définie
     priority: Optional[TicketPriority] = None
     # category est hérité de TicketBase
@@ -139,6 +140,24 @@ class TicketRead(TicketBase):
         from_attributes = True
 
 
+class TicketTombstoneRead(BaseModel):
+    """Ticket supprimé signalé par le flux de synchronisation"""
+    ticket_id: int
+    number: Optional[int] = None
+    deleted_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class TicketChangesRead(BaseModel):
+    """Réponse du flux de synchronisation incrémentale GET /tickets/changes"""
+    tickets: List[TicketRead] = []  # Tickets créés ou modifiés après le curseur
+    deleted: List[TicketTombstoneRead] = []  # Tickets supprimés après le curseur
+    next_cursor: Optional[str] = None  # À repasser dans since= au prochain appel
+    has_more: bool = False  # True si d'autres modifications restent à récupérer immédiatement
+
+
 class TicketTypeConfig(BaseModel):
     id: int
     code: str
@@ -304,12 +323,42 @@ class TicketHistoryRead(BaseModel):
     user_id: int
     reason: Optional[str] = None
     changed_at: datetime
+    event_type: Optional[str] = None  # "statut" ou "commentaire"
+    comment_id: Optional[int] = None  # Commentaire référencé pour les événements "commentaire"
     user: Optional[UserRead] = None
 
     class Config:
         from_attributes = True
 
 
+class TicketFullRead(BaseModel):
+    """Vue détaillée d'un ticket : ticket, commentaires et historique en un seul appel"""
+    ticket: TicketRead
+    comments: List[CommentRead] = []
+    history: List[TicketHistoryRead] = []
+
+
+class TimelineEvent(BaseModel):
+    """Événement du fil d'activité d'un ticket (commentaire ou entrée d'historique)"""
+    kind: str  # "commentaire" ou "historique"
+    id: int  # id du commentaire ou de l'entrée d'historique
+    created_at: datetime
+    user_id: int
+    user_name: Optional[str] = None
+    content: Optional[str] = None  # Texte du commentaire ou motif de l'historique
+    comment_type: Optional[CommentType] = None
+    old_status: Optional[TicketStatus] = None
+    new_status: Optional[TicketStatus] = None
+    cursor: str  # Position de l'événement, utilisable dans before= ou since=
+
+
+class TicketTimelineRead(BaseModel):
+    """Page du fil d'activité d'un ticket"""
+    events: List[TimelineEvent] = []
+    next_cursor: Optional[str] = None  # À passer dans before= pour charger les événements plus anciens
+    latest_cursor: Optional[str] = None  # À passer dans since= pour ne récupérer que les nouveaux événements
+
+
 class AssetBase(BaseModel):
     """Champs communs pour un actif (table assets)."""
 
@@ -348,19 +397,137 @@ class AssetCreate(AssetBase):
     pass
 
 
+class AssetUpdate(BaseModel):
+    """Payload de modification partielle d'un actif (PATCH) : seuls les champs envoyés sont modifiés."""
+
+    nom: Optional[str] = None
+    type: Optional[str] = None
+    numero_de_serie: Optional[str] = None
+    marque: Optional[str] = None
+    modele: Optional[str] = None
+    statut: Optional[str] = None
+
+    localisation: Optional[str] = None
+    departement: Optional[str] = None
+
+    date_d_achat: Optional[date] = None
+    date_de_fin_garantie: Optional[date] = None
+
+    prix_d_achat: Optional[float] = None
+    fournisseur: Optional[str] = None
+
+    assigned_to_user_id: Optional[int] = None
+    assigned_to_name: Optional[str] = None
+
+    notes: Optional[str] = None
+
+    specifications: Optional[Any] = None
+
+
 class AssetRead(AssetBase):
     """Schéma de lecture pour un actif complet."""
 
     id: int
     qr_code: Optional[str] = None
     created_at: datetime
-    updated_at: datetime
+    updated_at: Optional[datetime] = None
     created_by: Optional[int] = None
 
     class Config:
         from_attributes = True
 
 
+class AssetFacets(BaseModel):
+    """Nombre d'actifs par valeur, pour les filtres de l'inventaire."""
+
+    statut: Dict[str, int] = {}
+    type: Dict[str, int] = {}
+    departement: Dict[str, int] = {}
+
+
+class AssetSearchResult(BaseModel):
+    """Page de résultats de recherche d'actifs."""
+
+    items: List[AssetRead] = []
+    next_cursor: Optional[int] = None  # À passer dans before= pour la page suivante
+    total: Optional[int] = None  # Nombre total de résultats (première page uniquement)
+    facets: Optional[AssetFacets] = None  # Facettes (première page uniquement)
+
+
+class AssetHistoryRead(BaseModel):
+    """Entrée d'historique d'un actif (table asset_history)."""
+
+    id: int
+    asset_id: int
+    asset_nom: Optional[str] = None
+    asset_numero_de_serie: Optional[str] = None
+    action: str  # create, update, import_create, import_update
+    description: str
+    changes: Optional[Dict[str, Any]] = None  # {"champ": {"old": ..., "new": ...}}
+    performed_by: Optional[int] = None
+    performed_by_name: Optional[str] = None
+    ticket_id: Optional[int] = None
+    ticket_number: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class AssetStatsBucket(BaseModel):
+    """Agrégats d'actifs pour une valeur (statut, type ou département)."""
+
+    value: str
+    count: int
+    total_value: float  # Somme des prix d'achat
+    assigned: int  # Actifs assignés (utilisateur ou nom renseigné)
+
+
+class AssetWarrantyStats(BaseModel):
+    """Situation des garanties (fenêtres cumulées à partir d'aujourd'hui)."""
+
+    expired: int
+    expiring_30_days: int
+    expiring_60_days: int
+    expiring_90_days: int
+    without_warranty: int
+
+
+class AssetStats(BaseModel):
+    """Statistiques de l'inventaire (GET /assets/stats)."""
+
+    total: int
+    total_value: float
+    assigned: int
+    unassigned: int
+    assignment_rate: float  # Part des actifs assignés (0..1)
+    warranty: AssetWarrantyStats
+    by_statut: List[AssetStatsBucket] = []
+    by_type: List[AssetStatsBucket] = []
+    by_departement: List[AssetStatsBucket] = []
+    generated_at: datetime
+
+
+class AssetImportRowError(BaseModel):
+    """Ligne rejetée lors d'un import d'actifs."""
+
+    line: int  # Numéro de ligne dans le fichier (en-tête = ligne 1)
+    numero_de_serie: Optional[str] = None
+    errors: List[str] = []
+
+
+class AssetImportReport(BaseModel):
+    """Rapport d'import en masse d'actifs."""
+
+    total_rows: int
+    inserted: int
+    updated: int
+    unchanged: int = 0  # Actifs existants identiques au fichier (non réécrits)
+    rejected: int
+    dry_run: bool = False
+    errors: List[AssetImportRowError] = []
+
+
 class AssetTypeConfig(BaseModel):
     """Schéma de lecture pour un type d'actif (table asset_types)."""
 
@@ -0,0 +1,54 @@
+"""
+Outils pour les tests : borner le nombre de requêtes SQL exécutées par une route.
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.testing import assert_max_queries
+
+    def test_list_users(headers):
+        client = TestClient(app)
+        with assert_max_queries(5):
+            client.get("/users/", headers=headers)
+
+Tests unitaires : dossier tests/, lancés avec `python -m pytest` depuis backend/.
+
+Toutes les requêtes exécutées sur le moteur pendant le bloc sont comptées (y compris le
+`SELECT 1` de get_db), quel que soit le thread qui les exécute.
+"""
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .database import engine as default_engine
+from .query_counter import QueryStats
+
+
+@contextmanager
+def count_queries(engine: Optional[Engine] = None) -> Iterator[QueryStats]:
+    """Compte les requêtes SQL exécutées sur le moteur pendant le bloc."""
+    engine = engine or default_engine
+    stats = QueryStats()
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats.add(statement, 0.0)
+
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    try:
+        yield stats
+    finally:
+        event.remove(engine, "after_cursor_execute", after_cursor_execute)
+
+
+@contextmanager
+def assert_max_queries(maximum: int, engine: Optional[Engine] = None) -> Iterator[QueryStats]:
+    """Échoue (AssertionError) si le bloc exécute plus de `maximum` requêtes SQL."""
+    with count_queries(engine) as stats:
+        yield stats
+
+    if stats.queries > maximum:
+        lines = [f"{stats.queries} requêtes SQL exécutées (maximum attendu : {maximum})"]
+        for shape, count in stats.repeated_statements(threshold=2):
+            lines.append(f"  {count} x {shape[:300]}")
+        raise AssertionError("\n".join(lines))
@@ -0,0 +1,75 @@
+"""
+Taille transférée et coût CPU de la compression des réponses JSON, sans base de données.
+
+Usage (depuis backend/) :
+
+    python -m benchmarks.compression                      # listes de 100 et 10 000 tickets
+    python -m benchmarks.compression --tickets 500 50000 --link-mbps 1
+
+Pour chaque taille de liste (JSON produit par ticket_to_dict + orjson, comme /tickets/),
+mesure la taille, le ratio et le temps CPU de gzip et brotli à différents niveaux, ainsi que
+le temps de transfert estimé sur un lien lent (--link-mbps). Les niveaux utilisés par
+l'application sont signalés par « * » (COMPRESSION_GZIP_LEVEL, COMPRESSION_BROTLI_QUALITY).
+"""
+import argparse
+import gzip
+import sys
+import time
+
+import brotli
+
+from app.compression import COMPRESSION_BROTLI_QUALITY, COMPRESSION_GZIP_LEVEL
+from app.serialization import ORJSONResponse, ticket_to_dict
+
+from .serialization import build_tickets
+from .stats import percentile
+
+
+CODECS = [
+    ("gzip", level, lambda data, level=level: gzip.compress(data, compresslevel=level, mtime=0))
+    for level in (1, 6, 9)
+] + [
+    ("br", quality, lambda data, quality=quality: brotli.compress(data, quality=quality))
+    for quality in (1, 4, 6, 11)
+]
+
+
+def _cpu_ms(compress, body: bytes, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        started = time.process_time()
+        compress(body)
+        timings.append(time.process_time() - started)
+    return percentile(sorted(timings), 0.50) * 1000
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Taille et coût CPU de la compression des réponses JSON")
+    parser.add_argument("--tickets", type=int, nargs="+", default=[100, 10_000], help="Tailles de liste mesurées")
+    parser.add_argument("--runs", type=int, default=3, help="Répétitions mesurées par niveau")
+    parser.add_argument("--link-mbps", type=float, default=2.0, help="Débit du lien lent simulé (Mbit/s)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    bytes_per_second = args.link_mbps * 1_000_000 / 8
+    current = {("gzip", COMPRESSION_GZIP_LEVEL), ("br", COMPRESSION_BROTLI_QUALITY)}
+
+    for count in args.tickets:
+        tickets = build_tickets(count, args.seed)
+        body = ORJSONResponse([ticket_to_dict(ticket) for ticket in tickets]).body
+        print(f"\n{count} tickets ({len(body) / 1024:.0f} Ko de JSON), lien à {args.link_mbps:g} Mbit/s")
+        print(f"{'Encodage':<12}{'octets':>12}{'ratio':>8}{'CPU ms':>10}{'transfert ms':>14}")
+        print(f"{'identity':<12}{len(body):>12}{1:>8.1f}{0:>10.1f}{len(body) / bytes_per_second * 1000:>14.0f}")
+        for name, level, compress in CODECS:
+            size = len(compress(body))
+            cpu_ms = _cpu_ms(compress, body, args.runs)
+            label = f"{name}-{level}{' *' if (name, level) in current else ''}"
+            print(
+                f"{label:<12}{size:>12}{len(body) / size:>8.1f}{cpu_ms:>10.1f}"
+                f"{size / bytes_per_second * 1000:>14.0f}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
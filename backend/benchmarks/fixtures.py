@@ -0,0 +1,95 @@
+"""
+Sélection des comptes et des tickets utilisés par les scénarios.
+
+Les données proviennent de la base (générée par generate_synthetic_data.py) : on choisit
+les utilisateurs les plus chargés pour mesurer les cas les plus coûteux.
+"""
+import random
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.security import create_access_token
+
+
+@dataclass
+class Fixtures:
+    users: Dict[str, int] = field(default_factory=dict)  # rôle du scénario -> id utilisateur
+    ticket_ids: List[int] = field(default_factory=list)
+    assigned_ticket_ids: List[int] = field(default_factory=list)  # tickets du technicien "technician"
+
+    def headers(self, who: str) -> Dict[str, str]:
+        token = create_access_token({"sub": str(self.users[who])})
+        return {"Authorization": f"Bearer {token}"}
+
+
+def _first_user(db: Session, role_name: str) -> Optional[int]:
+    return db.execute(
+        text(
+            """
+            SELECT u.id FROM users u JOIN roles r ON r.id = u.role_id
+            WHERE r.name = :role AND u.actif IS NOT FALSE
+            ORDER BY u.id LIMIT 1
+            """
+        ),
+        {"role": role_name},
+    ).scalar()
+
+
+def load_fixtures(db: Session, sample_size: int, seed: int) -> Fixtures:
+    """Charge les comptes et un échantillon reproductible (seed) de tickets existants."""
+    fixtures = Fixtures()
+
+    for who, role_name in (("secretary", "Secrétaire DSI"), ("dsi", "DSI"), ("user", "Utilisateur")):
+        user_id = _first_user(db, role_name)
+        if user_id is None:
+            raise SystemExit(f"Aucun utilisateur actif avec le rôle « {role_name} » : générer les données d'abord.")
+        fixtures.users[who] = user_id
+
+    # Utilisateur ayant créé le plus de tickets (pire cas pour /tickets/me)
+    heavy_user = db.execute(
+        text("SELECT creator_id FROM tickets GROUP BY creator_id ORDER BY count(*) DESC LIMIT 1")
+    ).scalar()
+    fixtures.users["heavy_user"] = heavy_user or fixtures.users["user"]
+
+    # Destinataire ayant le plus de notifications (pire cas pour /notifications)
+    notified = db.execute(
+        text("SELECT user_id FROM notifications GROUP BY user_id ORDER BY count(*) DESC LIMIT 1")
+    ).scalar()
+    fixtures.users["notified"] = notified or fixtures.users["heavy_user"]
+
+    # Technicien ayant le plus de tickets assignés (scénario de changement de statut)
+    row = db.execute(
+        text(
+            """
+            SELECT technician_id, array_agg(id ORDER BY id) AS ids
+            FROM tickets
+            WHERE status = 'ASSIGNE_TECHNICIEN' AND technician_id IS NOT NULL
+            GROUP BY technician_id
+            ORDER BY count(*) DESC
+            LIMIT 1
+            """
+        )
+    ).first()
+    if row is not None:
+        fixtures.users["technician"] = row.technician_id
+        fixtures.assigned_ticket_ids = list(row.ids)
+    else:
+        technician = _first_user(db, "Technicien")
+        if technician is None:
+            raise SystemExit("Aucun technicien actif : générer les données d'abord.")
+        fixtures.users["technician"] = technician
+
+    # Échantillon reproductible d'identifiants de tickets existants
+    bounds = db.execute(text("SELECT min(id), max(id) FROM tickets")).first()
+    if bounds is None or bounds[0] is None:
+        raise SystemExit("Aucun ticket en base : générer les données d'abord.")
+    rng = random.Random(seed)
+    candidates = [rng.randint(bounds[0], bounds[1]) for _ in range(sample_size * 2)]
+    existing = set(
+        db.execute(text("SELECT id FROM tickets WHERE id = ANY(:ids)"), {"ids": candidates}).scalars()
+    )
+    fixtures.ticket_ids = [ticket_id for ticket_id in candidates if ticket_id in existing][:sample_size]
+    return fixtures
@@ -0,0 +1,256 @@
+"""
+Suite de benchmarks de l'API et des tâches planifiées.
+
+Usage (depuis backend/, base PostgreSQL locale peuplée par generate_synthetic_data.py) :
+
+    python -m benchmarks.run                               # API en processus, écritures annulées
+    python -m benchmarks.run --url http://localhost:8000 --concurrency 8
+    python -m benchmarks.run --baseline benchmarks/results/reference.json
+
+Les résultats (p50 / p95 / p99, débit) sont écrits en JSON dans benchmarks/results/.
+Avec --baseline, le code de sortie vaut 1 si une mesure régresse (voir stats.compare_results).
+Voir BENCHMARKS.md pour le détail de la méthode.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+
+# Aucun email pendant les mesures (lu à la construction du service email)
+os.environ["EMAIL_ENABLED"] = "false"
+
+from sqlalchemy import text  # noqa: E402
+
+from app.database import SessionLocal, engine  # noqa: E402
+
+from . import stats  # noqa: E402
+from .fixtures import Fixtures, load_fixtures  # noqa: E402
+from .scenarios import API_SCENARIOS, SCHEDULER_JOBS, ApiScenario  # noqa: E402
+
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+MAX_CONSECUTIVE_ERRORS = 5
+
+
+@contextmanager
+def rolled_back():
+    """
+    Exécute le bloc dans une transaction annulée à la fin.
+
+    Toutes les sessions SessionLocal (routes, tâches planifiées) utilisent la même connexion ;
+    leurs commit() ne libèrent qu'un SAVEPOINT et rien n'est conservé en base.
+    """
+    connection = engine.connect()
+    transaction = connection.begin()
+    SessionLocal.configure(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        yield
+    finally:
+        SessionLocal.configure(bind=engine, join_transaction_mode="conservative_savepoint")
+        transaction.rollback()
+        connection.close()
+
+
+# ---------------------------------------------------------------------------
+# Routes de l'API
+# ---------------------------------------------------------------------------
+
+def _run_scenario(send, scenario: ApiScenario, fixtures: Fixtures, iterations: int, warmup: int, concurrency: int) -> dict:
+    headers = fixtures.headers(scenario.who)
+    if scenario.max_iterations is not None:
+        iterations = min(iterations, scenario.max_iterations)
+        warmup = min(warmup, 1)
+
+    durations = []
+    status_codes: Counter = Counter()
+    errors = 0
+    consecutive_errors = 0
+
+    def timed(i):
+        method, path, body = scenario.build(fixtures, i)
+        started = time.perf_counter()
+        try:
+            status_code = send(method, path, headers, body)
+        except Exception as e:  # timeout, connexion refusée...
+            status_code = type(e).__name__
+        return status_code, time.perf_counter() - started
+
+    for i in range(warmup):
+        status_code, _ = timed(i)
+        if not (isinstance(status_code, int) and status_code < 400):
+            consecutive_errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for status_code, duration in executor.map(timed, range(warmup, warmup + iterations)):
+            status_codes[str(status_code)] += 1
+            if isinstance(status_code, int) and status_code < 400:
+                durations.append(duration)
+                consecutive_errors = 0
+            else:
+                errors += 1
+                consecutive_errors += 1
+            if consecutive_errors >= MAX_CONSECUTIVE_ERRORS:
+                print(f"  {scenario.name} : {consecutive_errors} erreurs consécutives, scénario interrompu")
+                executor.shutdown(wait=True, cancel_futures=True)
+                break
+    elapsed = time.perf_counter() - started
+    return stats.summarize(durations, errors, elapsed, dict(status_codes))
+
+
+def run_api_in_process(fixtures: Fixtures, selected, iterations: int, warmup: int) -> dict:
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    client = TestClient(app, raise_server_exceptions=False)
+
+    def send(method, path, headers, body):
+        return client.request(method, path, headers=headers, json=body).status_code
+
+    results = {}
+    for scenario in selected:
+        print(f"- {scenario.name}")
+        # Une transaction annulée par scénario : chacun part du même état de la base
+        with rolled_back():
+            results[scenario.name] = _run_scenario(send, scenario, fixtures, iterations, warmup, concurrency=1)
+    return results
+
+
+def run_api_live(url: str, fixtures: Fixtures, selected, iterations: int, warmup: int, concurrency: int, timeout: float) -> dict:
+    import httpx
+
+    results = {}
+    with httpx.Client(base_url=url.rstrip("/"), timeout=timeout) as client:
+
+        def send(method, path, headers, body):
+            return client.request(method, path, headers=headers, json=body).status_code
+
+        for scenario in selected:
+            print(f"- {scenario.name}")
+            results[scenario.name] = _run_scenario(send, scenario, fixtures, iterations, warmup, concurrency)
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Tâches planifiées
+# ---------------------------------------------------------------------------
+
+def run_scheduler_jobs(jobs, repetitions: int) -> dict:
+    results = {}
+    for name, job in jobs:
+        print(f"- {name}")
+        durations = []
+        errors = 0
+        for _ in range(repetitions):
+            # Chaque exécution repart du même état (les clôtures et notifications sont annulées)
+            with rolled_back():
+                started = time.perf_counter()
+                try:
+                    job()
+                    durations.append(time.perf_counter() - started)
+                except Exception as e:
+                    errors += 1
+                    print(f"  Erreur : {e}")
+        results[name] = stats.summarize(durations, errors, sum(durations))
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Point d'entrée
+# ---------------------------------------------------------------------------
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de l'API et des tâches planifiées")
+    parser.add_argument("--url", help="Mesurer un serveur démarré (ex: http://localhost:8000) ; les écritures sont conservées")
+    parser.add_argument("--concurrency", type=int, default=1, help="Requêtes simultanées (mode --url uniquement)")
+    parser.add_argument("--iterations", type=int, default=50, help="Requêtes mesurées par scénario")
+    parser.add_argument("--warmup", type=int, default=3, help="Requêtes de chauffe non mesurées par scénario")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Timeout HTTP en secondes (mode --url)")
+    parser.add_argument("--scheduler-runs", type=int, default=3, help="Exécutions de chaque tâche planifiée")
+    parser.add_argument("--only", nargs="+", metavar="NOM", help="Scénarios à exécuter (api et/ou tâches)")
+    parser.add_argument("--skip-api", action="store_true")
+    parser.add_argument("--skip-scheduler", action="store_true")
+    parser.add_argument("--seed", type=int, default=42, help="Graine du choix des tickets")
+    parser.add_argument("--output", help="Fichier de résultats (défaut : benchmarks/results/<date>.json)")
+    parser.add_argument("--baseline", help="Résultats de référence à comparer")
+    parser.add_argument("--threshold", type=float, default=0.20, help="Hausse du p95 tolérée (0.20 = +20 %%)")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="Hausse du p95 ignorée en dessous de ce seuil")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.concurrency > 1 and not args.url:
+        print("--concurrency n'est utilisé qu'avec --url (le mode en processus est séquentiel)")
+
+    db = SessionLocal()
+    try:
+        fixtures = load_fixtures(db, sample_size=max(args.iterations + args.warmup, 1), seed=args.seed)
+        counts = {
+            table: db.execute(text(f"SELECT count(*) FROM {table}")).scalar()
+            for table in ("users", "tickets", "notifications", "assets")
+        }
+    finally:
+        db.close()
+    print(f"Données : {counts}")
+
+    results = {
+        "metadata": stats.metadata(
+            mode="live" if args.url else "in_process",
+            url=args.url,
+            concurrency=args.concurrency if args.url else 1,
+            iterations=args.iterations,
+            warmup=args.warmup,
+            scheduler_runs=args.scheduler_runs,
+            dataset=counts,
+        ),
+        "api": {},
+        "scheduler": {},
+    }
+
+    if not args.skip_api:
+        print("Routes de l'API :")
+        selected = []
+        for scenario in API_SCENARIOS:
+            if args.only and scenario.name not in args.only:
+                continue
+            if not scenario.available(fixtures):
+                print(f"- {scenario.name} : ignoré (données absentes)")
+                continue
+            selected.append(scenario)
+        if args.url:
+            results["api"] = run_api_live(
+                args.url, fixtures, selected, args.iterations, args.warmup, args.concurrency, args.timeout
+            )
+        else:
+            results["api"] = run_api_in_process(fixtures, selected, args.iterations, args.warmup)
+
+    if not args.skip_scheduler and args.scheduler_runs > 0:
+        print("Tâches planifiées :")
+        jobs = [(name, job) for name, job in SCHEDULER_JOBS if not args.only or name in args.only]
+        results["scheduler"] = run_scheduler_jobs(jobs, args.scheduler_runs)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}.json")
+    stats.save_results(results, output)
+    print()
+    stats.print_table(results)
+    print(f"\nRésultats enregistrés dans {output}")
+
+    if args.baseline:
+        comparisons = stats.compare_results(results, stats.load_results(args.baseline), args.threshold, args.min_delta_ms)
+        print(f"\nComparaison avec {args.baseline} (p95, seuil +{args.threshold * 100:.0f} %) :")
+        stats.print_comparison(comparisons)
+        regressions = [item["name"] for item in comparisons if item["regression"]]
+        if regressions:
+            print(f"\n{len(regressions)} régression(s) : {', '.join(regressions)}")
+            return 1
+        print("\nAucune régression.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
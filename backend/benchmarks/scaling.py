@@ -0,0 +1,114 @@
+"""
+Débit de l'API selon le nombre de workers du serveur de production (serve.py).
+
+Usage (depuis backend/, base PostgreSQL locale peuplée par generate_synthetic_data.py) :
+
+    python -m benchmarks.scaling                             # 1, 2, 4... workers jusqu'au nombre de cœurs
+    python -m benchmarks.scaling --workers 1 2 4 8 --concurrency 32 --server uvicorn
+
+Pour chaque nombre de workers : démarrage de serve.py sur un port libre, puis suite de
+benchmarks en mode --url (scénarios en lecture seule par défaut : les écritures du mode live
+sont conservées), et arrêt du serveur. Le tableau final donne le débit (req/s) et le p95 de
+chaque scénario ; les résultats détaillés sont écrits dans benchmarks/results/.
+"""
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import httpx
+
+from . import run, stats
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+READ_ONLY_SCENARIOS = ["my_tickets", "ticket_detail", "notifications", "unread_count", "technician_stats"]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(url: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/docs", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise SystemExit(f"Serveur non prêt après {timeout:.0f} s ({url})")
+
+
+def _default_workers():
+    counts, workers = [], 1
+    while workers < (os.cpu_count() or 1):
+        counts.append(workers)
+        workers *= 2
+    return counts + [os.cpu_count() or 1]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Débit de l'API selon le nombre de workers")
+    parser.add_argument("--workers", type=int, nargs="+", default=_default_workers())
+    parser.add_argument("--server", choices=["gunicorn", "uvicorn"], help="Voir serve.py")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requêtes simultanées")
+    parser.add_argument("--iterations", type=int, default=400, help="Requêtes mesurées par scénario")
+    parser.add_argument("--only", nargs="+", default=READ_ONLY_SCENARIOS, metavar="NOM")
+    parser.add_argument("--startup-timeout", type=float, default=60.0)
+    args = parser.parse_args(argv)
+
+    stamp = f"{datetime.now():%Y%m%d-%H%M%S}"
+    table = {}
+    for workers in args.workers:
+        port = _free_port()
+        url = f"http://127.0.0.1:{port}"
+        command = [sys.executable, "serve.py", "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)]
+        if args.server:
+            command += ["--server", args.server]
+        print(f"\n=== {workers} worker(s) ===")
+        server = subprocess.Popen(
+            command,
+            cwd=BACKEND_DIR,
+            env={**os.environ, "SCHEDULER_ENABLED": "false", "EMAIL_ENABLED": "false"},
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            _wait_ready(url, args.startup_timeout)
+            output = os.path.join(run.RESULTS_DIR, f"{stamp}-scaling-{workers}w.json")
+            run.main([
+                "--url", url,
+                "--concurrency", str(args.concurrency),
+                "--iterations", str(args.iterations),
+                "--skip-scheduler",
+                "--only", *args.only,
+                "--output", output,
+            ])
+            table[workers] = stats.load_results(output)["api"]
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=60)
+
+    print(f"\nDébit (req/s) et p95 (ms), {args.concurrency} requêtes simultanées :")
+    print(f"{'Scénario':<20}" + "".join(f"{f'{workers} w':>18}" for workers in table))
+    for name in args.only:
+        cells = []
+        for workers, results in table.items():
+            result = results.get(name)
+            cells.append(
+                f"{result['throughput_rps']:>9.0f} /{result['p95_ms'] or 0:>6.0f}" if result else f"{'-':>16}"
+            )
+        print(f"{name:<20}" + "".join(f"{cell:>18}" for cell in cells))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
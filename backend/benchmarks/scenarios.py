@@ -0,0 +1,75 @@
+"""
+Scénarios mesurés : routes les plus sollicitées de l'API et tâches planifiées.
+"""
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+from app import scheduler
+
+from .fixtures import Fixtures
+
+
+# (méthode, chemin, corps JSON) de la i-ème requête du scénario
+RequestSpec = Tuple[str, str, Optional[dict]]
+
+
+@dataclass
+class ApiScenario:
+    name: str
+    who: str  # clé de Fixtures.users
+    build: Callable[[Fixtures, int], RequestSpec]
+    max_iterations: Optional[int] = None  # pour les routes non paginées, très coûteuses
+    requires: Optional[Callable[[Fixtures], bool]] = None
+
+    def available(self, fixtures: Fixtures) -> bool:
+        return self.requires is None or self.requires(fixtures)
+
+
+def _ticket_id(fixtures: Fixtures, i: int) -> int:
+    return fixtures.ticket_ids[i % len(fixtures.ticket_ids)]
+
+
+def _create_ticket(fixtures: Fixtures, i: int) -> RequestSpec:
+    body = {
+        "title": f"Benchmark {i}",
+        "description": "Ticket créé par la suite de benchmarks",
+        "type": "materiel",
+        "category": "Matériel",
+    }
+    return "POST", "/tickets/", body
+
+
+def _status_update(fixtures: Fixtures, i: int) -> RequestSpec:
+    ticket_id = fixtures.assigned_ticket_ids[i % len(fixtures.assigned_ticket_ids)]
+    return "PUT", f"/tickets/{ticket_id}/status", {"status": "en_cours"}
+
+
+API_SCENARIOS: List[ApiScenario] = [
+    # Liste complète (Secrétaire DSI) : non paginée, peut dépasser le statement_timeout sur un gros volume
+    ApiScenario("list_tickets", "secretary", lambda f, i: ("GET", "/tickets/", None), max_iterations=10),
+    ApiScenario("my_tickets", "heavy_user", lambda f, i: ("GET", "/tickets/me", None)),
+    ApiScenario(
+        "ticket_detail", "secretary", lambda f, i: ("GET", f"/tickets/{_ticket_id(f, i)}", None),
+        requires=lambda f: bool(f.ticket_ids),
+    ),
+    ApiScenario("create_ticket", "user", _create_ticket),
+    ApiScenario(
+        "status_update", "technician", _status_update,
+        requires=lambda f: bool(f.assigned_ticket_ids),
+    ),
+    ApiScenario("notifications", "notified", lambda f, i: ("GET", "/notifications/", None)),
+    ApiScenario("unread_count", "notified", lambda f, i: ("GET", "/notifications/unread/count", None)),
+    ApiScenario(
+        "technician_stats", "dsi",
+        lambda f, i: ("GET", f"/users/technicians/{f.users['technician']}/stats", None),
+    ),
+]
+
+
+# Tâches exécutées par APScheduler (app/main.py)
+SCHEDULER_JOBS: List[Tuple[str, Callable[[], None]]] = [
+    ("check_validation_reminders", scheduler.check_validation_reminders),
+    ("auto_close_unvalidated_tickets", scheduler.auto_close_unvalidated_tickets),
+    ("run_scheduled_tasks", scheduler.run_scheduled_tasks),
+    ("check_warranty_expirations", scheduler.check_warranty_expirations),
+]
@@ -0,0 +1,129 @@
+"""
+Coût CPU de la sérialisation d'une grosse liste de tickets, sans base de données.
+
+Usage (depuis backend/) :
+
+    python -m benchmarks.serialization                    # 10 000 tickets, 5 répétitions
+    python -m benchmarks.serialization --tickets 50000 --runs 3
+
+Compare, sur les mêmes objets ORM (créateur et technicien avec leur rôle chargés) :
+- pydantic + json : chemin FastAPI standard (validation List[TicketRead] depuis les
+  attributs, dump en mode JSON, puis JSONResponse de la bibliothèque standard) ;
+- ticket_to_dict + orjson : chemin direct de app/serialization.py.
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List
+
+from pydantic import TypeAdapter
+from starlette.responses import JSONResponse
+
+from app import models, schemas
+from app.serialization import ORJSONResponse, ticket_to_dict
+
+from .stats import percentile
+
+
+def build_tickets(count: int, seed: int) -> List[models.Ticket]:
+    """Tickets transitoires (non attachés à une session), avec des champs texte réalistes."""
+    rng = random.Random(seed)
+    roles = [
+        models.Role(id=role_id, name=name, description=f"Rôle {name}", permissions=None)
+        for role_id, name in ((1, "Utilisateur"), (2, "Technicien"))
+    ]
+    users = [
+        models.User(
+            id=user_id,
+            full_name=f"Utilisateur {user_id}",
+            email=f"user{user_id}@example.com",
+            agency=rng.choice(["Dakar", "Thiès", "Saint-Louis"]),
+            phone="+221 77 000 00 00",
+            actif=True,
+            must_change_password=False,
+            specialization=rng.choice([None, "materiel", "applicatif"]),
+            role_id=role.id,
+            role=role,
+        )
+        for user_id, role in ((i, roles[i % 2]) for i in range(1, 201))
+    ]
+    started = datetime(2026, 1, 1)
+    tickets = []
+    for i in range(1, count + 1):
+        creator = users[rng.randrange(0, len(users), 2)]
+        technician = users[rng.randrange(1, len(users), 2)] if rng.random() < 0.7 else None
+        created_at = started + timedelta(minutes=i * 7)
+        tickets.append(
+            models.Ticket(
+                id=i,
+                number=i,
+                title=f"Incident {i} : poste de travail indisponible",
+                description="Le poste ne démarre plus depuis ce matin. " * rng.randint(1, 6),
+                type=rng.choice(list(models.TicketType)),
+                priority=rng.choice([None, *models.TicketPriority]),
+                status=rng.choice(list(models.TicketStatus)),
+                category="Matériel",
+                creator_id=creator.id,
+                creator=creator,
+                technician_id=technician.id if technician else None,
+                technician=technician,
+                user_agency=creator.agency,
+                created_at=created_at,
+                updated_at=created_at + timedelta(hours=2),
+                assigned_at=created_at + timedelta(hours=1) if technician else None,
+            )
+        )
+    return tickets
+
+
+def _pydantic_json(tickets: List[models.Ticket]) -> bytes:
+    adapter = TypeAdapter(List[schemas.TicketRead])
+    content = adapter.dump_python(adapter.validate_python(tickets, from_attributes=True), mode="json")
+    return JSONResponse(content).body
+
+
+def _direct_orjson(tickets: List[models.Ticket]) -> bytes:
+    return ORJSONResponse([ticket_to_dict(ticket) for ticket in tickets]).body
+
+
+def measure(serialize: Callable[[List[models.Ticket]], bytes], tickets: List[models.Ticket], runs: int) -> dict:
+    serialize(tickets[:100])  # chauffe (construction des validateurs)
+    cpu_times, wall_times = [], []
+    for _ in range(runs):
+        cpu_started, wall_started = time.process_time(), time.perf_counter()
+        body = serialize(tickets)
+        cpu_times.append(time.process_time() - cpu_started)
+        wall_times.append(time.perf_counter() - wall_started)
+    cpu_times.sort()
+    return {
+        "cpu_p50_ms": round(percentile(cpu_times, 0.50) * 1000, 1),
+        "wall_p50_ms": round(percentile(sorted(wall_times), 0.50) * 1000, 1),
+        "bytes": len(body),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Coût CPU de la sérialisation des listes de tickets")
+    parser.add_argument("--tickets", type=int, default=10_000, help="Nombre de tickets de la réponse")
+    parser.add_argument("--runs", type=int, default=5, help="Répétitions mesurées")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    tickets = build_tickets(args.tickets, args.seed)
+    standard = measure(_pydantic_json, tickets, args.runs)
+    direct = measure(_direct_orjson, tickets, args.runs)
+
+    print(f"{args.tickets} tickets, médiane sur {args.runs} exécutions")
+    print(f"{'Chemin':<26}{'CPU ms':>10}{'total ms':>10}{'octets':>12}")
+    for name, result in (("pydantic + json", standard), ("ticket_to_dict + orjson", direct)):
+        print(f"{name:<26}{result['cpu_p50_ms']:>10.1f}{result['wall_p50_ms']:>10.1f}{result['bytes']:>12}")
+    saved = standard["cpu_p50_ms"] - direct["cpu_p50_ms"]
+    ratio = standard["cpu_p50_ms"] / direct["cpu_p50_ms"] if direct["cpu_p50_ms"] else float("inf")
+    print(f"\nCPU économisé par réponse : {saved:.1f} ms (x{ratio:.1f})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
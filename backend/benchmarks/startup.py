@@ -0,0 +1,76 @@
+"""
+Temps d'import de l'application (python -X importtime), sans base de données.
+
+Usage (depuis backend/) :
+
+    python -m benchmarks.startup                    # médiane sur 7 interpréteurs neufs
+    python -m benchmarks.startup --module app.scheduler --runs 15 --top 30
+
+Chaque exécution importe le module dans un nouvel interpréteur avec -X importtime ; le rapport
+donne la médiane du temps total et, pour les modules les plus coûteux, la médiane de leur temps
+cumulé (modules de l'application et dépendances lourdes).
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(module: str) -> Dict[str, int]:
+    """Temps cumulé (µs) de chaque module importé par `import module`, dans un interpréteur neuf."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "SCHEDULER_ENABLED": "false"},
+    )
+    if completed.returncode != 0:
+        raise SystemExit(completed.stderr.strip().splitlines()[-1])
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        try:
+            times[name.strip()] = int(cumulative)
+        except ValueError:  # en-tête du rapport
+            continue
+    return times
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Temps d'import de l'application")
+    parser.add_argument("--module", default="app.main", help="Module importé (défaut : app.main)")
+    parser.add_argument("--runs", type=int, default=7, help="Interpréteurs lancés")
+    parser.add_argument("--top", type=int, default=20, help="Modules affichés")
+    args = parser.parse_args(argv)
+
+    samples: Dict[str, List[int]] = defaultdict(list)
+    for _ in range(args.runs):
+        for name, cumulative in import_times(args.module).items():
+            samples[name].append(cumulative)
+
+    medians = {name: statistics.median(values) for name, values in samples.items() if len(values) == args.runs}
+    total = medians.get(args.module, 0)
+    print(f"import {args.module} : {total / 1000:.0f} ms (médiane sur {args.runs} exécutions)\n")
+    print(f"{'Module':<48}{'cumulé ms':>10}")
+    # Modules de premier niveau de l'application et dépendances : les sous-modules sont inclus dans le cumul
+    ranked = sorted(
+        (item for item in medians.items() if item[0] != args.module),
+        key=lambda item: item[1],
+        reverse=True,
+    )
+    for name, cumulative in ranked[: args.top]:
+        print(f"{name:<48}{cumulative / 1000:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""
+Coût Python par appel des requêtes ORM fréquentes : requête reconstruite à chaque appel
+(`db.query(...)`) contre requête construite une fois (app/queries.py, `db.get`).
+
+Usage (depuis backend/) :
+
+    python -m benchmarks.statements                  # préparation seule, sans base de données
+    python -m benchmarks.statements --db             # + exécution sur la base PostgreSQL configurée
+    python -m benchmarks.statements --db --calls 5000
+
+- Préparation : construction de la requête et calcul de sa clé de cache, c'est-à-dire le travail
+  fait avant de trouver le SQL compilé dans le cache du moteur. La requête ORM est convertie
+  comme le fait Query (`_statement_20`).
+- Exécution (--db) : appel complet dans une session, avec le temps CPU du processus Python
+  (`time.process_time` : le temps passé dans PostgreSQL n'est pas compté) et le temps écoulé.
+  L'utilisateur recherché par id est déjà dans la session, comme l'utilisateur connecté ou le
+  créateur d'un ticket chargé : `db.get` le renvoie sans requête SQL.
+"""
+import argparse
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+from sqlalchemy.orm import Session, joinedload
+
+from app import models, queries
+
+from .stats import percentile
+
+
+def _old_ticket_with_people(db: Session, ticket_id: int):
+    return (
+        db.query(models.Ticket)
+        .options(
+            joinedload(models.Ticket.creator).joinedload(models.User.role),
+            joinedload(models.Ticket.technician).joinedload(models.User.role)
+        )
+        .filter(models.Ticket.id == ticket_id)
+    )
+
+
+def _old_tickets_by_creator(db: Session, creator_id: int):
+    return (
+        db.query(models.Ticket)
+        .options(
+            joinedload(models.Ticket.creator).joinedload(models.User.role),
+            joinedload(models.Ticket.technician).joinedload(models.User.role)
+        )
+        .filter(models.Ticket.creator_id == creator_id)
+        .order_by(models.Ticket.created_at.desc())
+    )
+
+
+def _old_user_by_id(db: Session, user_id: int):
+    return db.query(models.User).filter(models.User.id == user_id)
+
+
+def _old_role_by_name(db: Session, name: str):
+    return db.query(models.Role).filter(models.Role.name == name)
+
+
+def _per_call_us(call: Callable[[], object], calls: int, clock=time.perf_counter) -> float:
+    """Médiane de 5 séries de `calls` appels, en microsecondes par appel."""
+    call()  # Compilation et mise en cache
+    series = []
+    for _ in range(5):
+        started = clock()
+        for _ in range(calls):
+            call()
+        series.append((clock() - started) / calls)
+    return percentile(sorted(series), 0.50) * 1_000_000
+
+
+def bench_preparation(calls: int) -> List[Tuple[str, float, float]]:
+    db = Session()  # Sans connexion : seules la construction et la clé de cache sont mesurées
+    cases = [
+        (
+            "ticket_with_people",
+            lambda: _old_ticket_with_people(db, 1).limit(1)._statement_20()._generate_cache_key(),
+            lambda: queries.TICKET_WITH_PEOPLE._generate_cache_key(),
+        ),
+        (
+            "tickets_by_creator",
+            lambda: _old_tickets_by_creator(db, 1)._statement_20()._generate_cache_key(),
+            lambda: queries.TICKETS_BY_CREATOR._generate_cache_key(),
+        ),
+        (
+            "role_by_name",
+            lambda: _old_role_by_name(db, "Technicien").limit(1)._statement_20()._generate_cache_key(),
+            lambda: queries.ROLE_BY_NAME._generate_cache_key(),
+        ),
+    ]
+    return [(name, _per_call_us(old, calls), _per_call_us(new, calls)) for name, old, new in cases]
+
+
+def bench_execution(calls: int) -> Dict[str, List[Tuple[str, float, float]]]:
+    from app.database import SessionLocal
+
+    from .fixtures import load_fixtures
+
+    db = SessionLocal()
+    try:
+        fixtures = load_fixtures(db, sample_size=1, seed=42)
+        ticket_id = fixtures.ticket_ids[0]
+        user_id = fixtures.users["user"]
+        db.get(models.User, user_id)  # Déjà en session, comme current_user
+        cases = [
+            (
+                "ticket_with_people",
+                lambda: _old_ticket_with_people(db, ticket_id).first(),
+                lambda: queries.get_ticket_with_people(db, ticket_id),
+            ),
+            (
+                "tickets_by_creator",
+                lambda: _old_tickets_by_creator(db, user_id).all(),
+                lambda: queries.list_tickets_created_by(db, user_id),
+            ),
+            (
+                "user_by_id",
+                lambda: _old_user_by_id(db, user_id).first(),
+                lambda: db.get(models.User, user_id),
+            ),
+            (
+                "role_by_name",
+                lambda: _old_role_by_name(db, "Technicien").first(),
+                lambda: queries.get_role_by_name(db, "Technicien"),
+            ),
+        ]
+        results = {}
+        for label, clock in (("CPU Python", time.process_time), ("temps écoulé", time.perf_counter)):
+            results[label] = [
+                (name, _per_call_us(old, calls, clock), _per_call_us(new, calls, clock))
+                for name, old, new in cases
+            ]
+        return results
+    finally:
+        db.rollback()
+        db.close()
+
+
+def _print_table(title: str, rows: List[Tuple[str, float, float]]) -> None:
+    print(f"\n{title} (µs par appel, médiane de 5 séries)")
+    print(f"{'Requête':<22}{'db.query':>12}{'préparée':>12}{'gain':>10}")
+    for name, old, new in rows:
+        print(f"{name:<22}{old:>12.1f}{new:>12.1f}{old - new:>10.1f}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Coût Python des requêtes ORM reconstruites ou préparées")
+    parser.add_argument("--calls", type=int, default=2000, help="Appels par série")
+    parser.add_argument("--db", action="store_true", help="Mesurer aussi l'exécution sur la base configurée")
+    args = parser.parse_args(argv)
+
+    _print_table("Préparation, sans base de données", bench_preparation(args.calls))
+    if args.db:
+        for label, rows in bench_execution(max(args.calls // 10, 50)).items():
+            _print_table(f"Exécution ({label})", rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
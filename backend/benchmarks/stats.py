@@ -0,0 +1,128 @@
+"""
+Statistiques des mesures et comparaison avec une référence (baseline).
+"""
+import json
+import math
+import os
+import platform
+import subprocess
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Percentile par rang le plus proche (valeurs déjà triées)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(durations: List[float], errors: int, elapsed: float, status_codes: Optional[Dict[str, int]] = None) -> dict:
+    """Résumé d'une série de mesures (durées en secondes, résultats en millisecondes)."""
+    values = sorted(durations)
+    count = len(values)
+    summary = {
+        "requests": count + errors,
+        "errors": errors,
+        "mean_ms": round(sum(values) / count * 1000, 2) if count else None,
+        "min_ms": round(values[0] * 1000, 2) if count else None,
+        "p50_ms": round(percentile(values, 0.50) * 1000, 2) if count else None,
+        "p95_ms": round(percentile(values, 0.95) * 1000, 2) if count else None,
+        "p99_ms": round(percentile(values, 0.99) * 1000, 2) if count else None,
+        "max_ms": round(values[-1] * 1000, 2) if count else None,
+        "throughput_rps": round(count / elapsed, 2) if elapsed > 0 and count else 0.0,
+    }
+    if status_codes is not None:
+        summary["status_codes"] = status_codes
+    return summary
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadata(**extra) -> dict:
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        **extra,
+    }
+
+
+def save_results(results: dict, path: str) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+
+
+def load_results(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare_results(current: dict, baseline: dict, threshold: float, min_delta_ms: float) -> List[dict]:
+    """
+    Compare les p95 de chaque mesure avec la référence.
+
+    Régression : p95 supérieur de plus de `threshold` (ex: 0.20 = +20 %) ET de plus de
+    `min_delta_ms` millisecondes (ignore le bruit sur les mesures très courtes).
+    Une mesure sans erreur dans la référence qui en produit maintenant est aussi une régression.
+    """
+    comparisons = []
+    for section in ("api", "scheduler"):
+        for name, stats in current.get(section, {}).items():
+            reference = baseline.get(section, {}).get(name)
+            if not reference:
+                continue
+            before, after = reference.get("p95_ms"), stats.get("p95_ms")
+            regression = False
+            change = None
+            if before and after:
+                change = (after - before) / before
+                regression = change > threshold and (after - before) > min_delta_ms
+            if stats.get("errors") and not reference.get("errors"):
+                regression = True
+            comparisons.append(
+                {
+                    "name": f"{section}.{name}",
+                    "baseline_p95_ms": before,
+                    "current_p95_ms": after,
+                    "change": round(change, 3) if change is not None else None,
+                    "regression": regression,
+                }
+            )
+    return comparisons
+
+
+def print_table(results: dict) -> None:
+    header = f"{'Mesure':<34}{'req':>6}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}"
+    print(header)
+    print("-" * len(header))
+    for section in ("api", "scheduler"):
+        for name, stats in results.get(section, {}).items():
+            def fmt(value):
+                return f"{value:.1f}" if value is not None else "-"
+
+            print(
+                f"{section + '.' + name:<34}{stats['requests']:>6}{stats['errors']:>5}"
+                f"{fmt(stats['p50_ms']):>10}{fmt(stats['p95_ms']):>10}{fmt(stats['p99_ms']):>10}"
+                f"{stats['throughput_rps']:>9.1f}"
+            )
+
+
+def print_comparison(comparisons: List[dict]) -> None:
+    for item in comparisons:
+        change = f"{item['change'] * 100:+.0f} %" if item["change"] is not None else "-"
+        flag = "  <- RÉGRESSION" if item["regression"] else ""
+        print(
+            f"{item['name']:<34}{item['baseline_p95_ms'] or '-':>10} -> {item['current_p95_ms'] or '-':>10} ms"
+            f"  ({change}){flag}"
+        )
@@ -0,0 +1,560 @@
+"""
+Génération de données synthétiques à l'échelle de la production (tests de performance)
+
+Crée des utilisateurs de tous les rôles répartis par agence, des tickets (1 000 000 par défaut)
+avec des répartitions réalistes de types, catégories, priorités et statuts selon leur ancienneté,
+leurs commentaires, leur historique et leurs notifications, ainsi que des actifs.
+
+Les lignes sont chargées par COPY, par lots de tickets, dans une seule transaction :
+en cas d'erreur rien n'est enregistré. Les séquences sont recalées et les tables analysées à la fin.
+
+Les utilisateurs générés ont un identifiant préfixé par `synth_` (mot de passe : synthetic123),
+les actifs un numéro de série préfixé par `SYN-`. --reset supprime toutes les données générées.
+
+Prérequis : tables, rôles, types et catégories de tickets créés (init_db.py et migrations).
+
+Usage:
+  python generate_synthetic_data.py [--users 5000] [--tickets 1000000] [--assets 50000] [--seed 42]
+  python generate_synthetic_data.py --reset
+"""
+import argparse
+import io
+import json
+import random
+import time
+from bisect import bisect
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+
+from sqlalchemy import text
+
+from app.database import SessionLocal
+from app.security import get_password_hash
+
+
+USERNAME_PREFIX = "synth_"
+EMAIL_DOMAIN = "synthetic.local"
+PASSWORD = "synthetic123"
+SERIAL_PREFIX = "SYN-"
+TICKET_BATCH_SIZE = 20000
+NULL = "\\N"  # Valeur NULL au format texte de COPY
+HISTORY_DAYS = 730
+
+AGENCIES = [
+    "Agence Paris", "Agence Lyon", "Agence Marseille", "Agence Lille", "Agence Bordeaux",
+    "Agence Nantes", "Agence Toulouse", "Agence Strasbourg", "Agence Rennes", "Agence Nice",
+    "Siège", "Agence IT",
+]
+FIRST_NAMES = [
+    "Jean", "Marie", "Pierre", "Sophie", "Luc", "Camille", "Nicolas", "Julie", "Thomas", "Claire",
+    "Antoine", "Emma", "Hugo", "Léa", "Louis", "Chloé", "Paul", "Manon", "Karim", "Fatou",
+    "Mamadou", "Aïcha", "Olivier", "Sarah", "David", "Inès", "Julien", "Laura", "Yann", "Nadia",
+]
+LAST_NAMES = [
+    "Martin", "Bernard", "Dubois", "Thomas", "Robert", "Richard", "Petit", "Durand", "Leroy",
+    "Moreau", "Simon", "Laurent", "Lefebvre", "Michel", "Garcia", "David", "Bertrand", "Roux",
+    "Vincent", "Fournier", "Morel", "Girard", "Diallo", "Traoré", "Mercier", "Blanc", "Guerin",
+]
+
+# Rôle -> part des utilisateurs (minimum un utilisateur par rôle)
+ROLE_SHARES = {
+    "Technicien": 0.03,
+    "Secrétaire DSI": 0.004,
+    "Adjoint DSI": 0.002,
+    "DSI": 0.001,
+    "Admin": 0.001,
+}
+
+TICKET_TYPES = ["MATERIEL", "APPLICATIF"]
+TICKET_TYPE_WEIGHTS = [55, 45]
+DEFAULT_CATEGORIES = {
+    "MATERIEL": ["Ordinateur portable", "Imprimante", "Écran/Moniteur", "Réseau (Switch, Routeur)", "Autre matériel"],
+    "APPLICATIF": ["Logiciel bureautique", "Application métier", "Email/Messagerie", "Autre applicatif"],
+}
+TITLES = [
+    "{category} : ne fonctionne plus",
+    "{category} : lenteurs importantes",
+    "{category} : message d'erreur au démarrage",
+    "{category} : demande d'installation",
+    "{category} : problème d'accès",
+    "{category} : panne intermittente",
+]
+DESCRIPTIONS = [
+    "Depuis ce matin, impossible de travailler normalement. Merci d'intervenir rapidement.",
+    "Le problème se reproduit plusieurs fois par jour depuis la semaine dernière.",
+    "Besoin d'une intervention, plusieurs collègues du service sont concernés.",
+    "Le redémarrage n'a rien changé. Capture d'écran disponible sur demande.",
+]
+COMMENTS_TECHNIQUE = [
+    "Diagnostic en cours, prise en main à distance effectuée.",
+    "Pièce commandée, intervention prévue dès réception.",
+    "Mise à jour appliquée, en attente de retour de l'utilisateur.",
+    "Problème reproduit, escaladé à l'éditeur.",
+]
+COMMENTS_UTILISATEUR = [
+    "Merci, le problème persiste encore ce matin.",
+    "Je suis disponible cet après-midi pour l'intervention.",
+    "C'est réglé de mon côté, merci !",
+    "Pouvez-vous me donner un délai ?",
+]
+
+PRIORITIES = ["FAIBLE", "MOYENNE", "HAUTE", "CRITIQUE"]
+PRIORITY_WEIGHTS = [25, 45, 22, 8]
+# Délai moyen de résolution (heures) selon la priorité
+RESOLUTION_HOURS = {"FAIBLE": 72, "MOYENNE": 36, "HAUTE": 12, "CRITIQUE": 4}
+
+# Statut final selon l'ancienneté du ticket : (âge maximum en jours, {statut: poids})
+STATUS_BY_AGE = [
+    (2, {"EN_ATTENTE_ANALYSE": 40, "ASSIGNE_TECHNICIEN": 30, "EN_COURS": 20, "RESOLU": 5, "REJETE": 5}),
+    (14, {"EN_ATTENTE_ANALYSE": 8, "ASSIGNE_TECHNICIEN": 15, "EN_COURS": 25, "RESOLU": 25,
+          "RETRAITE": 2, "REJETE": 5, "CLOTURE": 20}),
+    (None, {"EN_ATTENTE_ANALYSE": 1, "ASSIGNE_TECHNICIEN": 1, "EN_COURS": 2, "RESOLU": 3,
+            "RETRAITE": 2, "REJETE": 6, "CLOTURE": 85}),
+]
+# Heures d'ouverture des tickets (heures de bureau)
+CREATION_HOURS = list(range(7, 20))
+CREATION_HOUR_WEIGHTS = [2, 8, 12, 11, 9, 5, 6, 10, 9, 8, 6, 3, 1]
+
+ASSET_STATUSES = ["in_service", "en_stock", "en_maintenance", "en_panne", "reformes"]
+ASSET_STATUS_WEIGHTS = [75, 10, 5, 4, 6]
+ASSET_TYPES = ["desktop", "laptop", "printer", "monitor", "mobile", "tablet", "phone", "network"]
+ASSET_BRANDS = [("Dell", "Latitude 5440"), ("HP", "EliteBook 840"), ("Lenovo", "ThinkPad T14"),
+                ("Apple", "MacBook Air"), ("Brother", "HL-L5100"), ("Samsung", "Galaxy Tab S9"),
+                ("Cisco", "Catalyst 9200"), ("Yealink", "T46U")]
+
+
+class _Chooser:
+    """Tirage pondéré rapide (poids cumulés précalculés)."""
+
+    def __init__(self, rng: random.Random, values, weights):
+        self._rng = rng
+        self._values = list(values)
+        self._cumulative = list(accumulate(weights))
+        self._total = self._cumulative[-1]
+
+    def __call__(self):
+        return self._values[bisect(self._cumulative, self._rng.random() * self._total)]
+
+
+def _copy(cursor, table: str, columns: str, lines: list) -> None:
+    """Charge des lignes au format texte de COPY (colonnes séparées par des tabulations)."""
+    if lines:
+        cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN", io.StringIO("".join(lines)))
+
+
+def _next_id(db, table: str) -> int:
+    return db.execute(text(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}")).scalar()
+
+
+def _ts(value) -> str:
+    return value.isoformat(" ", "seconds") if value is not None else NULL
+
+
+# ---------------------------------------------------------------------------
+# Utilisateurs
+# ---------------------------------------------------------------------------
+
+def generate_users(db, cursor, rng: random.Random, count: int) -> dict:
+    """Crée les utilisateurs ; retourne les ids générés par rôle (et l'agence de chacun)."""
+    roles = dict(db.execute(text("SELECT name, id FROM roles")).all())
+    missing = [name for name in ["Utilisateur", *ROLE_SHARES] if name not in roles]
+    if missing:
+        raise RuntimeError(f"Rôles manquants : {', '.join(missing)}. Lancez d'abord init_db.py")
+
+    role_counts = {name: max(1, round(count * share)) for name, share in ROLE_SHARES.items()}
+    role_counts["Utilisateur"] = max(1, count - sum(role_counts.values()))
+
+    password_hash = get_password_hash(PASSWORD)  # Même hash pour tous : bcrypt est volontairement lent
+    user_id = _next_id(db, "users")
+    # Suffixe unique : plusieurs générations successives restent possibles
+    run = db.execute(text("SELECT COUNT(*) FROM users WHERE username LIKE :prefix"),
+                     {"prefix": f"{USERNAME_PREFIX}%"}).scalar()
+    created_at = datetime.utcnow() - timedelta(days=HISTORY_DAYS + 30)
+
+    users = {"agency": {}}
+    lines = []
+    for role_name, role_count in role_counts.items():
+        ids = users.setdefault(role_name, [])
+        for index in range(role_count):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            username = f"{USERNAME_PREFIX}{run + len(lines) + 1}"
+            agency = "Agence IT" if role_name != "Utilisateur" else rng.choice(AGENCIES)
+            specialization = NULL
+            if role_name == "Technicien":
+                specialization = "materiel" if index % 2 == 0 else "applicatif"
+            lines.append(
+                f"{user_id}\t{first} {last}\t{username}@{EMAIL_DOMAIN}\t{agency}\t"
+                f"0{rng.randint(100000000, 799999999)}\tt\t{specialization}\t{_ts(created_at)}\t"
+                f"{username}\t{password_hash}\tf\t{roles[role_name]}\n"
+            )
+            ids.append(user_id)
+            users["agency"][user_id] = agency
+            user_id += 1
+
+    _copy(cursor, "users",
+          "id, full_name, email, agency, phone, actif, specialization, created_at, "
+          "username, password_hash, must_change_password, role_id", lines)
+    for role_name, role_count in role_counts.items():
+        print(f"  {role_name}: {role_count}")
+    return users
+
+
+# ---------------------------------------------------------------------------
+# Tickets, commentaires, historique, notifications
+# ---------------------------------------------------------------------------
+
+def generate_tickets(db, cursor, rng: random.Random, users: dict, count: int) -> None:
+    now = datetime.utcnow()
+    categories = {ticket_type: [] for ticket_type in TICKET_TYPES}
+    for name, type_code in db.execute(text(
+        "SELECT c.name, upper(t.code) FROM ticket_categories c JOIN ticket_types t ON t.id = c.ticket_type_id "
+        "WHERE c.is_active"
+    )).all():
+        if type_code in categories:
+            categories[type_code].append(name)
+    for ticket_type, names in categories.items():
+        if not names:
+            categories[ticket_type] = DEFAULT_CATEGORIES[ticket_type]
+    priority_ids = {code.upper(): str(pid) for code, pid in db.execute(text("SELECT code, id FROM priorities")).all()}
+
+    creators = users["Utilisateur"]
+    agencies = users["agency"]
+    dispatchers = users["Secrétaire DSI"] + users["Adjoint DSI"]
+    technicians = users["Technicien"]
+    technicians_by_type = {"MATERIEL": technicians[0::2], "APPLICATIF": technicians[1::2] or technicians}
+
+    choose_type = _Chooser(rng, TICKET_TYPES, TICKET_TYPE_WEIGHTS)
+    choose_priority = _Chooser(rng, PRIORITIES, PRIORITY_WEIGHTS)
+    choose_hour = _Chooser(rng, CREATION_HOURS, CREATION_HOUR_WEIGHTS)
+    status_choosers = [(max_age, _Chooser(rng, weights.keys(), weights.values())) for max_age, weights in STATUS_BY_AGE]
+    choose_comment_count = _Chooser(rng, [0, 1, 2, 3, 4, 6], [30, 25, 20, 12, 8, 5])
+    choose_score = _Chooser(rng, [1, 2, 3, 4, 5], [3, 4, 13, 35, 45])
+
+    ticket_id = _next_id(db, "tickets")
+    number = db.execute(text("SELECT COALESCE(MAX(number), 0) + 1 FROM tickets")).scalar()
+    comment_id = _next_id(db, "comments")
+    history_id = _next_id(db, "ticket_history")
+    notification_id = _next_id(db, "notifications")
+    totals = {"comments": 0, "history": 0, "notifications": 0}
+    expovariate, random_value, choice = rng.expovariate, rng.random, rng.choice
+
+    def later(moment: datetime, mean_hours: float) -> datetime:
+        return min(moment + timedelta(hours=expovariate(1 / mean_hours)), now)
+
+    started = time.perf_counter()
+    for batch_start in range(0, count, TICKET_BATCH_SIZE):
+        tickets, comments, history, notifications = [], [], [], []
+
+        def notify(user_id, notification_type, message, moment):
+            nonlocal notification_id
+            # Les notifications de plus d'une semaine ont presque toutes été lues
+            read = random_value() < (0.97 if (now - moment).days > 7 else 0.4)
+            read_at = _ts(later(moment, 6)) if read else NULL
+            notifications.append(
+                f"{notification_id}\t{user_id}\t{notification_type}\t{ticket_id}\t{message}\t"
+                f"{'t' if read else 'f'}\t{_ts(moment)}\t{read_at}\n"
+            )
+            notification_id += 1
+
+        for _ in range(min(TICKET_BATCH_SIZE, count - batch_start)):
+            # Les tickets récents sont plus nombreux (croissance de l'activité)
+            age_days = int(HISTORY_DAYS * random_value() ** 1.4)
+            created = datetime.combine(now.date() - timedelta(days=age_days), datetime.min.time()) + timedelta(
+                hours=choose_hour(), minutes=rng.randrange(60), seconds=rng.randrange(60)
+            )
+            if created > now:
+                created = now - timedelta(minutes=rng.randrange(1, 600))
+            status = next(chooser for max_age, chooser in status_choosers if max_age is None or age_days < max_age)()
+
+            creator = choice(creators)
+            ticket_type = choose_type()
+            category = choice(categories[ticket_type])
+            title = choice(TITLES).format(category=category)
+
+            # Cycle de vie : (statut, date, auteur) depuis la création jusqu'au statut final
+            steps = [("EN_ATTENTE_ANALYSE", created, creator)]
+            priority = technician = secretary = None
+            assigned_at = resolved_at = closed_at = auto_closed_at = None
+            moment = created
+            if status != "EN_ATTENTE_ANALYSE":
+                secretary = choice(dispatchers)
+                moment = later(moment, 4)
+                if status == "REJETE":
+                    steps.append(("REJETE", moment, secretary))
+                else:
+                    priority = choose_priority()
+                    technician = choice(technicians_by_type[ticket_type])
+                    assigned_at = moment
+                    steps.append(("ASSIGNE_TECHNICIEN", moment, secretary))
+            if status in ("EN_COURS", "RESOLU", "RETRAITE", "CLOTURE"):
+                moment = later(moment, 6)
+                steps.append(("EN_COURS", moment, technician))
+            if status in ("RESOLU", "RETRAITE", "CLOTURE"):
+                moment = later(moment, RESOLUTION_HOURS[priority])
+                resolved_at = moment
+                steps.append(("RETRAITE" if status == "RETRAITE" else "RESOLU", moment, technician))
+            feedback = NULL
+            if status == "CLOTURE":
+                auto_closed = random_value() < 0.2
+                moment = min(moment + timedelta(days=14), now) if auto_closed else later(moment, 30)
+                closed_at = moment
+                auto_closed_at = moment if auto_closed else None
+                steps.append(("CLOTURE", moment, creator))
+                if not auto_closed and random_value() < 0.7:
+                    feedback = str(choose_score())
+
+            # Commentaires (et leur événement d'historique) pendant le traitement
+            events = []
+            if technician is not None:
+                for _ in range(choose_comment_count()):
+                    at = assigned_at + (moment - assigned_at) * random_value()
+                    internal = random_value() < 0.6
+                    author = technician if internal else creator
+                    content = choice(COMMENTS_TECHNIQUE if internal else COMMENTS_UTILISATEUR)
+                    comments.append(
+                        f"{comment_id}\t{ticket_id}\t{author}\t{content}\t"
+                        f"{'TECHNIQUE' if internal else 'UTILISATEUR'}\t{_ts(at)}\n"
+                    )
+                    events.append((at, author, comment_id))
+                    comment_id += 1
+
+            previous = None
+            for step_status, at, author in steps:
+                reason = "Clôture automatique après 14 jours sans validation" if step_status == "CLOTURE" and auto_closed_at else NULL
+                history.append(
+                    f"{history_id}\t{ticket_id}\t{previous or NULL}\t{step_status}\t{author}\t"
+                    f"{reason}\t{_ts(at)}\tstatut\t\\N\n"
+                )
+                history_id += 1
+                previous = step_status
+            for at, author, event_comment_id in events:
+                current = next(step for step, step_at, _ in reversed(steps) if step_at <= at)
+                history.append(
+                    f"{history_id}\t{ticket_id}\t{current}\t{current}\t{author}\t\\N\t{_ts(at)}\t"
+                    f"commentaire\t{event_comment_id}\n"
+                )
+                history_id += 1
+
+            ticket_number = number
+            notify(creator, "TICKET_CREE", f"Votre ticket #{ticket_number} a été créé avec succès: {title}", created)
+            if status == "REJETE":
+                notify(creator, "TICKET_REJETE", f"Votre ticket #{ticket_number} a été rejeté", steps[-1][1])
+            if technician is not None:
+                notify(technician, "ASSIGNATION", f"Le ticket #{ticket_number} vous a été assigné: {title}", assigned_at)
+                notify(creator, "TICKET_ASSIGNE", f"Votre ticket #{ticket_number} a été assigné à un technicien", assigned_at)
+            if resolved_at is not None:
+                notify(creator, "TICKET_RESOLU", f"Votre ticket #{ticket_number} a été résolu. Merci de valider la résolution.", resolved_at)
+            if closed_at is not None:
+                notify(technician, "CLOTURE_AUTOMATIQUE" if auto_closed_at else "TICKET_CLOTURE",
+                       f"Le ticket #{ticket_number} a été clôturé", closed_at)
+
+            updated_at = max(moment, events[-1][0]) if events else moment
+            tickets.append(
+                f"{ticket_id}\t{ticket_number}\t{title}\t{choice(DESCRIPTIONS)}\t{ticket_type}\t"
+                f"{priority or NULL}\t{priority_ids.get(priority, NULL)}\t{status}\t{category}\t"
+                f"{creator}\t{technician or NULL}\t{secretary or NULL}\t{agencies[creator]}\t"
+                f"{_ts(created)}\t{_ts(updated_at)}\t{_ts(assigned_at)}\t{_ts(resolved_at)}\t"
+                f"{_ts(closed_at)}\t{_ts(auto_closed_at)}\t{feedback}\n"
+            )
+            ticket_id += 1
+            number += 1
+
+        _copy(cursor, "tickets",
+              "id, number, title, description, type, priority, priority_id, status, category, creator_id, "
+              "technician_id, secretary_id, user_agency, created_at, updated_at, assigned_at, resolved_at, "
+              "closed_at, auto_closed_at, feedback_score", tickets)
+        _copy(cursor, "comments", "id, ticket_id, user_id, content, type, created_at", comments)
+        _copy(cursor, "ticket_history",
+              "id, ticket_id, old_status, new_status, user_id, reason, changed_at, event_type, comment_id", history)
+        _copy(cursor, "notifications", "id, user_id, type, ticket_id, message, read, created_at, read_at", notifications)
+        totals["comments"] += len(comments)
+        totals["history"] += len(history)
+        totals["notifications"] += len(notifications)
+
+        done = batch_start + len(tickets)
+        elapsed = time.perf_counter() - started
+        print(f"  {done}/{count} tickets ({done / elapsed:.0f} tickets/s)", end="\r", flush=True)
+
+    print()
+    print(f"  Commentaires : {totals['comments']}")
+    print(f"  Historique : {totals['history']}")
+    print(f"  Notifications : {totals['notifications']}")
+
+
+# ---------------------------------------------------------------------------
+# Actifs
+# ---------------------------------------------------------------------------
+
+def generate_assets(db, cursor, rng: random.Random, users: dict, count: int) -> None:
+    today = date.today()
+    asset_types = db.execute(text("SELECT code FROM asset_types WHERE is_active")).scalars().all() or ASSET_TYPES
+    departments = db.execute(text("SELECT name FROM departments WHERE is_active")).scalars().all() or AGENCIES
+    choose_status = _Chooser(rng, ASSET_STATUSES, ASSET_STATUS_WEIGHTS)
+    owners = users["Utilisateur"] + users["Technicien"]
+    admin = users["Admin"][0]
+    first_serial = db.execute(
+        text("SELECT COUNT(*) FROM assets WHERE numero_de_serie LIKE :prefix"), {"prefix": f"{SERIAL_PREFIX}%"}
+    ).scalar()
+
+    asset_id = _next_id(db, "assets")
+    history_id = _next_id(db, "asset_history")
+    assets, history = [], []
+    for index in range(count):
+        purchased = today - timedelta(days=rng.randrange(6 * 365))
+        warranty_end = purchased + timedelta(days=365 * rng.randint(1, 5))
+        status = choose_status()
+        owner = rng.choice(owners) if status == "in_service" and rng.random() < 0.8 else None
+        brand, model = rng.choice(ASSET_BRANDS)
+        asset_type = rng.choice(asset_types)
+        specifications = json.dumps({"ram_go": rng.choice([8, 16, 32])}) if asset_type in ("desktop", "laptop") else NULL
+        assets.append(
+            f"{asset_id}\t{asset_type.capitalize()} {brand} {index + 1}\t{asset_type}\t"
+            f"{SERIAL_PREFIX}{first_serial + index + 1:08d}\t{brand}\t{model}\t{status}\t{purchased}\t{warranty_end}\t"
+            f"{rng.randint(150, 2500)}.00\tFournisseur {rng.randint(1, 12)}\t"
+            f"Bâtiment {rng.choice('ABCD')} - Étage {rng.randint(0, 5)}\t{rng.choice(departments)}\t"
+            f"{owner or NULL}\t{specifications}\t{purchased} 09:00:00+00\t{admin}\n"
+        )
+        history.append(f"{history_id}\t{asset_id}\tcreate\tCréation de l'actif\t{admin}\t{purchased} 09:00:00+00\n")
+        asset_id += 1
+        history_id += 1
+
+    _copy(cursor, "assets",
+          "id, nom, type, numero_de_serie, marque, modele, statut, date_d_achat, date_de_fin_garantie, "
+          "prix_d_achat, fournisseur, localisation, departement, assigned_to_user_id, specifications, "
+          "created_at, created_by", assets)
+    _copy(cursor, "asset_history", "id, asset_id, action, description, performed_by, created_at", history)
+    print(f"  Actifs : {count}")
+
+
+# ---------------------------------------------------------------------------
+
+def _suspend_foreign_key_checks(db) -> bool:
+    """
+    Suspend les triggers (dont les contrôles de clés étrangères) jusqu'à la fin de la transaction,
+    si le rôle le permet (superutilisateur). Les chargements et suppressions sont alors bien plus rapides.
+    """
+    try:
+        with db.begin_nested():
+            db.execute(text("SET LOCAL session_replication_role = replica"))
+        print("Contrôles de clés étrangères suspendus pendant l'opération")
+        return True
+    except Exception:
+        print("Contrôles de clés étrangères actifs (rôle non superutilisateur) : opération plus lente")
+        return False
+
+
+SEQUENCE_TABLES = ["users", "tickets", "comments", "ticket_history", "notifications", "assets", "asset_history"]
+
+
+def generate(users_count: int, tickets_count: int, assets_count: int, seed: int) -> None:
+    rng = random.Random(seed)
+    db = SessionLocal()
+    try:
+        # Chargement long : pas de limite de durée, et validation asynchrone des écritures
+        db.execute(text("SET LOCAL statement_timeout = 0"))
+        db.execute(text("SET LOCAL synchronous_commit = off"))
+        # Données cohérentes par construction : contrôles de clés étrangères inutiles
+        _suspend_foreign_key_checks(db)
+        cursor = db.connection().connection.cursor()
+        started = time.perf_counter()
+
+        print(f"Utilisateurs ({users_count})...")
+        users = generate_users(db, cursor, rng, users_count)
+        print(f"Tickets ({tickets_count})...")
+        generate_tickets(db, cursor, rng, users, tickets_count)
+        print(f"Actifs ({assets_count})...")
+        generate_assets(db, cursor, rng, users, assets_count)
+
+        # Les ids ont été fixés explicitement : recaler les séquences
+        for table in SEQUENCE_TABLES:
+            db.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT COALESCE(MAX(id), 1) FROM {table}))"
+            ))
+        cursor.close()
+        db.commit()
+        print(f"OK - Données chargées en {time.perf_counter() - started:.0f}s")
+
+        # Statistiques du planificateur à jour pour les tests de performance
+        print("Analyse des tables...")
+        db.execute(text("SET LOCAL statement_timeout = 0"))
+        for table in SEQUENCE_TABLES:
+            db.execute(text(f"ANALYZE {table}"))
+        db.commit()
+        print(f"OK - Terminé en {time.perf_counter() - started:.0f}s")
+        print(f"Connexion : {USERNAME_PREFIX}<n> / {PASSWORD}")
+    except Exception as e:
+        db.rollback()
+        print(f"ERREUR lors de la génération: {e}")
+        raise
+    finally:
+        db.close()
+
+
+def reset() -> None:
+    """
+    Supprime les données générées : utilisateurs synth_*, leurs tickets et les actifs SYN-*.
+
+    Les triggers pouvant être suspendus (cascades comprises), toutes les références aux données
+    supprimées sont traitées explicitement : activité des utilisateurs générés sur d'autres tickets
+    supprimée, assignations d'autres tickets et actifs remises à NULL.
+    """
+    db = SessionLocal()
+    try:
+        db.execute(text("SET LOCAL statement_timeout = 0"))
+        _suspend_foreign_key_checks(db)
+        params = {"users": f"{USERNAME_PREFIX}%", "assets": f"{SERIAL_PREFIX}%"}
+        statements = [
+            ("CREATE TEMP TABLE synthetic_users ON COMMIT DROP AS "
+             "SELECT id FROM users WHERE username LIKE :users", None),
+            ("CREATE TEMP TABLE synthetic_tickets ON COMMIT DROP AS "
+             "SELECT id FROM tickets WHERE creator_id IN (SELECT id FROM synthetic_users)", None),
+            ("CREATE TEMP TABLE synthetic_assets ON COMMIT DROP AS "
+             "SELECT id FROM assets WHERE numero_de_serie LIKE :assets", None),
+            ("CREATE TEMP TABLE synthetic_comments ON COMMIT DROP AS "
+             "SELECT id FROM comments WHERE ticket_id IN (SELECT id FROM synthetic_tickets) "
+             "OR user_id IN (SELECT id FROM synthetic_users)", None),
+            ("DELETE FROM notifications WHERE ticket_id IN (SELECT id FROM synthetic_tickets) "
+             "OR user_id IN (SELECT id FROM synthetic_users)", "Notifications"),
+            ("DELETE FROM ticket_history WHERE ticket_id IN (SELECT id FROM synthetic_tickets) "
+             "OR user_id IN (SELECT id FROM synthetic_users) "
+             "OR comment_id IN (SELECT id FROM synthetic_comments)", "Historique"),
+            ("DELETE FROM comments WHERE id IN (SELECT id FROM synthetic_comments)", "Commentaires"),
+            ("DELETE FROM asset_history WHERE asset_id IN (SELECT id FROM synthetic_assets) "
+             "OR performed_by IN (SELECT id FROM synthetic_users)", None),
+            ("UPDATE asset_history SET ticket_id = NULL WHERE ticket_id IN (SELECT id FROM synthetic_tickets)", None),
+            ("DELETE FROM asset_warranty_alerts WHERE asset_id IN (SELECT id FROM synthetic_assets)", None),
+            ("DELETE FROM assets WHERE id IN (SELECT id FROM synthetic_assets)", "Actifs"),
+            ("UPDATE assets SET assigned_to_user_id = NULL WHERE assigned_to_user_id IN (SELECT id FROM synthetic_users)", None),
+            ("UPDATE assets SET created_by = NULL WHERE created_by IN (SELECT id FROM synthetic_users)", None),
+            ("DELETE FROM tickets WHERE id IN (SELECT id FROM synthetic_tickets)", "Tickets"),
+            ("UPDATE tickets SET technician_id = NULL WHERE technician_id IN (SELECT id FROM synthetic_users)", None),
+            ("UPDATE tickets SET secretary_id = NULL WHERE secretary_id IN (SELECT id FROM synthetic_users)", None),
+            ("DELETE FROM reports WHERE creator_id IN (SELECT id FROM synthetic_users)", None),
+            ("DELETE FROM users WHERE id IN (SELECT id FROM synthetic_users)", "Utilisateurs"),
+        ]
+        for statement, label in statements:
+            result = db.execute(text(statement), params)
+            if label:
+                print(f"  {label} : {result.rowcount} ligne(s) supprimée(s)")
+        db.commit()
+        print("OK - Données synthétiques supprimées")
+    except Exception as e:
+        db.rollback()
+        print(f"ERREUR lors de la suppression: {e}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Génère des données synthétiques pour les tests de performance")
+    parser.add_argument("--users", type=int, default=5000, help="Nombre d'utilisateurs (tous rôles)")
+    parser.add_argument("--tickets", type=int, default=1_000_000, help="Nombre de tickets")
+    parser.add_argument("--assets", type=int, default=50_000, help="Nombre d'actifs")
+    parser.add_argument("--seed", type=int, default=42, help="Graine aléatoire (données reproductibles)")
+    parser.add_argument("--reset", action="store_true", help="Supprimer les données générées")
+    args = parser.parse_args()
+
+    if args.reset:
+        reset()
+    else:
+        generate(args.users, args.tickets, args.assets, args.seed)
@@ -0,0 +1,63 @@
+"""
+Script d'import en masse des actifs (CSV / XLSX)
+
+Même traitement que la route POST /assets/import (voir app/asset_import.py) :
+les actifs dont le n° de série existe déjà sont mis à jour, les autres sont créés,
+les lignes invalides sont listées avec leur numéro de ligne.
+
+Usage:
+  python import_assets.py <fichier.csv|fichier.xlsx> [username] [--dry-run]
+
+  username  : utilisateur renseigné dans created_by (optionnel)
+  --dry-run : valide le fichier sans rien enregistrer
+"""
+import sys
+import time
+
+from app.asset_import import AssetImportError, import_assets
+from app.database import SessionLocal
+from app import models
+
+
+def run_import(path: str, username: str = None, dry_run: bool = False) -> None:
+    db = SessionLocal()
+    try:
+        created_by = None
+        if username:
+            user = db.query(models.User).filter(models.User.username == username).first()
+            if not user:
+                print(f"ERREUR - Utilisateur '{username}' introuvable")
+                return
+            created_by = user.id
+
+        print(f"Import de '{path}'{' (simulation)' if dry_run else ''}...")
+        started = time.perf_counter()
+        with open(path, "rb") as fileobj:
+            report = import_assets(db, fileobj, path, created_by=created_by, dry_run=dry_run)
+        elapsed = time.perf_counter() - started
+
+        print(f"OK - {report['total_rows']} ligne(s) lue(s) en {elapsed:.1f}s")
+        print(f"  Créés      : {report['inserted']}")
+        print(f"  Mis à jour : {report['updated']}")
+        print(f"  Inchangés  : {report['unchanged']}")
+        print(f"  Rejetés    : {report['rejected']}")
+        for error in report["errors"]:
+            serial = f" ({error['numero_de_serie']})" if error["numero_de_serie"] else ""
+            print(f"  Ligne {error['line']}{serial} : {'; '.join(error['errors'])}")
+
+    except AssetImportError as e:
+        print(f"ERREUR - Fichier rejeté : {e}")
+    except Exception as e:
+        db.rollback()
+        print(f"ERREUR lors de l'import: {e}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if a != "--dry-run"]
+    if not args:
+        print("Usage:")
+        print("  python import_assets.py <fichier.csv|fichier.xlsx> [username] [--dry-run]")
+    else:
+        run_import(args[0], args[1] if len(args) > 1 else None, dry_run="--dry-run" in sys.argv)
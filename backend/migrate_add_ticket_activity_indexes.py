@@ -0,0 +1,39 @@
+"""
+Script de migration : ajoute les index de pagination des commentaires et de l'historique
+
+- comments (ticket_id, created_at, id)
+- ticket_history (ticket_id, changed_at, id)
+
+Ces index permettent de charger les commentaires / l'historique d'un ticket par pages
+(curseur `before=`) sans parcourir toutes les lignes du ticket.
+Migration NON destructive : les index sont créés s'ils n'existent pas (CONCURRENTLY, sans bloquer les écritures).
+"""
+from app.database import create_index_concurrently, migration_connection
+
+
+INDEXES = [
+    ("ix_comments_ticket_created", "comments", "ticket_id, created_at, id"),
+    ("ix_ticket_history_ticket_changed", "ticket_history", "ticket_id, changed_at, id"),
+]
+
+
+def migrate_database():
+    """Crée les index de pagination s'ils n'existent pas"""
+    try:
+        print("Début de la migration...")
+
+        # CREATE INDEX CONCURRENTLY ne peut pas s'exécuter dans une transaction
+        with migration_connection(autocommit=True) as conn:
+            for index_name, table_name, columns in INDEXES:
+                print(f"Création de l'index '{index_name}' sur '{table_name}' ({columns})...")
+                create_index_concurrently(conn, index_name, f"ON {table_name} ({columns})")
+                print(f"OK - Index '{index_name}' disponible")
+
+        print("\nMigration terminée avec succès !")
+
+    except Exception as e:
+        print(f"ERREUR lors de la migration: {e}")
+
+
+if __name__ == "__main__":
+    migrate_database()
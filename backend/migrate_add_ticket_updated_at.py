@@ -0,0 +1,120 @@
+"""
+Script de migration : synchronisation incrémentale des tickets
+
+- Ajoute la colonne tickets.updated_at (remplie à partir de la date la plus récente connue
+  du ticket : création, assignation, résolution, clôture, historique), NOT NULL + index (updated_at, id).
+- Crée la table ticket_tombstones (tickets supprimés) utilisée par GET /tickets/changes.
+
+Migration NON destructive : aucune donnée existante n'est supprimée. Le remplissage est fait par lots.
+"""
+from sqlalchemy import text
+from app.database import create_index_concurrently, migration_connection
+
+BATCH_SIZE = 5000
+
+
+def column_exists(conn, table_name: str, column_name: str) -> bool:
+    """Vérifie si une colonne existe déjà dans une table."""
+    result = conn.execute(
+        text(
+            """
+            SELECT 1
+            FROM information_schema.columns
+            WHERE table_name = :table_name AND column_name = :column_name
+            """
+        ),
+        {"table_name": table_name, "column_name": column_name},
+    )
+    return result.first() is not None
+
+
+def table_exists(conn, table_name: str) -> bool:
+    """Vérifie si une table existe déjà dans la base."""
+    result = conn.execute(
+        text("SELECT 1 FROM information_schema.tables WHERE table_name = :table_name"),
+        {"table_name": table_name},
+    )
+    return result.first() is not None
+
+
+def migrate_database():
+    """Ajoute tickets.updated_at et la table ticket_tombstones"""
+    try:
+        print("Début de la migration...")
+
+        with migration_connection() as conn:
+            if not column_exists(conn, "tickets", "updated_at"):
+                print("Ajout de la colonne 'updated_at' dans la table 'tickets'...")
+                conn.execute(text("ALTER TABLE tickets ADD COLUMN updated_at TIMESTAMP NULL"))
+                conn.commit()
+                print("OK - Colonne 'updated_at' ajoutée dans 'tickets'")
+            else:
+                print("OK - La colonne 'updated_at' existe déjà dans 'tickets'")
+
+            # Remplissage par lots des tickets sans updated_at
+            max_id = conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM tickets")).scalar()
+            lower = 0
+            while lower < max_id:
+                upper = lower + BATCH_SIZE
+                result = conn.execute(
+                    text(
+                        """
+                        UPDATE tickets t
+                        SET updated_at = GREATEST(
+                            t.created_at, t.assigned_at, t.resolved_at, t.closed_at, t.auto_closed_at,
+                            (SELECT MAX(h.changed_at) FROM ticket_history h WHERE h.ticket_id = t.id),
+                            (SELECT MAX(c.created_at) FROM comments c WHERE c.ticket_id = t.id)
+                        )
+                        WHERE t.id > :lower AND t.id <= :upper AND t.updated_at IS NULL
+                        """
+                    ),
+                    {"lower": lower, "upper": upper},
+                )
+                conn.commit()
+                print(f"  Tickets {lower + 1}..{upper} : {result.rowcount} ligne(s) renseignée(s)")
+                lower = upper
+
+            conn.execute(text(
+                "UPDATE tickets SET updated_at = (now() AT TIME ZONE 'utc') WHERE updated_at IS NULL"
+            ))
+            conn.execute(text("ALTER TABLE tickets ALTER COLUMN updated_at SET DEFAULT (now() AT TIME ZONE 'utc')"))
+            conn.execute(text("ALTER TABLE tickets ALTER COLUMN updated_at SET NOT NULL"))
+            conn.commit()
+            print("OK - Colonne 'updated_at' renseignée pour tous les tickets")
+
+            if not table_exists(conn, "ticket_tombstones"):
+                print("Création de la table 'ticket_tombstones'...")
+                conn.execute(text(
+                    """
+                    CREATE TABLE ticket_tombstones (
+                        id            SERIAL PRIMARY KEY,
+                        ticket_id     INTEGER NOT NULL,
+                        number        INTEGER,
+                        creator_id    INTEGER,
+                        technician_id INTEGER,
+                        deleted_at    TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc')
+                    )
+                    """
+                ))
+                conn.execute(text(
+                    "CREATE INDEX IF NOT EXISTS ix_ticket_tombstones_deleted_at ON ticket_tombstones (deleted_at)"
+                ))
+                conn.commit()
+                print("OK - Table 'ticket_tombstones' créée")
+            else:
+                print("OK - La table 'ticket_tombstones' existe déjà")
+
+        # CREATE INDEX CONCURRENTLY ne peut pas s'exécuter dans une transaction
+        with migration_connection(autocommit=True) as conn:
+            print("Création de l'index 'ix_tickets_updated_at' (updated_at, id)...")
+            create_index_concurrently(conn, "ix_tickets_updated_at", "ON tickets (updated_at, id)")
+            print("OK - Index 'ix_tickets_updated_at' disponible")
+
+        print("\nMigration terminée avec succès !")
+
+    except Exception as e:
+        print(f"ERREUR lors de la migration: {e}")
+
+
+if __name__ == "__main__":
+    migrate_database()
@@ -0,0 +1,65 @@
+"""
+Script de migration : détail des modifications et index de l'historique des actifs
+
+- asset_history.changes (JSONB) : champs modifiés {"champ": {"old": ..., "new": ...}}
+- asset_history (asset_id, created_at DESC, id DESC) : historique d'un actif, par pages
+- asset_history (ticket_id, created_at DESC, id DESC) : interventions liées à un ticket (index partiel)
+
+Migration NON destructive : colonne et index ajoutés s'ils n'existent pas (index CONCURRENTLY).
+"""
+from sqlalchemy import text
+from app.database import create_index_concurrently, migration_connection
+
+
+INDEXES = [
+    ("ix_asset_history_asset_created", "asset_id, created_at DESC, id DESC", None),
+    ("ix_asset_history_ticket_created", "ticket_id, created_at DESC, id DESC", "ticket_id IS NOT NULL"),
+]
+
+
+def column_exists(conn, table_name: str, column_name: str) -> bool:
+    """Vérifie si une colonne existe déjà dans une table."""
+    result = conn.execute(
+        text(
+            """
+            SELECT 1
+            FROM information_schema.columns
+            WHERE table_name = :table_name AND column_name = :column_name
+            """
+        ),
+        {"table_name": table_name, "column_name": column_name},
+    )
+    return result.first() is not None
+
+
+def migrate_database():
+    """Ajoute la colonne changes et les index de l'historique des actifs"""
+    try:
+        print("Début de la migration...")
+
+        # CREATE INDEX CONCURRENTLY ne peut pas s'exécuter dans une transaction
+        with migration_connection(autocommit=True) as conn:
+            if not column_exists(conn, "asset_history", "changes"):
+                print("Ajout de la colonne 'changes' dans 'asset_history'...")
+                conn.execute(text("ALTER TABLE asset_history ADD COLUMN changes JSONB NULL"))
+                print("OK - Colonne 'changes' ajoutée")
+            else:
+                print("OK - La colonne 'changes' existe déjà")
+
+            for index_name, columns, predicate in INDEXES:
+                print(f"Création de l'index '{index_name}' sur 'asset_history' ({columns})...")
+                create_index_concurrently(
+                    conn,
+                    index_name,
+                    f"ON asset_history ({columns})" + (f" WHERE {predicate}" if predicate else ""),
+                )
+                print(f"OK - Index '{index_name}' disponible")
+
+        print("\nMigration terminée avec succès !")
+
+    except Exception as e:
+        print(f"ERREUR lors de la migration: {e}")
+
+
+if __name__ == "__main__":
+    migrate_database()
@@ -0,0 +1,90 @@
+"""
+Script de migration : alertes d'expiration de garantie des actifs
+
+1. Ajoute la valeur 'GARANTIE_EXPIRATION' au type enum notificationtype
+   (SQLAlchemy envoie le NOM de l'enum à PostgreSQL, pas la valeur).
+2. Crée la table asset_warranty_alerts : une ligne par actif, fenêtre d'alerte (30/60/90 jours...)
+   et date de fin de garantie déjà signalées, pour ne pas notifier deux fois.
+   Si la garantie est prolongée (nouvelle date de fin), l'actif peut être signalé à nouveau.
+3. Crée l'index partiel assets (date_de_fin_garantie) utilisé par la tâche planifiée
+   check_warranty_expirations (app/scheduler.py).
+
+Migration NON destructive.
+"""
+from sqlalchemy import text
+from app.database import create_index_concurrently, migration_connection
+
+
+def table_exists(conn, table_name: str) -> bool:
+    """Vérifie si une table existe déjà."""
+    result = conn.execute(
+        text(
+            """
+            SELECT 1
+            FROM information_schema.tables
+            WHERE table_name = :table_name
+            """
+        ),
+        {"table_name": table_name},
+    )
+    return result.first() is not None
+
+
+def add_notification_type(conn) -> None:
+    """Ajoute 'GARANTIE_EXPIRATION' à l'enum notificationtype si nécessaire."""
+    result = conn.execute(text("""
+        SELECT 1 FROM pg_enum e
+        JOIN pg_type t ON e.enumtypid = t.oid
+        WHERE t.typname = 'notificationtype' AND e.enumlabel = 'GARANTIE_EXPIRATION'
+    """))
+    if result.first() is None:
+        print("Ajout de la valeur 'GARANTIE_EXPIRATION' au type 'notificationtype'...")
+        conn.execute(text("ALTER TYPE notificationtype ADD VALUE 'GARANTIE_EXPIRATION'"))
+        print("OK - Valeur 'GARANTIE_EXPIRATION' ajoutée")
+    else:
+        print("OK - La valeur 'GARANTIE_EXPIRATION' existe déjà dans l'enum")
+
+
+def migrate_database():
+    """Prépare les alertes d'expiration de garantie"""
+    try:
+        print("Début de la migration...")
+
+        # ALTER TYPE ... ADD VALUE et CREATE INDEX CONCURRENTLY ne peuvent pas s'exécuter dans une transaction
+        with migration_connection(autocommit=True) as conn:
+            add_notification_type(conn)
+
+            if not table_exists(conn, "asset_warranty_alerts"):
+                print("Création de la table 'asset_warranty_alerts'...")
+                conn.execute(text(
+                    """
+                    CREATE TABLE asset_warranty_alerts (
+                        id            SERIAL PRIMARY KEY,
+                        asset_id      INTEGER NOT NULL REFERENCES assets(id) ON DELETE CASCADE,
+                        window_days   INTEGER NOT NULL,
+                        warranty_end  DATE NOT NULL,
+                        notified_at   TIMESTAMPTZ NOT NULL DEFAULT now(),
+                        UNIQUE (asset_id, window_days, warranty_end)
+                    )
+                    """
+                ))
+                print("OK - Table 'asset_warranty_alerts' créée")
+            else:
+                print("OK - La table 'asset_warranty_alerts' existe déjà")
+
+            print("Création de l'index 'ix_assets_date_de_fin_garantie'...")
+            create_index_concurrently(
+                conn,
+                "ix_assets_date_de_fin_garantie",
+                "ON assets (date_de_fin_garantie) WHERE date_de_fin_garantie IS NOT NULL",
+            )
+            print("OK - Index 'ix_assets_date_de_fin_garantie' disponible")
+
+        print("\nMigration terminée avec succès !")
+
+    except Exception as e:
+        print(f"ERREUR lors de la migration: {e}")
+
+
+if __name__ == "__main__":
+    migrate_database()
@@ -0,0 +1,68 @@
+"""
+Script de migration : index de recherche et de pagination de l'inventaire (table assets)
+
+- Extension pg_trgm + index GIN trigrammes sur nom, numero_de_serie, marque, modele
+  (recherche partielle ILIKE '%...%' sans parcours complet de la table)
+- assets (created_at DESC, id DESC) : pagination par curseur
+- assets (statut), (type), (departement) : filtres et facettes
+
+Si l'extension pg_trgm ne peut pas être installée (droits insuffisants), les index trigrammes
+sont ignorés : la recherche reste fonctionnelle, mais sans index.
+Migration NON destructive : les index sont créés s'ils n'existent pas (CONCURRENTLY, sans bloquer les écritures).
+"""
+from sqlalchemy import text
+from app.database import create_index_concurrently, migration_connection
+
+
+TRIGRAM_INDEXES = [
+    ("ix_assets_nom_trgm", "nom"),
+    ("ix_assets_numero_de_serie_trgm", "numero_de_serie"),
+    ("ix_assets_marque_trgm", "marque"),
+    ("ix_assets_modele_trgm", "modele"),
+]
+
+BTREE_INDEXES = [
+    ("ix_assets_created_at_id", "created_at DESC, id DESC"),
+    ("ix_assets_statut", "statut"),
+    ("ix_assets_type", "type"),
+    ("ix_assets_departement", "departement"),
+]
+
+
+def enable_pg_trgm(conn) -> bool:
+    """Active l'extension pg_trgm. Retourne False si elle n'est pas disponible."""
+    try:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        print("OK - Extension 'pg_trgm' disponible")
+        return True
+    except Exception as e:
+        print(f"ATTENTION - Extension 'pg_trgm' indisponible, index trigrammes ignorés: {e}")
+        return False
+
+
+def migrate_database():
+    """Crée les index de recherche de l'inventaire s'ils n'existent pas"""
+    try:
+        print("Début de la migration...")
+
+        # CREATE INDEX CONCURRENTLY ne peut pas s'exécuter dans une transaction
+        with migration_connection(autocommit=True) as conn:
+            if enable_pg_trgm(conn):
+                for index_name, column in TRIGRAM_INDEXES:
+                    print(f"Création de l'index '{index_name}' (gin_trgm_ops sur {column})...")
+                    create_index_concurrently(conn, index_name, f"ON assets USING gin ({column} gin_trgm_ops)")
+                    print(f"OK - Index '{index_name}' disponible")
+
+            for index_name, columns in BTREE_INDEXES:
+                print(f"Création de l'index '{index_name}' sur 'assets' ({columns})...")
+                create_index_concurrently(conn, index_name, f"ON assets ({columns})")
+                print(f"OK - Index '{index_name}' disponible")
+
+        print("\nMigration terminée avec succès !")
+
+    except Exception as e:
+        print(f"ERREUR lors de la migration: {e}")
+
+
+if __name__ == "__main__":
+    migrate_database()
@@ -0,0 +1,190 @@
+"""
+Script de migration : événements d'historique typés pour les commentaires
+
+Avant cette migration, chaque commentaire était recopié dans ticket_history.reason
+("Commentaire: ..." ou "Commentaire (interne): ..."). Désormais l'événement d'historique
+référence le commentaire (comment_id) et porte un type (event_type).
+
+Étapes :
+1. Ajout des colonnes event_type (défaut 'statut') et comment_id (+ index) si absentes.
+   La suppression d'un commentaire ne supprime pas l'entrée d'historique (ON DELETE SET NULL) ;
+   une clé ON DELETE CASCADE créée par une version précédente du script est remplacée.
+2. Déduplication par lots : les entrées "Commentaire..." existantes sont rattachées au
+   commentaire correspondant (même ticket, même auteur, même texte, date la plus proche),
+   passent en event_type = 'commentaire' et leur reason (copie du texte) est vidée.
+   Les entrées sans commentaire correspondant sont laissées telles quelles.
+3. VACUUM ANALYZE de ticket_history pour réutiliser l'espace libéré.
+
+Chaque lot est validé séparément : le script peut être interrompu et relancé.
+"""
+from sqlalchemy import text
+from app.database import migration_connection
+
+BATCH_SIZE = 5000
+
+# Longueurs des préfixes (substr est en base 1)
+INTERNAL_PREFIX = "Commentaire (interne): "
+PUBLIC_PREFIX = "Commentaire: "
+
+
+def column_exists(conn, table_name: str, column_name: str) -> bool:
+    """Vérifie si une colonne existe déjà dans une table."""
+    result = conn.execute(
+        text(
+            """
+            SELECT 1
+            FROM information_schema.columns
+            WHERE table_name = :table_name AND column_name = :column_name
+            """
+        ),
+        {"table_name": table_name, "column_name": column_name},
+    )
+    return result.first() is not None
+
+
+def add_columns(conn) -> None:
+    """Ajoute event_type et comment_id à ticket_history si nécessaire."""
+    if not column_exists(conn, "ticket_history", "event_type"):
+        print("Ajout de la colonne 'event_type' dans 'ticket_history'...")
+        conn.execute(text(
+            "ALTER TABLE ticket_history ADD COLUMN event_type VARCHAR(30) NOT NULL DEFAULT 'statut'"
+        ))
+        conn.commit()
+        print("OK - Colonne 'event_type' ajoutée")
+    else:
+        print("OK - La colonne 'event_type' existe déjà")
+
+    if not column_exists(conn, "ticket_history", "comment_id"):
+        print("Ajout de la colonne 'comment_id' dans 'ticket_history'...")
+        conn.execute(text(
+            "ALTER TABLE ticket_history "
+            "ADD COLUMN comment_id INTEGER NULL REFERENCES comments(id) ON DELETE SET NULL"
+        ))
+        conn.commit()
+        print("OK - Colonne 'comment_id' ajoutée")
+    else:
+        print("OK - La colonne 'comment_id' existe déjà")
+
+    # Version précédente du script : ON DELETE CASCADE effaçait l'historique avec le commentaire
+    cascade_fks = conn.execute(text(
+        """
+        SELECT con.conname
+        FROM pg_constraint con
+        JOIN pg_attribute att ON att.attrelid = con.conrelid AND att.attnum = ANY(con.conkey)
+        WHERE con.conrelid = 'ticket_history'::regclass
+          AND con.contype = 'f'
+          AND con.confdeltype = 'c'
+          AND att.attname = 'comment_id'
+        """
+    )).scalars().all()
+    for constraint_name in cascade_fks:
+        print(f"Remplacement de la contrainte '{constraint_name}' (ON DELETE CASCADE -> SET NULL)...")
+        conn.execute(text(f'ALTER TABLE ticket_history DROP CONSTRAINT "{constraint_name}"'))
+        conn.execute(text(
+            "ALTER TABLE ticket_history ADD CONSTRAINT ticket_history_comment_id_fkey "
+            "FOREIGN KEY (comment_id) REFERENCES comments(id) ON DELETE SET NULL NOT VALID"
+        ))
+        conn.commit()
+        conn.execute(text("ALTER TABLE ticket_history VALIDATE CONSTRAINT ticket_history_comment_id_fkey"))
+        conn.commit()
+        print("OK - Contrainte 'ticket_history_comment_id_fkey' en ON DELETE SET NULL")
+
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_ticket_history_comment_id "
+        "ON ticket_history (comment_id) WHERE comment_id IS NOT NULL"
+    ))
+    conn.commit()
+
+
+def deduplicate_comment_entries(conn) -> int:
+    """Rattache par lots les entrées "Commentaire..." à leur commentaire et vide le texte recopié."""
+    max_id = conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM ticket_history")).scalar()
+    print(f"Déduplication des entrées de commentaires (ids 1..{max_id}, lots de {BATCH_SIZE})...")
+
+    total = 0
+    lower = 0
+    while lower < max_id:
+        upper = lower + BATCH_SIZE
+        result = conn.execute(
+            text(
+                """
+                WITH candidates AS (
+                    SELECT
+                        h.id AS history_id,
+                        (
+                            SELECT c.id
+                            FROM comments c
+                            WHERE c.ticket_id = h.ticket_id
+                              AND c.user_id = h.user_id
+                              AND c.content = CASE
+                                  WHEN h.reason LIKE :internal_like THEN substr(h.reason, :internal_start)
+                                  ELSE substr(h.reason, :public_start)
+                              END
+                              AND NOT EXISTS (
+                                  SELECT 1 FROM ticket_history linked WHERE linked.comment_id = c.id
+                              )
+                            ORDER BY abs(extract(epoch FROM (c.created_at - h.changed_at))), c.id
+                            LIMIT 1
+                        ) AS comment_id
+                    FROM ticket_history h
+                    WHERE h.id > :lower AND h.id <= :upper
+                      AND h.comment_id IS NULL
+                      AND (h.reason LIKE :internal_like OR h.reason LIKE :public_like)
+                )
+                UPDATE ticket_history h
+                SET comment_id = candidates.comment_id,
+                    event_type = 'commentaire',
+                    reason = NULL
+                FROM candidates
+                WHERE h.id = candidates.history_id
+                  AND candidates.comment_id IS NOT NULL
+                """
+            ),
+            {
+                "lower": lower,
+                "upper": upper,
+                "internal_like": INTERNAL_PREFIX + "%",
+                "public_like": PUBLIC_PREFIX + "%",
+                "internal_start": len(INTERNAL_PREFIX) + 1,
+                "public_start": len(PUBLIC_PREFIX) + 1,
+            },
+        )
+        conn.commit()
+        total += result.rowcount
+        print(f"  Lot {lower + 1}..{upper} : {result.rowcount} entrée(s) dédupliquée(s)")
+        lower = upper
+
+    return total
+
+
+def migrate_database():
+    """Ajoute les colonnes typées et déduplique les textes de commentaires de ticket_history"""
+    try:
+        print("Début de la migration...")
+
+        # Sans statement_timeout : lots de mises à jour et VACUUM sur une grosse table
+        with migration_connection() as conn:
+            add_columns(conn)
+            total = deduplicate_comment_entries(conn)
+            print(f"OK - {total} entrée(s) d'historique rattachée(s) à leur commentaire")
+
+            remaining = conn.execute(text(
+                "SELECT COUNT(*) FROM ticket_history "
+                "WHERE comment_id IS NULL AND (reason LIKE :internal_like OR reason LIKE :public_like)"
+            ), {"internal_like": INTERNAL_PREFIX + "%", "public_like": PUBLIC_PREFIX + "%"}).scalar()
+            if remaining:
+                print(f"ATTENTION - {remaining} entrée(s) sans commentaire correspondant conservée(s) telles quelles")
+
+        # VACUUM ne peut pas s'exécuter dans une transaction
+        print("VACUUM ANALYZE ticket_history...")
+        with migration_connection(autocommit=True) as conn:
+            conn.execute(text("VACUUM ANALYZE ticket_history"))
+
+        print("\nMigration terminée avec succès !")
+
+    except Exception as e:
+        print(f"ERREUR lors de la migration: {e}")
+
+
+if __name__ == "__main__":
+    migrate_database()
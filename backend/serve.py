@@ -0,0 +1,204 @@
+"""
+Lanceur du serveur de production (plusieurs workers).
+
+Usage (depuis backend/) :
+
+    python serve.py                         # gunicorn + workers uvicorn (Linux/macOS)
+    python serve.py --server uvicorn        # workers gérés par uvicorn (Windows, ou sans gunicorn)
+    python serve.py --reload                # développement : un seul processus, rechargement du code
+    WEB_WORKERS=8 WEB_PORT=8080 python serve.py
+
+Configuration (variables d'environnement, surchargées par les options de la ligne de commande) :
+
+    WEB_HOST                 adresse d'écoute (défaut : 0.0.0.0)
+    WEB_PORT                 port (défaut : 8000)
+    WEB_WORKERS              nombre de processus (défaut : nombre de cœurs)
+    WEB_KEEPALIVE            durée de maintien des connexions HTTP inactives, en secondes (défaut : 5)
+    WEB_GRACEFUL_TIMEOUT     délai laissé aux requêtes en cours à l'arrêt ou au rechargement (défaut : 30)
+    WEB_TIMEOUT              worker sans réponse redémarré après ce délai, gunicorn (défaut : 120)
+    WEB_MAX_REQUESTS         worker recyclé après N requêtes, 0 = jamais (défaut : 0)
+    WEB_BACKLOG              connexions en attente d'acceptation (défaut : 2048)
+    WEB_PRELOAD              gunicorn : importer l'application avant le fork (défaut : true)
+    FORWARDED_ALLOW_IPS      proxys dont les en-têtes X-Forwarded-For / X-Forwarded-Proto sont pris
+                             en compte, séparés par des virgules (défaut : 127.0.0.1, proxy inverse
+                             local). Les autres clients ne peuvent pas choisir l'adresse vue par
+                             l'application (liste d'adresses de /metrics, app/metrics.py) ; ne jamais
+                             mettre "*" si le port est joignable sans passer par le proxy.
+
+- Boucle d'événements uvloop et parseur HTTP httptools (fournis par uvicorn[standard]) lorsqu'ils
+  sont installés ; asyncio et h11 sinon (Windows).
+- Tâches planifiées : un seul worker les exécute, celui qui détient le verrou du scheduler
+  (app/scheduler.py, SchedulerElection). Les autres retentent de le prendre toutes les
+  SCHEDULER_LOCK_RETRY_SECONDS secondes (30 par défaut). Pendant un rechargement (HUP,
+  USR2 puis QUIT), un worker de la nouvelle génération prend donc le relais après l'arrêt
+  de l'ancien détenteur. Une exécution planifiée qui tombe pendant ce délai est sautée.
+- Métriques Prometheus : avec plusieurs workers, PROMETHEUS_MULTIPROC_DIR (créé dans le répertoire
+  temporaire s'il n'est pas défini) est vidé de ses fichiers .db au démarrage ; /metrics agrège
+  alors tous les processus.
+
+Rechargement sans interruption (gunicorn) : `kill -HUP <pid du maître>` remplace les workers un
+par un après la fin de leurs requêtes en cours. Avec WEB_PRELOAD=true, le code est chargé par le
+maître : pour déployer une nouvelle version, démarrer un nouveau maître (`kill -USR2 <pid>`) puis
+arrêter l'ancien (`kill -QUIT <ancien pid>`), ou définir WEB_PRELOAD=false pour que HUP recharge le code.
+"""
+import argparse
+import importlib.util
+import os
+import sys
+import tempfile
+
+
+APP = "app.main:app"
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).lower() == "true"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serveur de production de l'API")
+    parser.add_argument("--server", choices=["gunicorn", "uvicorn"], help="Gestionnaire de workers (défaut : gunicorn si disponible)")
+    parser.add_argument("--host", default=os.getenv("WEB_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("WEB_PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_WORKERS", str(os.cpu_count() or 1))))
+    parser.add_argument("--keepalive", type=int, default=int(os.getenv("WEB_KEEPALIVE", "5")))
+    parser.add_argument("--graceful-timeout", type=int, default=int(os.getenv("WEB_GRACEFUL_TIMEOUT", "30")))
+    parser.add_argument("--timeout", type=int, default=int(os.getenv("WEB_TIMEOUT", "120")))
+    parser.add_argument("--max-requests", type=int, default=int(os.getenv("WEB_MAX_REQUESTS", "0")))
+    parser.add_argument("--backlog", type=int, default=int(os.getenv("WEB_BACKLOG", "2048")))
+    parser.add_argument("--no-preload", dest="preload", action="store_false", default=_env_bool("WEB_PRELOAD", True))
+    parser.add_argument("--forwarded-allow-ips", default=os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1"))
+    parser.add_argument("--reload", action="store_true", help="Développement : un processus, rechargement à chaque modification")
+    return parser.parse_args(argv)
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def _loop() -> str:
+    return "uvloop" if _installed("uvloop") else "asyncio"
+
+
+def _http() -> str:
+    return "httptools" if _installed("httptools") else "h11"
+
+
+def prepare_metrics_dir(workers: int) -> None:
+    """Répertoire des métriques multi-processus, vidé à chaque démarrage (valeurs des anciens pid)."""
+    if workers <= 1:
+        return
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if not directory:
+        directory = os.path.join(tempfile.gettempdir(), f"tickets-metrics-{os.getpid()}")
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = directory
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(directory):
+        if name.endswith(".db"):
+            os.remove(os.path.join(directory, name))
+
+
+# ---------------------------------------------------------------------------
+# uvicorn
+# ---------------------------------------------------------------------------
+
+def run_uvicorn(args) -> None:
+    import uvicorn
+
+    uvicorn.run(
+        APP,
+        host=args.host,
+        port=args.port,
+        workers=None if args.reload else args.workers,
+        reload=args.reload,
+        loop=_loop(),
+        http=_http(),
+        timeout_keep_alive=args.keepalive,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        limit_max_requests=args.max_requests or None,
+        backlog=args.backlog,
+        proxy_headers=True,
+        forwarded_allow_ips=args.forwarded_allow_ips,
+    )
+
+
+# ---------------------------------------------------------------------------
+# gunicorn
+# ---------------------------------------------------------------------------
+
+def _post_fork(server, worker) -> None:
+    # Application préchargée par le maître : ne pas réutiliser ses connexions dans le worker
+    from app.database import READ_REPLICA_ENABLED, engine, read_engine
+
+    engine.dispose(close=False)
+    if READ_REPLICA_ENABLED:
+        read_engine.dispose(close=False)
+
+
+def _child_exit(server, worker) -> None:
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def run_gunicorn(args) -> None:
+    from gunicorn.app.base import BaseApplication
+
+    worker_class = "uvicorn_worker.UvicornWorker"
+    if _loop() == "asyncio" or _http() == "h11":
+        worker_class = "uvicorn_worker.UvicornH11Worker"
+
+    options = {
+        "bind": f"{args.host}:{args.port}",
+        "workers": args.workers,
+        "worker_class": worker_class,
+        "keepalive": args.keepalive,
+        "graceful_timeout": args.graceful_timeout,
+        "timeout": args.timeout,
+        "max_requests": args.max_requests,
+        # Étaler les recyclages pour ne pas redémarrer tous les workers en même temps
+        "max_requests_jitter": args.max_requests // 10,
+        "backlog": args.backlog,
+        "preload_app": args.preload,
+        "forwarded_allow_ips": args.forwarded_allow_ips,
+        "accesslog": "-",
+        "post_fork": _post_fork,
+        "child_exit": _child_exit,
+    }
+
+    class Application(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from app.main import app
+
+            return app
+
+    Application().run()
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    server = args.server
+    if server is None:
+        server = "gunicorn" if os.name != "nt" and _installed("gunicorn") and _installed("uvicorn_worker") else "uvicorn"
+    if args.reload:
+        server = "uvicorn"
+
+    prepare_metrics_dir(1 if args.reload else args.workers)
+    print(
+        f"Serveur {server} sur {args.host}:{args.port} : "
+        f"{1 if args.reload else args.workers} worker(s), boucle {_loop()}, HTTP {_http()}, keep-alive {args.keepalive} s"
+    )
+    if server == "gunicorn":
+        run_gunicorn(args)
+    else:
+        run_uvicorn(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Fixtures partagées.
+
+`db` : session sur la base PostgreSQL configurée (variables POSTGRES_*, schéma à jour avec
+init_db.py et les scripts migrate_*.py). Tout est annulé à la fin du test : les commit() du code
+testé ne valident qu'un point de sauvegarde. Les tests qui l'utilisent sont ignorés si la base
+est inaccessible.
+"""
+import uuid
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.database import engine
+
+
+@pytest.fixture
+def db():
+    try:
+        connection = engine.connect()
+    except OperationalError as e:
+        pytest.skip(f"PostgreSQL inaccessible : {e.orig}")
+    transaction = connection.begin()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
+
+
+@pytest.fixture
+def make_user(db):
+    """Crée un utilisateur (et son rôle si besoin) dans la transaction du test."""
+    from app import models
+
+    def make(role_name: str = "Utilisateur") -> models.User:
+        role = db.query(models.Role).filter(models.Role.name == role_name).first()
+        if role is None:
+            role = models.Role(name=role_name)
+            db.add(role)
+        name = f"test-{uuid.uuid4().hex[:12]}"
+        user = models.User(
+            full_name=name, email=f"{name}@test.local", username=name, password_hash="-", role=role, actif=True
+        )
+        db.add(user)
+        db.flush()
+        return user
+
+    return make
+
+
+@pytest.fixture
+def make_ticket(db):
+    """Crée un ticket (numéro suivant le plus grand existant) dans la transaction du test."""
+    from app import models
+
+    def make(creator, **values) -> models.Ticket:
+        number = db.execute(text("SELECT COALESCE(MAX(number), 0) + 1 FROM tickets")).scalar()
+        ticket = models.Ticket(
+            number=number,
+            title="Ticket de test",
+            description="Description",
+            type=models.TicketType.MATERIEL,
+            status=models.TicketStatus.EN_ATTENTE_ANALYSE,
+            creator_id=creator.id,
+            **values,
+        )
+        db.add(ticket)
+        db.flush()
+        return ticket
+
+    return make
+
+
+@pytest.fixture
+def api(db):
+    """Client HTTP de l'application, dont les routes utilisent la session `db` du test."""
+    from fastapi.testclient import TestClient
+
+    from app.database import get_db
+    from app.main import app
+    from app.read_replica import get_read_db
+
+    def override():
+        yield db
+
+    app.dependency_overrides[get_db] = override
+    app.dependency_overrides[get_read_db] = override
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+
+def auth_headers(user) -> dict:
+    from app.security import create_access_token
+
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
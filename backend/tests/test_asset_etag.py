@@ -0,0 +1,37 @@
+"""En-tête If-Match des mises à jour d'actifs (app/routers/assets.py)."""
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app.routers.assets import _asset_etag, _parse_if_match
+
+
+def test_etag_round_trip():
+    updated_at = datetime(2026, 10, 19, 8, 30, 15, 123456, tzinfo=timezone.utc)
+    assert _parse_if_match(_asset_etag(updated_at)) == (True, updated_at)
+
+
+def test_etag_of_undated_asset():
+    assert _parse_if_match(_asset_etag(None)) == (True, None)
+
+
+@pytest.mark.parametrize("value", [None, "", "*", " * "])
+def test_no_precondition(value):
+    assert _parse_if_match(value) == (False, None)
+
+
+def test_raw_updated_at_is_accepted():
+    assert _parse_if_match("2026-10-19T08:30:15") == (True, datetime(2026, 10, 19, 8, 30, 15))
+
+
+def test_weak_etag_never_matches():
+    with pytest.raises(HTTPException) as exc_info:
+        _parse_if_match('W/"2026-10-19T08:30:15"')
+    assert exc_info.value.status_code == 412
+
+
+def test_invalid_if_match_is_rejected():
+    with pytest.raises(HTTPException) as exc_info:
+        _parse_if_match('"pas-une-date"')
+    assert exc_info.value.status_code == 400
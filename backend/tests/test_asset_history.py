@@ -0,0 +1,16 @@
+"""Expressions SQL de l'historique des actifs (app/asset_history.py)."""
+from app.asset_history import DIFF_IGNORED_COLUMNS, changed_fields_description, changes_sql
+
+
+def test_changed_fields_description():
+    assert changed_fields_description("u.changes", "Import : ") == (
+        "'Import : ' || (SELECT string_agg(key, ', ' ORDER BY key) FROM jsonb_object_keys(u.changes) AS key)"
+    )
+
+
+def test_changes_sql_ignores_technical_columns():
+    sql = changes_sql("to_jsonb(old)", "to_jsonb(new)")
+    assert "jsonb_each(to_jsonb(new)) AS n" in sql
+    assert "jsonb_each(to_jsonb(old)) AS o" in sql
+    for column in DIFF_IGNORED_COLUMNS:
+        assert f"'{column}'" in sql
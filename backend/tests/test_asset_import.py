@@ -0,0 +1,108 @@
+"""Normalisation des lignes importées (app/asset_import.py)."""
+import io
+
+import pytest
+
+from sqlalchemy import text
+
+from app.asset_import import REQUIRED_COLUMNS, AssetImportError, import_assets, iter_rows, normalize_row, update_columns
+
+
+VALID_ROW = {
+    "nom": "PC portable",
+    "type": "laptop",
+    "numero_de_serie": "SN-001",
+    "marque": "Dell",
+    "modele": "Latitude 5440",
+    "localisation": "Siège",
+    "departement": "DSI",
+    "date_d_achat": "15/03/2024",
+}
+
+
+def test_valid_row_is_normalized():
+    row, errors = normalize_row({**VALID_ROW, "prix_d_achat": "1 234,50", "date_de_fin_garantie": "2027-03-15"})
+    assert errors == []
+    assert row["date_d_achat"] == "2024-03-15"
+    assert row["date_de_fin_garantie"] == "2027-03-15"
+    assert row["prix_d_achat"] == "1234.50"
+
+
+def test_empty_statut_is_left_to_insert():
+    # DEFAULT_STATUT n'est appliqué qu'aux nouveaux actifs, à l'insertion
+    row, errors = normalize_row({**VALID_ROW, "statut": ""})
+    assert errors == []
+    assert row["statut"] is None
+
+
+def test_missing_and_invalid_values_are_reported():
+    row, errors = normalize_row(
+        {**VALID_ROW, "nom": "", "date_d_achat": "31/02/2024", "prix_d_achat": "abc", "assigned_to_user_id": "12a"}
+    )
+    assert "nom manquant" in errors
+    assert "date_d_achat invalide : 31/02/2024" in errors
+    assert "prix_d_achat invalide : abc" in errors
+    assert "assigned_to_user_id invalide : 12a" in errors
+
+
+def test_update_columns_follow_the_header():
+    assert update_columns(["numero_de_serie", "localisation"]) == ["localisation"]
+    assert update_columns(["numero_de_serie", "assigned_to_user_id"]) == ["assigned_to_user_id", "assigned_to_name"]
+
+
+def test_iter_rows_reads_semicolon_csv():
+    content = (
+        "Nom;Type;Numero de serie;Marque;Modele;Localisation;Departement;Date d_achat\n"
+        "PC;laptop;SN-1;Dell;X;Siège;DSI;01/02/2024\n"
+        ";;;;;;;\n"
+        "Écran;monitor;SN-2;HP;Y;Siège;DSI;2024-02-02\n"
+    )
+    columns, rows = iter_rows(io.BytesIO(content.encode("utf-8")), "actifs.csv")
+    assert "numero_de_serie" in columns and "statut" not in columns
+    rows = list(rows)
+    assert [line_no for line_no, _ in rows] == [2, 4]
+    assert rows[1][1]["nom"] == "Écran"
+
+
+def test_iter_rows_requires_serial_number_only():
+    with pytest.raises(AssetImportError):
+        iter_rows(io.BytesIO(b"nom;type\nPC;laptop\n"), "actifs.csv")
+    columns, _ = iter_rows(io.BytesIO(b"numero_de_serie;localisation\nSN-1;Agence\n"), "actifs.csv")
+    assert columns == ["numero_de_serie", "localisation"]
+
+
+def test_partial_row_checks_only_header_columns():
+    required = [c for c in REQUIRED_COLUMNS if c in ("numero_de_serie", "localisation")]
+    row, errors = normalize_row({"numero_de_serie": "SN-1", "localisation": "Agence"}, required)
+    assert errors == []
+    assert row["nom"] is None
+    _, errors = normalize_row({"numero_de_serie": "SN-1", "localisation": ""}, required)
+    assert errors == ["localisation manquant"]
+
+
+def _insert_asset(db, numero_de_serie, **values):
+    row = {**VALID_ROW, "date_d_achat": "2024-03-15", "numero_de_serie": numero_de_serie, "statut": "in_service", **values}
+    return db.execute(
+        text(
+            "INSERT INTO assets (" + ", ".join(row) + ") VALUES ("
+            + ", ".join(f":{c}" for c in row) + ") RETURNING id"
+        ),
+        row,
+    ).scalar()
+
+
+def test_partial_file_updates_existing_assets_only(db):
+    asset_id = _insert_asset(db, "TEST-PARTIAL-1", notes="à conserver")
+    content = "numero_de_serie;localisation\nTEST-PARTIAL-1;Agence Nord\nTEST-PARTIAL-404;Agence Sud\n"
+
+    report = import_assets(db, io.BytesIO(content.encode("utf-8")), "actifs.csv")
+
+    assert (report["updated"], report["inserted"], report["rejected"]) == (1, 0, 1)
+    assert report["errors"][0]["line"] == 3
+    asset = db.execute(text("SELECT * FROM assets WHERE id = :id"), {"id": asset_id}).mappings().one()
+    assert asset["localisation"] == "Agence Nord"
+    # Colonnes absentes du fichier : inchangées
+    assert (asset["nom"], asset["statut"], asset["notes"]) == ("PC portable", "in_service", "à conserver")
+    assert db.execute(
+        text("SELECT count(*) FROM assets WHERE numero_de_serie = 'TEST-PARTIAL-404'")
+    ).scalar() == 0
@@ -0,0 +1,49 @@
+"""Cache des statistiques d'inventaire (app/routers/assets.py), sans base de données."""
+import pytest
+
+from app import models
+from app.routers import assets
+
+
+@pytest.fixture
+def stats_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(assets, "ASSET_STATS_STAMP_PATH", str(tmp_path / "stamp"))
+    monkeypatch.setattr(assets, "_asset_stats_cache", {"value": None, "expires_at": 0.0, "stamp": None})
+    calls = []
+
+    def compute(db):
+        calls.append(db)
+        return f"stats-{len(calls)}"
+
+    monkeypatch.setattr(assets, "_compute_asset_stats", compute)
+    return calls
+
+
+def _user():
+    return models.User(role=models.Role(name="DSI"))
+
+
+def test_stats_are_cached_until_invalidated(stats_cache):
+    assert assets.get_asset_stats(db="db", current_user=_user()) == "stats-1"
+    assert assets.get_asset_stats(db="db", current_user=_user()) == "stats-1"
+    assets.invalidate_asset_stats()
+    assert assets.get_asset_stats(db="db", current_user=_user()) == "stats-2"
+
+
+def test_result_computed_across_an_invalidation_is_not_cached(stats_cache, monkeypatch):
+    def compute_then_invalidate(db):
+        stats_cache.append(db)
+        assets.invalidate_asset_stats()  # Écriture concurrente pendant le calcul
+        return "stale"
+
+    monkeypatch.setattr(assets, "_compute_asset_stats", compute_then_invalidate)
+    assert assets.get_asset_stats(db="db", current_user=_user()) == "stale"
+    assert assets._asset_stats_cache["value"] is None
+
+
+def test_invalidation_by_another_worker(stats_cache):
+    assets.get_asset_stats(db="db", current_user=_user())
+    # Un autre processus ne partage que le fichier de date d'invalidation
+    with open(assets.ASSET_STATS_STAMP_PATH, "a"):
+        pass
+    assert assets.get_asset_stats(db="db", current_user=_user()) == "stats-2"
@@ -0,0 +1,55 @@
+"""Choix de l'encodage selon Accept-Encoding (app/compression.py)."""
+import pytest
+
+from app.compression import choose_encoding
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        ("", None),
+        ("identity", None),
+        ("gzip", "gzip"),
+        ("gzip, deflate, br", "br"),
+        ("br;q=0.5, gzip", "gzip"),
+        ("br;q=0, gzip;q=0", None),
+        ("*", "br"),
+        ("*;q=0.5, br;q=0", "gzip"),
+        ("GZIP", "gzip"),
+        ("br;q=abc, gzip", "gzip"),
+    ],
+)
+def test_choose_encoding(accept_encoding, expected):
+    assert choose_encoding(accept_encoding) == expected
+
+
+@pytest.fixture
+def static_client(tmp_path):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.compression import PrecompressedStaticFiles
+
+    (tmp_path / "code.svg").write_text("<svg>" + "<rect/>" * 500 + "</svg>")
+    app = FastAPI()
+    app.mount("/static", PrecompressedStaticFiles(directory=str(tmp_path)), name="static")
+    return TestClient(app)
+
+
+def test_precompressed_variant_has_its_own_etag(static_client):
+    identity = static_client.get("/static/code.svg", headers={"Accept-Encoding": "identity"})
+    brotli = static_client.get("/static/code.svg", headers={"Accept-Encoding": "br"})
+    assert identity.headers.get("content-encoding") is None
+    assert brotli.headers["content-encoding"] == "br"
+    assert brotli.headers["etag"] == identity.headers["etag"][:-1] + '-br"'
+    assert brotli.content == identity.content  # Décompressé par le client de test
+
+
+def test_precompressed_variant_revalidation(static_client):
+    etag = static_client.get("/static/code.svg", headers={"Accept-Encoding": "br"}).headers["etag"]
+    revalidated = static_client.get("/static/code.svg", headers={"Accept-Encoding": "br", "If-None-Match": etag})
+    assert revalidated.status_code == 304
+    # La version brotli en cache ne vaut pas pour un client qui reçoit gzip
+    other = static_client.get("/static/code.svg", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert other.status_code == 200
+    assert other.headers["content-encoding"] == "gzip"
@@ -0,0 +1,37 @@
+"""Accès à /metrics (app/metrics.py)."""
+import ipaddress
+
+import pytest
+from starlette.requests import Request
+
+from app import metrics
+
+
+def _request(host, authorization=None):
+    headers = [(b"authorization", authorization.encode())] if authorization else []
+    return Request({"type": "http", "method": "GET", "path": "/metrics", "headers": headers, "client": (host, 50000)})
+
+
+@pytest.fixture
+def allowed_ips(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_ALLOWED_IPS", [ipaddress.ip_network("127.0.0.1"), ipaddress.ip_network("10.1.0.0/16")])
+    monkeypatch.setattr(metrics, "METRICS_TOKEN", "")
+
+
+def test_allowed_networks(allowed_ips):
+    assert metrics.metrics_allowed(_request("127.0.0.1"))
+    assert metrics.metrics_allowed(_request("10.1.2.3"))
+    assert not metrics.metrics_allowed(_request("10.2.0.1"))
+    assert not metrics.metrics_allowed(_request("testclient"))
+
+
+def test_token(allowed_ips, monkeypatch):
+    assert not metrics.metrics_allowed(_request("203.0.113.5", "Bearer secret"))
+    monkeypatch.setattr(metrics, "METRICS_TOKEN", "secret")
+    assert metrics.metrics_allowed(_request("203.0.113.5", "Bearer secret"))
+    assert not metrics.metrics_allowed(_request("203.0.113.5", "Bearer wrong"))
+    assert not metrics.metrics_allowed(_request("203.0.113.5"))
+
+
+def test_forbidden_response(allowed_ips):
+    assert metrics.metrics_endpoint(_request("203.0.113.5")).status_code == 403
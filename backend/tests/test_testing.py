@@ -0,0 +1,41 @@
+"""Bornes du nombre de requêtes SQL (app/testing.py), sur une base SQLite en mémoire."""
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.testing import assert_max_queries, count_queries
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    yield engine
+    engine.dispose()
+
+
+def _run(engine, count):
+    with engine.connect() as conn:
+        for i in range(count):
+            conn.execute(text("SELECT :i"), {"i": i})
+
+
+def test_count_queries(engine):
+    with count_queries(engine) as stats:
+        _run(engine, 3)
+    assert stats.queries == 3
+    _run(engine, 2)  # Hors du bloc : plus comptées
+    assert stats.queries == 3
+
+
+def test_assert_max_queries_passes_within_limit(engine):
+    with assert_max_queries(3, engine) as stats:
+        _run(engine, 3)
+    assert stats.queries == 3
+
+
+def test_assert_max_queries_reports_repeated_statements(engine):
+    with pytest.raises(AssertionError) as exc_info:
+        with assert_max_queries(2, engine):
+            _run(engine, 4)
+    message = str(exc_info.value)
+    assert "4 requêtes SQL exécutées (maximum attendu : 2)" in message
+    assert "4 x SELECT ?" in message
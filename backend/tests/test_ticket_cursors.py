@@ -0,0 +1,34 @@
+"""Curseurs opaques de la chronologie et du flux /tickets/changes."""
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app import models
+from app.routers.tickets import _decode_cursor, _encode_cursor, _keyset_before
+
+
+def test_cursor_round_trip():
+    ts = datetime(2026, 10, 19, 8, 30, 15, 123456)
+    assert _decode_cursor(_encode_cursor(ts, "comment", 42)) == (ts, "comment", 42)
+
+
+@pytest.mark.parametrize("value", ["", "abc", "2026-10-19T08:30:00|ticket", "pas-une-date|ticket|1", "2026-10-19T08:30:00|ticket|x"])
+def test_invalid_cursor_is_rejected(value):
+    with pytest.raises(HTTPException) as exc_info:
+        _decode_cursor(value)
+    assert exc_info.value.status_code == 400
+
+
+def test_keyset_cursor_needs_no_lookup():
+    # Aucun accès à la base (db=None) : le curseur reste valable si l'élément a été supprimé
+    ts = datetime(2026, 10, 19, 8, 30)
+    condition = _keyset_before(None, models.Comment, models.Comment.created_at, 1, _encode_cursor(ts, "comment", 42))
+    compiled = condition.compile()
+    assert set(compiled.params.values()) == {ts, 42}
+
+
+def test_keyset_invalid_cursor_is_rejected():
+    with pytest.raises(HTTPException) as exc_info:
+        _keyset_before(None, models.Comment, models.Comment.created_at, 1, "pas-un-curseur")
+    assert exc_info.value.status_code == 400
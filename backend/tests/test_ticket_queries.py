@@ -0,0 +1,63 @@
+"""Nombre de requêtes SQL des routes de tickets (base PostgreSQL, voir conftest.py)."""
+from app import models
+from app.testing import assert_max_queries
+
+from .conftest import auth_headers
+
+
+def _add_activity(db, ticket, users):
+    for user in users:
+        db.add(models.Comment(ticket_id=ticket.id, user_id=user.id, content="Commentaire", type=models.CommentType.UTILISATEUR))
+        db.add(models.TicketHistory(
+            ticket_id=ticket.id, user_id=user.id, new_status=models.TicketStatus.EN_COURS, reason="Changement"
+        ))
+    db.flush()
+
+
+def _full_queries(db, api, ticket, viewer, expected_comments):
+    db.expire_all()  # Rien en cache dans la session : toutes les requêtes sont comptées
+    # Connexion (utilisateur connecté et son rôle), ticket, commentaires, historique
+    with assert_max_queries(5) as stats:
+        response = api.get(f"/tickets/{ticket.id}/full", headers=auth_headers(viewer))
+    assert response.status_code == 200
+    assert len(response.json()["comments"]) == expected_comments
+    return stats.queries
+
+
+def test_ticket_full_query_count_does_not_grow_with_activity(db, api, make_user, make_ticket):
+    agent = make_user("DSI")
+    creator = make_user()
+    small = make_ticket(creator, technician_id=make_user("Technicien").id)
+    large = make_ticket(creator, technician_id=make_user("Technicien").id)
+    _add_activity(db, small, [make_user() for _ in range(2)])
+    _add_activity(db, large, [make_user() for _ in range(12)])
+
+    queries_small = _full_queries(db, api, small, agent, 2)
+    queries_large = _full_queries(db, api, large, agent, 12)
+
+    assert queries_large == queries_small
+
+
+def _list_queries(db, api, agent, expected_tickets):
+    db.expire_all()
+    # Connexion (utilisateur connecté et son rôle), liste des tickets avec créateurs, techniciens et rôles
+    with assert_max_queries(3) as stats:
+        response = api.get("/tickets/", headers=auth_headers(agent))
+    assert response.status_code == 200
+    assert len(response.json()) == expected_tickets
+    return stats.queries
+
+
+def test_ticket_list_query_count_does_not_grow_with_roles(db, api, make_user, make_ticket):
+    agent = make_user("DSI")
+    make_ticket(make_user(), technician_id=make_user("Technicien").id)
+    before = db.query(models.Ticket).count()
+    queries_small = _list_queries(db, api, agent, before)
+
+    # Créateurs et techniciens avec des rôles tous différents : aucun rôle n'est déjà en session
+    for index in range(6):
+        creator = make_user(f"Rôle créateur {index}")
+        make_ticket(creator, technician_id=make_user(f"Rôle technicien {index}").id)
+    queries_large = _list_queries(db, api, agent, before + 6)
+
+    assert queries_large == queries_small